@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """一次性腳本：手動把指定比賽加進 Gist 歷史記錄"""
-import json, os, requests
+import os
+
+import gist_client
 
 GH_TOKEN  = os.getenv("GH_TOKEN", "")
-GIST_DESC = "mlb_bot_history"
 
 PICKS_TO_ADD = [
     {
@@ -36,51 +37,35 @@ PICKS_TO_ADD = [
     },
 ]
 
-def gh_h():
-    return {"Authorization": "token " + GH_TOKEN, "Content-Type": "application/json"}
-
-def find_gid(gists):
-    old = {"mlb_bot_v107_history","mlb_bot_v108_history","mlb_bot_v109_history"}
-    new_id = old_id = None
-    for g in gists:
-        d = g.get("description","")
-        if d == GIST_DESC: new_id = g["id"]
-        elif d in old and not old_id: old_id = g["id"]
-    return new_id or old_id
-
 def main():
     if not GH_TOKEN:
         print("ERROR: GH_TOKEN not set"); return
 
-    r = requests.get("https://api.github.com/gists", headers=gh_h(), timeout=15)
-    r.raise_for_status()
-    gid = find_gid(r.json())
-    if not gid:
+    snap = gist_client.read(GH_TOKEN)
+    if not snap["id"]:
         print("ERROR: Gist not found"); return
+    print(f"Loaded {len(snap['records'])} existing records")
 
-    detail  = requests.get("https://api.github.com/gists/" + gid, headers=gh_h(), timeout=15).json()
-    raw_url = list(detail["files"].values())[0]["raw_url"]
-    records = requests.get(raw_url, timeout=15).json()
-    print(f"Loaded {len(records)} existing records")
+    # 每次（含並行寫入後重新套用）都以當時最新的紀錄判斷是否已存在
+    added = []
+    def _add(records):
+        added.clear()
+        for pick in PICKS_TO_ADD:
+            rk = (pick["home"], pick["away"], pick["date"])
+            if not any((r.get("home"), r.get("away"), r.get("date")) == rk for r in records):
+                records.append(pick)
+                added.append(pick)
+        return records if added else None
+    snap = gist_client.update(GH_TOKEN, _add, base=snap)
 
-    added = 0
     for pick in PICKS_TO_ADD:
-        rk = (pick["home"], pick["away"], pick["date"])
-        if any((r.get("home"), r.get("away"), r.get("date")) == rk for r in records):
-            print(f"Skip (already exists): {pick['away']}@{pick['home']} {pick['date']}")
-        else:
-            records.append(pick)
-            added += 1
+        if pick in added:
             print(f"Added: {pick['away']}@{pick['home']} {pick['date']} {pick['bet_type']} {pick['label']}")
-
-    if added == 0:
+        else:
+            print(f"Skip (already exists): {pick['away']}@{pick['home']} {pick['date']}")
+    if not added:
         print("Nothing to add."); return
-
-    body = json.dumps(records, ensure_ascii=False, indent=2)
-    pl   = {"description": GIST_DESC, "public": False,
-            "files": {"history.json": {"content": body}}}
-    requests.patch("https://api.github.com/gists/" + gid, headers=gh_h(), json=pl, timeout=10).raise_for_status()
-    print(f"Saved. Total records: {len(records)}")
+    print(f"Saved. Total records: {len(snap['records'])}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+來源斷路器 — RotoWire / ESPN 等爬取來源連續失敗時直接跳過，改用備援資料。
+狀態跨執行保存在 .cache/circuit.json（CI 以 actions/cache 保留）：
+  closed    正常請求；連續失敗 CIRCUIT_FAILS 次 → open
+  open      冷卻 CIRCUIT_COOLDOWN 秒內一律跳過（不發請求、不等逾時）
+  half_open 冷卻結束放行一次試探：成功 → closed，失敗 → 重新 open
+錄製 / 重播模式（http_replay）下不讀寫狀態檔，每次都從 closed 開始。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import http_replay
+
+log = logging.getLogger("circuit")
+
+CIRCUIT_PATH     = os.getenv("CIRCUIT_PATH", ".cache/circuit.json")
+CIRCUIT_FAILS    = int(os.getenv("CIRCUIT_FAILS", "2"))         # 連續失敗幾次跳開
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "21600"))  # 跳開後冷卻秒數（6 小時）
+
+_lock    = threading.Lock()
+_state   = None    # name -> {"state","fails","opened_at"}
+_tripped = set()   # 本次執行被跳過或剛跳開的來源
+
+
+def _load():
+    global _state
+    if _state is None:
+        _state = {}
+        if http_replay.active(): return _state
+        try:
+            with open(CIRCUIT_PATH, encoding="utf-8") as f:
+                _state = json.load(f)
+        except (OSError, ValueError):
+            pass
+    return _state
+
+
+def _save():
+    if http_replay.active(): return
+    try:
+        os.makedirs(os.path.dirname(CIRCUIT_PATH) or ".", exist_ok=True)
+        tmp = CIRCUIT_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, CIRCUIT_PATH)
+    except OSError as e:
+        log.debug("circuit save: %s", e)
+
+
+def allow(name):
+    """此來源現在可以請求嗎？open 且仍在冷卻中 → False（呼叫端直接走備援）。"""
+    with _lock:
+        st = _load().get(name)
+        if not st or st["state"] == "closed":
+            return True
+        if st["state"] == "open":
+            if time.time() - st.get("opened_at", 0) < CIRCUIT_COOLDOWN:
+                _tripped.add(name)
+                log.warning("circuit %s open — skipped (%.0f min left)", name,
+                            (CIRCUIT_COOLDOWN - (time.time() - st.get("opened_at", 0))) / 60)
+                return False
+            st["state"] = "half_open"
+            log.info("circuit %s half-open — probing", name)
+            _save()
+        return True   # half_open：放行試探
+
+
+def record(name, ok):
+    """回報一次請求結果並更新狀態。"""
+    with _lock:
+        states = _load()
+        st = states.setdefault(name, {"state": "closed", "fails": 0, "opened_at": 0})
+        prev = dict(st)
+        if ok:
+            st.update(state="closed", fails=0)
+        else:
+            st["fails"] += 1
+            if prev["state"] == "half_open" or st["fails"] >= CIRCUIT_FAILS:
+                st.update(state="open", opened_at=time.time())
+                _tripped.add(name)
+                log.warning("circuit %s OPEN after %d failure(s)", name, st["fails"])
+        if st != prev:
+            _save()
+
+
+def tripped():
+    """本次執行中被斷路（跳過或剛跳開）的來源名稱，排序後回傳。"""
+    with _lock:
+        return sorted(_tripped)
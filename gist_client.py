@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+共用 Gist 客戶端 — 歷史紀錄 Gist（history.json）的所有讀寫都經過這裡：
+mlb_bot_v101.py、sync_history.py、add_picks_to_gist.py、scripts/add_records.py。
+
+  Gist ID   GIST_ID 環境變數 > .cache/gist_id.json > 列出全部 gists 尋找（找到後寫回快取）
+  條件讀取  read(etag=...) 帶 If-None-Match，未變更回 304 → 回傳 None，呼叫端沿用本地副本（不計 API 額度）
+  樂觀並行  update(mutate)：讀最新版本 → mutate → PATCH。回應 history[1] 若不是讀取時的版本，
+            代表期間有其他工作流程寫入、被這次覆蓋 → 取回那一版重新套用 mutate 再寫，直到基底一致。
+            mutate 必須可對任何版本重複套用（加入不存在的紀錄、結算未結算的紀錄）。
+
+快照格式：{"id", "version", "etag", "updated_at", "records"}；Gist 不存在時 id 為 None、records 為 []。
+錄製 / 重播模式（http_replay）下不讀寫 ID 快取檔，確保請求序列一致。
+"""
+import copy
+import json
+import logging
+import os
+import threading
+
+import http_client
+import http_replay
+
+log = logging.getLogger("gist_client")
+
+API          = "https://api.github.com/gists"
+GIST_DESC    = "mlb_bot_history"
+GIST_FILE    = "history.json"
+LEGACY_DESC  = ("mlb_bot_v107_history", "mlb_bot_v108_history", "mlb_bot_v109_history")
+GIST_ID_PATH = os.getenv("GIST_ID_CACHE", ".cache/gist_id.json")
+UPDATE_TRIES = 4    # 偵測到並行寫入時最多重新套用幾次
+
+_lock = threading.Lock()
+_ids  = {}   # desc -> gist id（本程序快取）
+
+
+class GistConflict(RuntimeError):
+    """重新套用 UPDATE_TRIES 次仍有其他寫入者搶先。"""
+
+
+def _headers(token, etag=None):
+    h = {"Authorization": "token " + token, "Content-Type": "application/json"}
+    if etag: h["If-None-Match"] = etag
+    return h
+
+
+def find_gid(gists, desc=GIST_DESC):
+    """優先找目前描述的 Gist，否則退回最早的舊版描述。"""
+    new_id = old_id = None
+    for g in gists:
+        d = g.get("description", "")
+        if d == desc: new_id = g["id"]
+        elif d in LEGACY_DESC and not old_id: old_id = g["id"]
+    return new_id or old_id
+
+
+def _load_ids():
+    if http_replay.active(): return {}
+    try:
+        with open(GIST_ID_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember(desc, gid):
+    with _lock:
+        _ids[desc] = gid
+        if http_replay.active(): return
+        ids = _load_ids()
+        if gid: ids[desc] = gid
+        else: ids.pop(desc, None)
+        try:
+            os.makedirs(os.path.dirname(GIST_ID_PATH) or ".", exist_ok=True)
+            with open(GIST_ID_PATH, "w", encoding="utf-8") as f:
+                json.dump(ids, f)
+        except OSError as e:
+            log.debug("gist id cache: %s", e)
+
+
+def gist_id(token, desc=GIST_DESC, refresh=False):
+    """Gist ID；refresh=True 忽略快取重新列出（快取的 ID 已 404）。找不到回傳 None。"""
+    if not refresh:
+        gid = (os.getenv("GIST_ID") if desc == GIST_DESC else None) or _ids.get(desc) or _load_ids().get(desc)
+        if gid:
+            _ids[desc] = gid
+            return gid
+    r = http_client.get(API, headers=_headers(token), params={"per_page": 100}, timeout=15)
+    r.raise_for_status()
+    gid = find_gid(r.json(), desc)
+    _remember(desc, gid)
+    return gid
+
+
+def _snapshot(gid, resp, detail):
+    files = detail.get("files") or {}
+    f = files.get(GIST_FILE) or next(iter(files.values()), None)
+    if f is None:
+        records = []
+    elif f.get("truncated") or f.get("content") is None:   # >1MB 內嵌內容被截斷 → raw_url
+        records = http_client.get(f["raw_url"], timeout=15).json()
+    else:
+        records = json.loads(f["content"] or "[]")
+    hist = detail.get("history") or []
+    return {"id": gid, "version": hist[0]["version"] if hist else None,
+            "etag": resp.headers.get("ETag"), "updated_at": detail.get("updated_at"),
+            "records": records}
+
+
+def _empty():
+    return {"id": None, "version": None, "etag": None, "updated_at": None, "records": []}
+
+
+def read(token, etag=None, desc=GIST_DESC):
+    """讀取最新版本的快照；etag 與遠端相同（304）回傳 None。"""
+    for attempt in range(2):
+        gid = gist_id(token, desc, refresh=attempt > 0)
+        if not gid: return _empty()
+        r = http_client.get(API + "/" + gid, headers=_headers(token, etag), timeout=15)
+        if r.status_code == 304: return None
+        if r.status_code == 404:
+            _remember(desc, None); continue
+        r.raise_for_status()
+        return _snapshot(gid, r, r.json())
+    return _empty()
+
+
+def read_version(token, gid, version):
+    """讀取指定版本（衝突時取回被覆蓋的那一版）。"""
+    r = http_client.get("%s/%s/%s" % (API, gid, version), headers=_headers(token), timeout=15)
+    r.raise_for_status()
+    return _snapshot(gid, r, r.json())
+
+
+def update(token, mutate, base=None, desc=GIST_DESC):
+    """樂觀並行的讀-改-寫。mutate(records) 回傳新清單，回傳 None 或內容未變表示不需寫入。
+    base：呼叫端已讀到的快照（省一次讀取）。回傳寫入後的快照（不需寫入時回傳讀到的快照）。"""
+    snap = base or read(token, desc=desc)
+    remote = snap["records"]   # 目前遠端實際的內容（重新套用時是自己上一次寫入的內容，不是基底）
+    for attempt in range(1, UPDATE_TRIES + 1):
+        new = mutate(copy.deepcopy(snap["records"]))
+        if new is None: return snap
+        if snap["id"] and new == remote: return dict(snap, records=remote)
+        body = json.dumps(new, ensure_ascii=False, separators=(",", ":"))
+        pl   = {"description": desc, "public": False, "files": {GIST_FILE: {"content": body}}}
+        if snap["id"]:
+            r = http_client.patch(API + "/" + snap["id"], headers=_headers(token), json=pl, timeout=15)
+        else:
+            r = http_client.post(API, headers=_headers(token), json=pl, timeout=15)
+        r.raise_for_status()
+        d    = r.json()
+        hist = d.get("history") or []
+        out  = {"id": d.get("id") or snap["id"], "version": hist[0]["version"] if hist else None,
+                "etag": r.headers.get("ETag"), "updated_at": d.get("updated_at"), "records": new}
+        if not snap["id"]:
+            _remember(desc, out["id"])
+            return out
+        # 內容未變的 PATCH 不產生新版本：history[0] 仍是基底版本（history[1] 是更舊的），不是衝突
+        prev = hist[1]["version"] if len(hist) > 1 else None
+        if snap["version"] is None or prev is None or snap["version"] in (prev, out["version"]):
+            log.info("gist %s: saved %d records (%.0fKB)", out["id"], len(new), len(body) / 1024)
+            return out
+        # 讀取後、寫入前有人寫了 prev，這次 PATCH 蓋掉了它 → 以 prev 內容為基底重新套用
+        log.warning("gist %s: concurrent write %s overwritten — re-applying (%d/%d)",
+                    out["id"], prev[:7], attempt, UPDATE_TRIES)
+        snap = read_version(token, out["id"], prev)
+        snap["version"], remote = out["version"], new   # 下一次寫入的基底是剛寫入的這一版
+    raise GistConflict("gist %s: still conflicting after %d attempts" % (snap["id"], UPDATE_TRIES))
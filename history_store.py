@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+本地歷史紀錄庫（SQLite）— 注單歷史的主要紀錄；Gist 改為非同步同步的快照副本。
+
+  HISTORY_DB   資料庫路徑（預設 .cache/history.sqlite，CI 以 actions/cache 保留）
+
+每筆紀錄一列，原始 dict 以 JSON 存於 rec，另拆出 date / game / bet_type / result 欄位：
+待結算查詢走 (result, date) 索引（O(log n) + 待結算筆數），結算只改寫被結算的列；
+整批寫入也只動有變化的列（delta）。
+meta 表記錄 Gist 副本狀態：上次同步時遠端 ETag（條件讀取用）、dirty（本地有未上傳的變更）、
+gen（每次變更 +1；上傳期間若又有變更，上傳完成也不清除 dirty）。
+錄製 / 重播模式（http_replay）下使用記憶體資料庫，不讀寫磁碟，確保請求序列一致。
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+import http_replay
+
+log = logging.getLogger("history_store")
+
+HISTORY_DB = os.getenv("HISTORY_DB", ".cache/history.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS picks (
+    k        TEXT PRIMARY KEY,   -- record_key()
+    seq      INTEGER NOT NULL,   -- 寫入順序（維持 Gist 原本的排列）
+    date     TEXT NOT NULL,
+    game     TEXT NOT NULL,      -- away@home
+    bet_type TEXT,
+    result   TEXT,               -- NULL = 未結算
+    rec      TEXT NOT NULL       -- 完整紀錄 JSON
+);
+CREATE INDEX IF NOT EXISTS picks_result   ON picks(result, date);
+DROP INDEX IF EXISTS picks_date;
+DROP INDEX IF EXISTS picks_game;
+DROP INDEX IF EXISTS picks_bet_type;
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+"""
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        path = ":memory:" if http_replay.active() else HISTORY_DB
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(_SCHEMA)
+    return _conn
+
+
+def _dump(r):
+    return json.dumps(r, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def record_key(r):
+    """紀錄識別：日期 + 對戰 + 投注類型 + 下注方 + 盤口標籤。"""
+    return "|".join(str(r.get(f) or "") for f in ("date", "away", "home", "bet_type", "team", "label"))
+
+
+def keyed(records):
+    """[(key, record)]；完全相同識別的重複紀錄加 #n 後綴，不會被合併掉。"""
+    out, seen = [], {}
+    for r in records:
+        k = record_key(r)
+        n = seen[k] = seen.get(k, 0) + 1
+        out.append((k if n == 1 else "%s#%d" % (k, n), r))
+    return out
+
+
+def _row(k, seq, r):
+    return (k, seq, r.get("date") or "", "%s@%s" % (r.get("away") or "", r.get("home") or ""),
+            r.get("bet_type"), r.get("result"), _dump(r))
+
+
+def load():
+    """全部紀錄（依寫入順序）。"""
+    with _lock:
+        return [json.loads(v) for (v,) in _db().execute("SELECT rec FROM picks ORDER BY seq")]
+
+
+def count():
+    with _lock:
+        return _db().execute("SELECT COUNT(*) FROM picks").fetchone()[0]
+
+
+def write(records):
+    """讓資料庫內容等於 records：只新增 / 更新有變化的列，刪除不在 records 裡的列（如超過 HIST_TTL）。
+    有任何變動即標記 dirty（待同步 Gist）。回傳 (新增, 更新, 刪除) 筆數。"""
+    rows = keyed(records)
+    with _lock:
+        db = _db()
+        have = dict(db.execute("SELECT k, rec FROM picks"))
+        ins = upd = 0
+        db.execute("BEGIN")
+        try:
+            for seq, (k, r) in enumerate(rows):
+                old = have.pop(k, None)
+                if old is None:
+                    db.execute("INSERT INTO picks VALUES (?,?,?,?,?,?,?)", _row(k, seq, r)); ins += 1
+                elif old != _dump(r):
+                    db.execute("REPLACE INTO picks VALUES (?,?,?,?,?,?,?)", _row(k, seq, r)); upd += 1
+                else:
+                    db.execute("UPDATE picks SET seq=? WHERE k=?", (seq, k))
+            if have:
+                db.executemany("DELETE FROM picks WHERE k=?", [(k,) for k in have])
+            if ins or upd or have:
+                db.execute("REPLACE INTO meta VALUES ('dirty','1')")
+                db.execute("REPLACE INTO meta SELECT 'gen', COALESCE(MAX(CAST(v AS INTEGER)), 0) + 1 "
+                           "FROM meta WHERE k='gen'")
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+    if ins or upd or have:
+        log.info("history_store: +%d ~%d -%d (%d records)", ins, upd, len(have), len(rows))
+    return ins, upd, len(have)
+
+
+def merge(local, remote):
+    """本地與 Gist 副本合併（副本被其他工作流程改過時）：同識別以已結算者優先，否則取遠端；
+    遠端順序在前，本地獨有的紀錄附在後面。"""
+    loc = dict(keyed(local))
+    out = []
+    for k, r in keyed(remote):
+        l = loc.pop(k, None)
+        out.append(l if l is not None and l.get("result") is not None and r.get("result") is None else r)
+    return out + list(loc.values())
+
+
+def unsettled(before):
+    """result 為 NULL 且日期早於 before 的紀錄 [(key, record)]（picks_result 索引查詢）。"""
+    with _lock:
+        return [(k, json.loads(v)) for k, v in _db().execute(
+            "SELECT k, rec FROM picks WHERE result IS NULL AND date < ? ORDER BY seq", (before,))]
+
+
+def update(rows):
+    """只改寫指定的列 [(key, record)]（例如剛結算的紀錄），其餘不讀不寫；不存在的 key 略過。
+    有變動即標記 dirty。回傳更新筆數。"""
+    n = 0
+    with _lock:
+        db = _db()
+        db.execute("BEGIN")
+        try:
+            for k, r in rows:
+                _, _, date, game, bet_type, result, rec = _row(k, 0, r)
+                n += db.execute("UPDATE picks SET date=?, game=?, bet_type=?, result=?, rec=? WHERE k=?",
+                                (date, game, bet_type, result, rec, k)).rowcount
+            if n:
+                db.execute("REPLACE INTO meta VALUES ('dirty','1')")
+                db.execute("REPLACE INTO meta SELECT 'gen', COALESCE(MAX(CAST(v AS INTEGER)), 0) + 1 "
+                           "FROM meta WHERE k='gen'")
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+    if n: log.info("history_store: ~%d (settled)", n)
+    return n
+
+
+def meta_get(k, default=None):
+    with _lock:
+        row = _db().execute("SELECT v FROM meta WHERE k=?", (k,)).fetchone()
+    return row[0] if row else default
+
+
+def meta_set(k, v):
+    with _lock:
+        _db().execute("REPLACE INTO meta VALUES (?,?)", (k, None if v is None else str(v)))
+
+
+def dirty():
+    return meta_get("dirty") == "1"
+
+
+def generation():
+    return int(meta_get("gen", "0"))
+
+
+def mark_synced(etag, gen=None):
+    """Gist 副本已與本地一致（上傳成功或剛從 Gist 載入）。
+    gen：上傳的是哪一版；之後又有變更則只記錄遠端 ETag，仍保持 dirty。"""
+    with _lock:
+        if gen is None or gen == generation():
+            meta_set("dirty", "0")
+        meta_set("gist_etag", etag or "")
+
+
+def adopt(records, etag, gen):
+    """上傳成功後採用寫入 Gist 的合併結果（含遠端新增的紀錄）；
+    上傳期間本地又有變更（gen 不同）則不覆蓋，保持 dirty 等下一輪同步。"""
+    with _lock:
+        if gen != generation():
+            mark_synced(etag, gen); return False
+        write(records)
+        mark_synced(etag)
+        return True
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+共用 HTTP 客戶端 — mlb_bot / live_update / sync_history / 各腳本的所有對外請求都經過這裡。
+每個主機一個 keep-alive 連線池（重用 TLS）、429/5xx 有界重試 + 抖動退避、
+依來源（主機）設定逾時、每主機 token bucket 速率限制 + 並行數上限、請求統計、
+備援端點的對沖請求（hedged_get，延遲門檻取該主機跨執行保存的延遲百分位）、執行緒層級截止時間（deadline）。
+MLB_HTTP_MODE=record|replay 時經 http_replay 錄製 / 離線回放；HTTP_HOST_OVERRIDE 可把主機導向本機模擬伺服器。
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_replay
+import tracing
+
+log = logging.getLogger("http_client")
+
+MAX_RETRIES     = 3      # 429/5xx/連線錯誤最多重試次數
+BACKOFF_BASE    = 0.5    # 第 n 次重試等待 ≈ BACKOFF_BASE × 2^(n-1) × U(0.5, 1.5) 秒
+BACKOFF_MAX     = 8.0
+RETRY_STATUS    = {429, 500, 502, 503, 504}
+POOL_SIZE       = 16     # 每個主機保留的連線數
+DEFAULT_TIMEOUT = 12
+USER_AGENT      = "MLB-Predictor-Bot/1.0"
+
+# 各來源預設逾時（秒）；呼叫端未指定 timeout 時使用
+SOURCE_TIMEOUT = {
+    "statsapi.mlb.com":           10,
+    "api.the-odds-api.com":       15,
+    "site.api.espn.com":          15,
+    "site.web.api.espn.com":      15,
+    "www.rotowire.com":           15,
+    "api.open-meteo.com":         10,
+    "api.openweathermap.org":     10,
+    "api.github.com":             15,
+    "gist.githubusercontent.com": 15,
+    "img.mlbstatic.com":          20,
+}
+
+# 同主機同時進行中的請求上限（並行抓取時避免對單一來源爆量）
+HOST_MAX_INFLIGHT     = {"statsapi.mlb.com": 8}
+HOST_MAX_INFLIGHT_DEF = 4
+
+# 每主機 token bucket：(每秒請求數, 突發上限)；未列出的主機用 HOST_RATE_DEF
+HOST_RATE = {
+    "statsapi.mlb.com":      (20.0, 40),
+    "img.mlbstatic.com":     (8.0, 8),
+    "www.rotowire.com":      (1.0, 2),
+    "site.api.espn.com":     (5.0, 5),
+    "site.web.api.espn.com": (5.0, 5),
+    "api.open-meteo.com":    (5.0, 10),
+    "api.the-odds-api.com":  (2.0, 2),
+    "api.github.com":        (5.0, 5),
+}
+HOST_RATE_DEF = (5.0, 10)
+
+# 對沖請求：主要端點超過該主機延遲 HEDGE_PCT 百分位仍未回應才發備援端點
+HEDGE_PCT     = 0.95
+HEDGE_MIN     = 0.3     # 對沖延遲下限（秒）
+HEDGE_DEFAULT = 2.0     # 樣本不足時的對沖延遲
+HEDGE_SAMPLES = 5       # 至少幾筆延遲樣本才用百分位
+LAT_WINDOW    = 200     # 每主機保留最近幾筆成功請求延遲
+# 對沖的來源（ESPN standings、RotoWire）每次執行只打一次、且在並行抓取一開始就打，
+# 當次執行累積不到樣本 → 每主機最近 LAT_KEEP 筆延遲跨執行保存（與 circuit.json 同放 .cache）
+LATENCY_PATH  = os.getenv("HTTP_LATENCY_PATH", ".cache/latency.json")
+LAT_KEEP      = 50
+LAT_BUCKETS   = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)   # 延遲直方圖區間上限（秒）
+
+# 非冪等方法只在 429（伺服器明確未處理）時重試，避免重複送出 Discord 訊息 / 建立 Gist
+_IDEMPOTENT = {"GET", "HEAD", "PUT", "DELETE", "PATCH", "OPTIONS"}
+
+
+def _parse_host_map(spec, conv):
+    """"host=值,host=值" → {host: conv(值)}；格式錯誤的項目略過並警告。"""
+    out = {}
+    for part in (spec or "").split(","):
+        host, _, val = part.partition("=")
+        if not host.strip(): continue
+        try:
+            out[host.strip()] = conv(val.strip())
+        except ValueError:
+            log.warning("bad host setting %r", part)
+    return out
+
+def _positive(conv):
+    """conv 的結果必須 > 0（0 速率會除以零、0 並行數會永遠等待），否則視為格式錯誤。"""
+    def f(val):
+        x = conv(val)
+        if not x > 0: raise ValueError("must be > 0: %r" % val)
+        return x
+    return f
+
+def _rate(val):
+    rate, _, burst = val.partition("/")
+    rate, burst = _positive(float)(rate), int(burst or max(1, round(float(rate))))
+    if burst < 1: raise ValueError("burst must be >= 1: %r" % val)
+    return rate, burst
+
+# 環境設定：HTTP_TIMEOUTS="statsapi.mlb.com=8"、HTTP_RATE_LIMITS="statsapi.mlb.com=10/20"、
+# HTTP_MAX_INFLIGHT="www.rotowire.com=1"（逾時設定優先於呼叫端的 timeout）
+_TIMEOUT_OVERRIDE = _parse_host_map(os.getenv("HTTP_TIMEOUTS", ""), _positive(float))
+# HTTP_HOST_OVERRIDE="statsapi.mlb.com=http://127.0.0.1:8765" 把該主機導向指定 base URL；
+# "*=http://127.0.0.1:8765" 把所有主機導向 base/<原主機>/<路徑>（scripts/mock_server.py）
+# 限速 / 並行數 / 統計仍以原主機計
+_HOST_OVERRIDE = _parse_host_map(os.getenv("HTTP_HOST_OVERRIDE", ""), lambda v: v.rstrip("/"))
+HOST_RATE.update(_parse_host_map(os.getenv("HTTP_RATE_LIMITS", ""), _rate))
+HOST_MAX_INFLIGHT.update(_parse_host_map(os.getenv("HTTP_MAX_INFLIGHT", ""), _positive(int)))
+
+_lock     = threading.Lock()
+_sessions = {}   # host -> requests.Session
+_sems     = {}   # host -> BoundedSemaphore
+_buckets  = {}   # host -> _TokenBucket
+_stats    = {}   # host -> {"requests","errors","retries","bytes","seconds","throttled"}
+_lat      = {}   # host -> deque(最近成功請求延遲秒數)
+_lat_prior = None   # host -> [之前執行保存的延遲秒數]（LATENCY_PATH，首次使用時載入）
+_hist     = {}   # host -> [各 LAT_BUCKETS 區間請求數 ..., 超過最後一檔]
+_hedge_pool = None
+_tls      = threading.local()   # .deadline：本執行緒請求的絕對截止時間（time.time()）
+
+
+class DeadlineExceeded(requests.RequestException):
+    """已超過目前執行緒的截止時間，請求未送出。"""
+
+
+@contextmanager
+def deadline(t):
+    """此區塊內本執行緒的請求不得超過絕對時間 t（None = 不限制）；巢狀時取較早者。
+    逾時上限會被壓到剩餘時間，已過期則直接拋 DeadlineExceeded，不再等待或重試。"""
+    prev = getattr(_tls, "deadline", None)
+    _tls.deadline = t if prev is None else (prev if t is None else min(prev, t))
+    try:
+        yield
+    finally:
+        _tls.deadline = prev
+
+
+def _remaining(url):
+    dl = getattr(_tls, "deadline", None)
+    if dl is None: return None
+    left = dl - time.time()
+    if left <= 0:
+        raise DeadlineExceeded("deadline passed before %s" % urlsplit(url).netloc)
+    return left
+
+
+class _TokenBucket:
+    """每秒補 rate 個 token、最多存 burst 個；取不到就睡到下一個 token 產生。"""
+
+    def __init__(self, rate, burst):
+        self.rate, self.burst = rate, burst
+        self.tokens = float(burst)
+        self.t = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取得一個 token，回傳等待秒數。"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.t) * self.rate)
+                self.t = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def _session(host):
+    with _lock:
+        s = _sessions.get(host)
+        if s is None:
+            s = requests.Session()
+            s.headers["User-Agent"] = USER_AGENT
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[host] = s
+        return s
+
+
+def _sem(host):
+    with _lock:
+        sem = _sems.get(host)
+        if sem is None:
+            sem = _sems[host] = threading.BoundedSemaphore(
+                HOST_MAX_INFLIGHT.get(host, HOST_MAX_INFLIGHT_DEF))
+        return sem
+
+
+def _bucket(host):
+    with _lock:
+        b = _buckets.get(host)
+        if b is None:
+            b = _buckets[host] = _TokenBucket(*HOST_RATE.get(host, HOST_RATE_DEF))
+        return b
+
+
+def _account(host, key, n=1):
+    with _lock:
+        st = _stats.setdefault(host, {"requests": 0, "errors": 0, "retries": 0,
+                                      "bytes": 0, "seconds": 0.0, "throttled": 0.0})
+        st[key] += n
+
+
+def _observe(host, dt):
+    """記錄一次請求延遲到該主機的直方圖（含失敗、重播）。"""
+    i = bisect_left(LAT_BUCKETS, dt)
+    with _lock:
+        h = _hist.get(host)
+        if h is None: h = _hist[host] = [0] * (len(LAT_BUCKETS) + 1)
+        h[i] += 1
+
+
+def _route(url):
+    """套用 HTTP_HOST_OVERRIDE，回傳實際送出的 URL。"""
+    if not _HOST_OVERRIDE: return url
+    p = urlsplit(url)
+    base = _HOST_OVERRIDE.get(p.netloc)
+    if base is None:
+        base = _HOST_OVERRIDE.get("*")
+        if base is None: return url
+        base += "/" + p.netloc
+    return base + p.path + ("?" + p.query if p.query else "")
+
+
+def timeout_for(url, timeout=None):
+    """有效逾時：HTTP_TIMEOUTS 環境設定 > 呼叫端指定 > SOURCE_TIMEOUT > DEFAULT_TIMEOUT。"""
+    host = urlsplit(url).netloc
+    if host in _TIMEOUT_OVERRIDE: return _TIMEOUT_OVERRIDE[host]
+    return timeout or SOURCE_TIMEOUT.get(host, DEFAULT_TIMEOUT)
+
+
+def _backoff(attempt, resp=None):
+    if resp is not None:
+        ra = resp.headers.get("Retry-After", "")
+        if ra.isdigit(): return min(float(ra), BACKOFF_MAX)
+    return min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX) * random.uniform(0.5, 1.5)
+
+
+def request(method, url, retries=MAX_RETRIES, timeout=None, **kw):
+    """送出請求並回傳 Response（非 2xx 也回傳，由呼叫端 raise_for_status）。
+    429/5xx 與連線錯誤依方法有界重試；重試用盡仍連線失敗則拋出例外。"""
+    if not tracing.TRACE_PATH:
+        return _request(method, url, retries, timeout, kw)
+    p = urlsplit(url)
+    with tracing.span("%s %s" % (method.upper(), p.netloc), "http", path=p.path) as sp:
+        resp = _request(method, url, retries, timeout, kw)
+        sp["status"] = resp.status_code
+        return resp
+
+
+def _request(method, url, retries, timeout, kw):
+    method = method.upper()
+    host   = urlsplit(url).netloc
+    tmo    = timeout_for(url, timeout)
+    if http_replay.MODE == "replay":   # 離線回放：不連網、不限速，只經過並行數限制
+        t0 = time.time()
+        with _sem(host):
+            resp = http_replay.serve(method, url, kw)
+        dt = time.time() - t0
+        _account(host, "requests"); _account(host, "seconds", dt); _observe(host, dt)
+        _account(host, "bytes", len(resp.content or b""))
+        if resp.status_code >= 400: _account(host, "errors")
+        return resp
+    sess   = _session(host)
+    target = _route(url)
+    attempt = 0
+    while True:
+        attempt += 1
+        waited = _bucket(host).acquire()   # 速率限制（每主機 token bucket）
+        if waited: _account(host, "throttled", waited)
+        left = _remaining(url)              # 執行緒截止時間 → 壓縮逾時
+        t0 = time.time()
+        try:
+            with _sem(host):                # 並行數限制
+                resp = sess.request(method, target, timeout=min(tmo, left) if left else tmo, **kw)
+        except requests.RequestException:
+            dt = time.time() - t0
+            _account(host, "requests"); _account(host, "errors")
+            _account(host, "seconds", dt); _observe(host, dt)
+            if attempt > retries or method not in _IDEMPOTENT: raise
+            wait = _backoff(attempt)
+        else:
+            dt = time.time() - t0
+            _account(host, "requests"); _account(host, "seconds", dt); _observe(host, dt)
+            _account(host, "bytes", len(resp.content or b""))
+            if resp.status_code < 400:
+                with _lock:
+                    _lat.setdefault(host, deque(maxlen=LAT_WINDOW)).append(dt)
+            retryable = resp.status_code in RETRY_STATUS and (
+                method in _IDEMPOTENT or resp.status_code == 429)
+            if not retryable or attempt > retries:
+                if resp.status_code >= 400: _account(host, "errors")
+                if http_replay.MODE == "record":   # 只錄最終回應：重播不重試，暫時性 503 不能被當成結果
+                    http_replay.capture(method, url, kw, resp, dt)
+                return resp
+            wait = _backoff(attempt, resp)
+        left = _remaining(url)
+        if left is not None and left <= wait:
+            raise DeadlineExceeded("no time left to retry %s" % host)
+        _account(host, "retries")
+        log.info("retry %s %s (%d/%d) in %.1fs", method, host, attempt, retries, wait)
+        time.sleep(wait)
+
+
+def get(url, **kw):
+    return request("GET", url, **kw)
+
+def post(url, **kw):
+    return request("POST", url, **kw)
+
+def put(url, **kw):
+    return request("PUT", url, **kw)
+
+def patch(url, **kw):
+    return request("PATCH", url, **kw)
+
+
+def _prior_lat():
+    """之前執行保存的每主機延遲樣本（呼叫端持有 _lock）；錄製 / 重播模式不讀檔。"""
+    global _lat_prior
+    if _lat_prior is None:
+        _lat_prior = {}
+        if not http_replay.active():
+            try:
+                with open(LATENCY_PATH, encoding="utf-8") as f:
+                    _lat_prior = {h: [float(x) for x in v] for h, v in json.load(f).items()}
+            except (OSError, ValueError, TypeError, AttributeError):
+                pass
+    return _lat_prior
+
+
+def save_latency():
+    """每主機最近 LAT_KEEP 筆成功請求延遲（之前保存的 + 本次）寫回 LATENCY_PATH（程式結束時自動呼叫）。"""
+    if http_replay.active(): return
+    with _lock:
+        if not _lat: return
+        prior = _prior_lat()
+        out = {h: [round(x, 4) for x in (prior.get(h, []) + list(_lat.get(h, ())))[-LAT_KEEP:]]
+               for h in set(prior) | set(_lat)}
+    try:
+        os.makedirs(os.path.dirname(LATENCY_PATH) or ".", exist_ok=True)
+        tmp = LATENCY_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(out, f, separators=(",", ":"))
+        os.replace(tmp, LATENCY_PATH)
+    except OSError as e:
+        log.debug("latency save: %s", e)
+
+atexit.register(save_latency)
+
+
+def latency_pct(host, q=HEDGE_PCT):
+    """該主機成功請求延遲（之前執行保存的 + 本次）的 q 百分位（秒）；樣本不足回傳 None。"""
+    with _lock:
+        xs = sorted(_prior_lat().get(host, []) + list(_lat.get(host, ())))
+    if len(xs) < HEDGE_SAMPLES: return None
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def _hedge_ok(resp):
+    return resp is not None and resp.status_code == 200
+
+
+def _hedge_get(dl, url, kw):
+    with deadline(dl):
+        return get(url, **kw)
+
+
+def hedged_get(urls, delay=None, ok=_hedge_ok, **kw):
+    """對沖 GET：先打 urls[0]，超過 delay（預設為主機延遲百分位）未成功才發下一個，
+    取最先成功（ok(resp) 為真）的 Response；全部失敗回傳 None。落後的請求在背景完成後丟棄。"""
+    global _hedge_pool
+    with _lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+        pool = _hedge_pool
+    if delay is None:
+        pct = latency_pct(urlsplit(urls[0]).netloc)
+        delay = max(HEDGE_MIN, pct) if pct is not None else HEDGE_DEFAULT
+    pending, queue = set(), list(urls)
+    while queue or pending:
+        if queue:
+            url = queue.pop(0)
+            fut = pool.submit(_hedge_get, getattr(_tls, "deadline", None), url, kw)
+            fut.url = url
+            pending.add(fut)
+        done, pending = wait(pending, timeout=delay if queue else None,
+                             return_when=FIRST_COMPLETED)
+        for fut in done:
+            try:
+                resp = fut.result()
+            except Exception as e:
+                log.debug("hedged %s: %s", fut.url, e); continue
+            if ok(resp):
+                if fut.url != urls[0]: log.info("hedged GET won by %s", fut.url)
+                return resp
+            log.debug("hedged %s → %d", fut.url, resp.status_code)
+    return None
+
+
+def get_json(url, params=None, headers=None, timeout=None):
+    """GET 並解析 JSON；任何失敗記錄警告並回傳 None。"""
+    try:
+        r = get(url, params=params, headers=headers, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+    except Exception as e:
+        log.warning("get_json %s: %s", url, e)
+        return None
+
+
+def stats():
+    """各主機請求統計快照：{host: {"requests","errors","retries","bytes","seconds","throttled"}}。"""
+    with _lock:
+        return {h: dict(v) for h, v in _stats.items()}
+
+
+def metrics():
+    """stats() 加上延遲直方圖與最近成功請求 p50/p95（秒），供 run_metrics.json。
+    latency_hist 鍵為區間上限（秒），"inf" 為超過最後一檔。"""
+    labels = ["%g" % b for b in LAT_BUCKETS] + ["inf"]
+    out = stats()
+    with _lock:
+        hist = {h: list(v) for h, v in _hist.items()}
+        lat  = {h: sorted(v) for h, v in _lat.items()}
+    for host, st in out.items():
+        st["seconds"] = round(st["seconds"], 3); st["throttled"] = round(st["throttled"], 3)
+        st["latency_hist"] = dict(zip(labels, hist.get(host, [0] * len(labels))))
+        xs = lat.get(host)
+        st["p50"] = round(xs[len(xs) // 2], 3) if xs else None
+        st["p95"] = round(xs[min(len(xs) - 1, int(0.95 * len(xs)))], 3) if xs else None
+    return out
+
+
+def log_summary(logger=log):
+    for host, st in sorted(stats().items()):
+        logger.info("HTTP %-28s req=%d err=%d retry=%d %.0fKB %.1fs throttled=%.1fs",
+                    host, st["requests"], st["errors"], st["retries"],
+                    st["bytes"] / 1024, st["seconds"], st["throttled"])
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+HTTP 錄製 / 重播 — 讓 run() 與 live_update.main() 可以完全離線、可重現地執行（效能量測 / 回歸測試）。
+所有對外請求都經過 http_client，這裡在它的 request() 裡掛勾：
+
+  MLB_HTTP_MODE=record   照常連網，並把每個請求最終的回應（重試後）寫進壓縮檔（程式結束時存檔）
+  MLB_HTTP_MODE=replay   不連網，從壓縮檔回放；找不到的請求視為連線錯誤（呼叫端走備援）
+  MLB_HTTP_FIXTURES      壓縮檔路徑（預設 fixtures/http.json.gz）
+  MLB_REPLAY_LATENCY     重播時模擬延遲 = 錄製延遲 × 此倍率（預設 0 = 不等待）
+
+比對規則：方法 + URL + 參數（去除 apiKey 等憑證）+ 請求本文完全相同優先；
+否則取同方法、同路徑、參數差異最少的一筆（日期不同的重播、Discord/Gist 寫入仍可對上）。
+路徑中的憑證（Discord webhook 的 id/token、環境變數裡的金鑰 / webhook 路徑）寫檔前一律遮蔽成 ***，
+比對也用遮蔽後的 URL（換了 webhook / 金鑰的環境仍可重播）。
+錄製 / 重播期間 HTTP 磁碟快取、投手 gameLog 本地庫、斷路器狀態都不讀寫，確保請求序列一致。
+"""
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+log = logging.getLogger("http_replay")
+
+MODE         = os.getenv("MLB_HTTP_MODE", "").lower()   # "" | "record" | "replay"
+FIXTURE_PATH = os.getenv("MLB_HTTP_FIXTURES", "fixtures/http.json.gz")
+LATENCY      = float(os.getenv("MLB_REPLAY_LATENCY", "0") or 0)
+
+# 不寫入檔案、也不參與比對的參數（憑證）
+SECRET_PARAMS = {"apikey", "appid", "key", "token", "access_token"}
+# 路徑帶憑證的主機：host -> (pattern, 取代)
+SECRET_PATHS  = {
+    "discord.com":    (re.compile(r"^/api/(v\d+/)?webhooks/.*"), r"/api/\1webhooks/***"),
+    "discordapp.com": (re.compile(r"^/api/(v\d+/)?webhooks/.*"), r"/api/\1webhooks/***"),
+}
+SECRET_ENV    = re.compile(r"TOKEN|KEY|SECRET|WEBHOOK|PASSWORD")   # 值視為憑證的環境變數名稱
+KEEP_HEADERS  = ("Content-Type", "ETag", "Last-Modified")
+
+_lock    = threading.Lock()
+_entries = None   # 錄製 / 載入的回應清單
+_by_key  = {}     # 精確比對 key -> entry
+_by_path = {}     # (method, host, path) -> [entry, ...]（錄製順序）
+
+
+def active():
+    return MODE in ("record", "replay")
+
+
+def _params(url, params):
+    """URL query + params 合併為排序後的 [[k, v], ...]，去除憑證。"""
+    items = parse_qsl(urlsplit(url).query, keep_blank_values=True)
+    if isinstance(params, dict):
+        for k, v in params.items():
+            for x in (v if isinstance(v, (list, tuple)) else [v]):
+                items.append((k, str(x)))
+    elif params:
+        items.extend((k, str(v)) for k, v in params)
+    return sorted([k, v] for k, v in items if k.lower() not in SECRET_PARAMS)
+
+
+def _body_hash(kw):
+    body = kw.get("json")
+    if body is not None:
+        raw = json.dumps(body, sort_keys=True, default=str).encode("utf-8")
+    else:
+        raw = kw.get("data") or b""
+        if isinstance(raw, str): raw = raw.encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:12] if raw else ""
+
+
+def _key(method, base, params, body):
+    raw = json.dumps([method, base, params, body], separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _index(e):
+    _by_key.setdefault(e["key"], e)
+    _by_path.setdefault((e["method"], e["base"]), []).append(e)
+
+
+def _load():
+    global _entries
+    if _entries is not None: return
+    _entries = []
+    if MODE != "replay": return
+    try:
+        with gzip.open(FIXTURE_PATH, "rt", encoding="utf-8") as f:
+            _entries = json.load(f)["entries"]
+    except (OSError, ValueError, KeyError) as e:
+        log.error("replay fixtures %s unreadable: %s", FIXTURE_PATH, e)
+    for e in _entries: _index(e)
+    log.info("replay: %d responses from %s", len(_entries), FIXTURE_PATH)
+
+
+def _env_secrets():
+    """環境變數中的憑證字串（URL 型只取路徑，例如 webhook），長的先取代。"""
+    out = set()
+    for name, val in os.environ.items():
+        if not SECRET_ENV.search(name.upper()) or len(val) < 8: continue
+        p = urlsplit(val)
+        out.add(p.path if p.scheme and p.netloc else val)
+    return sorted((s for s in out if len(s) >= 8), key=len, reverse=True)
+
+
+def _split(url):
+    """scheme://host/path（不含 query），路徑中的憑證已遮蔽。"""
+    p = urlsplit(url)
+    path = p.path
+    rule = SECRET_PATHS.get(p.netloc.lower())
+    if rule: path = rule[0].sub(rule[1], path)
+    for sec in _env_secrets():
+        if sec in path: path = path.replace(sec, "/***" if sec.startswith("/") else "***")
+    return "%s://%s%s" % (p.scheme, p.netloc, path)
+
+
+def capture(method, url, kw, resp, seconds):
+    """錄製模式：記下一筆回應（http_client 只在重試結束、回傳前呼叫一次）。"""
+    base, params, body = _split(url), _params(url, kw.get("params")), _body_hash(kw)
+    content = resp.content or b""
+    try:
+        text, b64 = content.decode("utf-8"), False
+    except UnicodeDecodeError:
+        text, b64 = base64.b64encode(content).decode("ascii"), True
+    e = {"key": _key(method, base, params, body), "method": method, "base": base,
+         "params": params, "status": resp.status_code,
+         "headers": {h: resp.headers[h] for h in KEEP_HEADERS if h in resp.headers},
+         "body": text, "b64": b64, "latency": round(seconds, 4)}
+    with _lock:
+        _load()
+        _entries.append(e)
+        _index(e)
+
+
+def _nearest(method, base, params):
+    cands = _by_path.get((method, base))
+    if not cands: return None
+    want = dict(map(tuple, params))
+    def diff(e):
+        have = dict(map(tuple, e["params"]))
+        return sum(1 for k in set(want) | set(have) if want.get(k) != have.get(k))
+    return min(cands, key=diff)   # min 取第一個最小值 → 同差異時用最早錄製的
+
+
+def serve(method, url, kw):
+    """重播模式：回傳錄製的 Response；找不到則拋 ConnectionError。"""
+    base, params = _split(url), _params(url, kw.get("params"))
+    with _lock:
+        _load()
+        e = _by_key.get(_key(method, base, params, _body_hash(kw))) or _nearest(method, base, params)
+    if e is None:
+        raise requests.ConnectionError("replay: no fixture for %s %s" % (method, base))
+    if LATENCY: time.sleep(e["latency"] * LATENCY)
+    r = requests.Response()
+    r.status_code = e["status"]
+    r._content    = base64.b64decode(e["body"]) if e["b64"] else e["body"].encode("utf-8")
+    r.headers     = CaseInsensitiveDict(e["headers"])
+    r.encoding    = "utf-8"
+    r.url         = url
+    return r
+
+
+def save(path=None):
+    """錄製模式：寫出壓縮檔（程式結束時自動呼叫）。"""
+    if MODE != "record" or not _entries: return
+    path = path or FIXTURE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _lock:
+        data = {"v": 1, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "entries": list(_entries)}
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    log.info("record: %d responses → %s", len(data["entries"]), path)
+
+
+if MODE == "record":
+    atexit.register(save)
+elif MODE and MODE != "replay":
+    log.warning("MLB_HTTP_MODE=%r ignored (record|replay)", MODE)
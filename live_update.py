@@ -9,7 +9,9 @@ import logging
 import os
 import time
 
-import requests
+import http_client
+import teams
+import tracing
 
 log = logging.getLogger("live_update")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -18,11 +20,12 @@ JSON_PATH = "docs/picks_latest.json"
 NTFY_TOPIC = os.environ.get("NTFY_TOPIC", "mlb-picks-willy0815")
 
 
+@tracing.traced(cat="persist")
 def send_ntfy(title, message):
     if not NTFY_TOPIC:
         return
     try:
-        r = requests.post(
+        r = http_client.post(
             "https://ntfy.sh",
             json={"topic": NTFY_TOPIC, "title": title, "message": message,
                   "priority": 4, "tags": ["baseball"]},
@@ -32,63 +35,9 @@ def send_ntfy(title, message):
     except Exception as e:
         log.warning("ntfy error: %s", e)
 
-CN = {
-    "dodgers": "道奇", "yankees": "洋基", "mets": "大都會", "braves": "勇士",
-    "phillies": "費城人", "mariners": "水手", "brewers": "釀酒人", "pirates": "海盜",
-    "blue jays": "藍鳥", "tigers": "老虎", "red sox": "紅襪", "astros": "太空人",
-    "rangers": "遊騎兵", "cubs": "小熊", "orioles": "金鶯", "royals": "皇家",
-    "rays": "光芒", "diamondbacks": "響尾蛇", "reds": "紅人", "padres": "教士",
-    "guardians": "守護者", "marlins": "馬林魚", "giants": "巨人", "twins": "雙城",
-    "athletics": "運動家", "cardinals": "紅雀", "angels": "天使", "white sox": "白襪",
-    "nationals": "國民", "rockies": "落磯",
-}
-
-TEAM_ALIAS = {
-    "los angeles dodgers": "dodgers", "la dodgers": "dodgers",
-    "new york yankees": "yankees", "ny yankees": "yankees",
-    "new york mets": "mets", "ny mets": "mets",
-    "atlanta braves": "braves",
-    "philadelphia phillies": "phillies",
-    "seattle mariners": "mariners",
-    "milwaukee brewers": "brewers",
-    "pittsburgh pirates": "pirates",
-    "toronto blue jays": "blue jays",
-    "detroit tigers": "tigers",
-    "boston red sox": "red sox",
-    "houston astros": "astros",
-    "texas rangers": "rangers",
-    "chicago cubs": "cubs",
-    "baltimore orioles": "orioles",
-    "kansas city royals": "royals",
-    "tampa bay rays": "rays",
-    "arizona diamondbacks": "diamondbacks",
-    "az diamondbacks": "diamondbacks",
-    "cincinnati reds": "reds",
-    "san diego padres": "padres",
-    "cleveland guardians": "guardians",
-    "miami marlins": "marlins",
-    "san francisco giants": "giants",
-    "minnesota twins": "twins",
-    "oakland athletics": "athletics",
-    "sacramento athletics": "athletics",
-    "st. louis cardinals": "cardinals",
-    "st louis cardinals": "cardinals",
-    "los angeles angels": "angels",
-    "la angels": "angels",
-    "chicago white sox": "white sox",
-    "washington nationals": "nationals",
-    "colorado rockies": "rockies",
-}
-
-
-def norm_team(name):
-    n = name.lower().strip()
-    return TEAM_ALIAS.get(n, n)
-
-
 def safe_get(url, params=None, timeout=10):
     try:
-        r = requests.get(url, params=params, timeout=timeout)
+        r = http_client.get(url, params=params, timeout=timeout)
         r.raise_for_status()
         return r.json()
     except Exception as e:
@@ -96,6 +45,7 @@ def safe_get(url, params=None, timeout=10):
         return None
 
 
+@tracing.traced(cat="fetch")
 def fetch_live_scores(et_date_str):
     data = safe_get(
         "https://statsapi.mlb.com/api/v1/schedule",
@@ -107,10 +57,8 @@ def fetch_live_scores(et_date_str):
         for game in db.get("games", []):
             if game.get("status", {}).get("abstractGameState") != "Live":
                 continue
-            home_raw = game.get("teams", {}).get("home", {}).get("team", {}).get("name", "").lower()
-            away_raw = game.get("teams", {}).get("away", {}).get("team", {}).get("name", "").lower()
-            hk = norm_team(TEAM_ALIAS.get(home_raw, home_raw.split()[-1] if home_raw else ""))
-            ak = norm_team(TEAM_ALIAS.get(away_raw, away_raw.split()[-1] if away_raw else ""))
+            hk = teams.key(game.get("teams", {}).get("home", {}).get("team", {}))
+            ak = teams.key(game.get("teams", {}).get("away", {}).get("team", {}))
             if not hk or not ak:
                 continue
             ls        = game.get("linescore", {})
@@ -127,6 +75,7 @@ def fetch_live_scores(et_date_str):
     return live
 
 
+@tracing.traced(cat="predict")
 def generate_live_picks(live_games, game_preds):
     result = []
     for lg in live_games:
@@ -200,8 +149,8 @@ def generate_live_picks(live_games, game_preds):
             log.info("    ✅ 推薦: %s — %s", bet, reason)
 
         result.append({
-            "home_cn":         CN.get(home, home),
-            "away_cn":         CN.get(away, away),
+            "home_cn":         teams.cn(home, home),
+            "away_cn":         teams.cn(away, away),
             "inning":          inning,
             "top_inning":      top_inning,
             "home_runs":       home_r,
@@ -214,6 +163,7 @@ def generate_live_picks(live_games, game_preds):
     return result
 
 
+@tracing.traced(cat="run")
 def main():
     if not os.path.exists(JSON_PATH):
         log.error("%s not found — run main bot first", JSON_PATH)
@@ -1,4 +1,16 @@
-import os, json, math, logging, datetime, re, time, requests, unicodedata
+import os, json, math, logging, datetime, re, time, threading, hashlib
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import http_client
+import http_replay
+import circuit
+import gist_client
+import history_store
+import players
+import settlement
+import teams
+import tracing
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 log = logging.getLogger("MLB_V123")
@@ -143,6 +155,14 @@ L10_FORM_W         = 0.06   # 近10場勝率偏離0.500時的得分修正幅度
 
 # ── ★ 蒙地卡羅模擬 ────────────────────────────────────────────
 MC_SIMS   = 5000   # 每場比賽的模擬次數（越高越準但越慢）
+MC_SLATE_SIMS = 50000  # 整個賽程批次模擬時每場的模擬次數（單次向量化，成本與單場 5000 次相當）
+MC_CHUNK  = 50000  # 批次模擬每次處理的模擬欄數（限制 games×sims 矩陣記憶體）
+MC_RL_SPREADS = [1.5, -1.5, 2.5, -2.5]  # MC 計算的讓分盤口
+MC_SEED   = os.getenv("MC_SEED", "mlb")  # 亂數種子基底（同日同場重跑結果一致）；設為空字串 → 不固定種子
+MC_VARIANCE = os.getenv("MC_VARIANCE", "antithetic")  # 變異數縮減：none / antithetic（對偶）/ stratified（分層）
+MC_POIS_KMAX = 45  # 反函數 Poisson 抽樣的得分上限（λ≤15 時尾端機率 <1e-9）
+MC_ENGINE = os.getenv("MC_ENGINE", "mc")  # predict 機率引擎：mc（蒙地卡羅）/ exact（Poisson/Skellam 精確計算）
+EXACT_QUAD_N = 24  # exact 引擎：投手不確定性的高斯-厄米特求積點數
 MC_WIN_W  = 0.70   # MC勝率 vs norm_cdf 混合權重（Poisson離散更真實，主導）
 
 # ── ★ 球場係數（FanGraphs Park Factors 2024）──
@@ -285,59 +305,7 @@ PARK_COORDS = {
     "white sox":(41.83,-87.63),"nationals":(38.87,-77.01),"rockies":(39.76,-104.99),
 }
 
-CN = {
-    "dodgers":"道奇","yankees":"洋基","mets":"大都會","braves":"勇士",
-    "phillies":"費城人","mariners":"水手","brewers":"釀酒人","pirates":"海盜",
-    "blue jays":"藍鳥","tigers":"老虎","red sox":"紅襪","astros":"太空人",
-    "rangers":"遊騎兵","cubs":"小熊","orioles":"金鶯","royals":"皇家",
-    "rays":"光芒","diamondbacks":"響尾蛇","reds":"紅人","padres":"教士",
-    "guardians":"守護者","marlins":"馬林魚","giants":"巨人","twins":"雙城",
-    "athletics":"運動家","cardinals":"紅雀","angels":"天使","white sox":"白襪",
-    "nationals":"國民","rockies":"落磯",
-}
-
-TEAM_ALIAS = {
-    "los angeles dodgers":"dodgers","la dodgers":"dodgers",
-    "new york yankees":"yankees","ny yankees":"yankees",
-    "new york mets":"mets","ny mets":"mets","atlanta braves":"braves",
-    "philadelphia phillies":"phillies","seattle mariners":"mariners",
-    "milwaukee brewers":"brewers","pittsburgh pirates":"pirates",
-    "toronto blue jays":"blue jays","detroit tigers":"tigers",
-    "boston red sox":"red sox","houston astros":"astros","texas rangers":"rangers",
-    "chicago cubs":"cubs","baltimore orioles":"orioles","kansas city royals":"royals",
-    "tampa bay rays":"rays","arizona diamondbacks":"diamondbacks",
-    "az diamondbacks":"diamondbacks","cincinnati reds":"reds","san diego padres":"padres",
-    "cleveland guardians":"guardians","miami marlins":"marlins",
-    "san francisco giants":"giants","minnesota twins":"twins",
-    "oakland athletics":"athletics","sacramento athletics":"athletics",
-    "st. louis cardinals":"cardinals","st louis cardinals":"cardinals",
-    "los angeles angels":"angels","la angels":"angels",
-    "chicago white sox":"white sox","washington nationals":"nationals",
-    "colorado rockies":"rockies",
-}
-
-MLB_TEAM_ID = {
-    108:"angels",109:"diamondbacks",110:"orioles",111:"red sox",112:"cubs",
-    113:"reds",114:"guardians",115:"rockies",116:"tigers",117:"astros",
-    118:"royals",119:"dodgers",120:"nationals",121:"mets",133:"athletics",
-    134:"pirates",135:"padres",136:"mariners",137:"giants",138:"cardinals",
-    139:"rays",140:"rangers",141:"blue jays",142:"twins",143:"phillies",
-    144:"braves",145:"white sox",146:"marlins",147:"yankees",158:"brewers",
-}
-
-ESPN_ABBR = {
-    "nyy":"yankees","lad":"dodgers","atl":"braves","hou":"astros","bal":"orioles",
-    "phi":"phillies","tex":"rangers","ari":"diamondbacks","min":"twins",
-    "sea":"mariners","mil":"brewers","chc":"cubs","sf":"giants","bos":"red sox",
-    "nym":"mets","tor":"blue jays","cle":"guardians","tb":"rays","stl":"cardinals",
-    "sd":"padres","det":"tigers","kc":"royals","pit":"pirates","cin":"reds",
-    "col":"rockies","oak":"athletics","laa":"angels","mia":"marlins",
-    "wsh":"nationals","chw":"white sox",
-    # ESPN 備用縮寫
-    "cws":"white sox","was":"nationals","ath":"athletics","sac":"athletics",
-    "kcr":"royals","tbr":"rays","sfg":"giants","wsn":"nationals","cle":"guardians",
-    "chisox":"white sox",
-}
+CN = teams.CN   # 內部 key -> 中文隊名（各來源的隊名對應見 teams.py）
 
 ROSTER = {
     "yankees":["judge","goldschmidt","volpe","stanton","cole","rodon"],
@@ -436,6 +404,7 @@ _PITCHER_K9     = {}  # pitcher_key -> recent K/9 (每9局三振數)
 _PITCHER_LAST   = {}  # pitcher_key -> last start date (YYYY-MM-DD)
 _RELIEVER_FLAGS = set()  # 偵測為牛棚型：有出賽紀錄但無任何IP≥4.0先發
 _LIVE_SP_ERA    = {}  # pitcher_key -> 本賽季整體ERA（MLB Stats API即時）
+_LIVE_SP_ERA_ID = {}  # pitcher_id -> 本賽季整體ERA（同一份 bulk 資料，依 ID 對回今日先發）
 _WEATHER_CACHE  = {}
 _PITCHER_TREND   = {}  # pitcher_key → era_trend（近2場ERA − 前3場ERA，>0=惡化）
 _TEAM_OBP        = {}  # team_key → OBP float（MLB API動態本賽季）
@@ -457,6 +426,8 @@ _TEAM_ROAD_WPCT    = {}  # team_key -> 客場勝率 (float 0.0-1.0)
 _TEAM_L10_WPCT     = {}  # team_key -> 近10場勝率 (float 0.0-1.0)
 _TEAM_LINEUP       = {}  # team_key -> [{"order":int,"name":str,"pos":str}] 打線順序
 _TRAVEL_CONTEXT    = {}  # team_key -> {"road_days": int, "tz_cross": bool}
+_MC_RUN_KEY        = ""  # MC 種子的執行 key（run() 設為當日日期）
+_MC_COUNTS         = {"calls": 0, "games": 0, "sims": 0}  # 本次執行 MC 批次數 / 場次 / 模擬總數（run_metrics.json）
 
 
 # ══════════════════════════════════════════════
@@ -464,27 +435,91 @@ _TRAVEL_CONTEXT    = {}  # team_key -> {"road_days": int, "tz_cross": bool}
 # ══════════════════════════════════════════════
 
 def norm_team(name):
-    n = name.lower().strip()
-    return TEAM_ALIAS.get(n, n)
+    """任何來源的隊名 → 內部 key（teams 身分表查表）；無法辨識時沿用小寫原字串。"""
+    return teams.key(name) or name.lower().strip()
+
+# ★ 本地回應快取（statsapi）：不會再變的資料不必每次重抓；目錄在 GitHub Actions 以 actions/cache 保留
+HTTP_CACHE_DIR  = os.getenv("HTTP_CACHE_DIR", ".cache/http")
+CACHE_FOREVER   = -1      # 永久有效（完賽 boxscore、已結束日期的賽程）
+CACHE_STATS_TTL = 600     # 賽季數據（gameLog / stats / teams/stats）10 分鐘
+CACHE_SEARCH_TTL = 7 * 86400  # people/search 名字→ID 幾乎不變
+_HTTP_CACHE_STATS = {"hit": 0, "miss": 0, "store": 0}
+_HTTP_CACHE_LOCK  = threading.Lock()   # 計數由抓取執行緒池並行累加
+
+def _cache_count(key):
+    with _HTTP_CACHE_LOCK:
+        _HTTP_CACHE_STATS[key] += 1
+
+def _final_cutoff():
+    """早於此日期（UTC 昨天）的比賽才視為確定完賽；台美時差下昨天（UTC）開打的比賽可能仍在進行。"""
+    return (datetime.datetime.utcnow().date() - datetime.timedelta(days=1)).isoformat()
+
+def _cache_ttl(url, params):
+    """依端點決定 TTL（秒）；0 = 不快取（即時 feed、今日賽程、非 statsapi 來源）。"""
+    parts = urlsplit(url)
+    if parts.netloc != "statsapi.mlb.com": return 0
+    path = parts.path
+    if "/feed/live" in path or "/boxscore" in path:
+        return 0   # boxscore 只有呼叫端確認完賽時才以 cache_ttl=CACHE_FOREVER 快取
+    if path.endswith("/people/search"):
+        return CACHE_SEARCH_TTL
+    if path.endswith("/schedule"):
+        # 以查詢的最後一天判斷；至少早於昨天（UTC）才視為全部完賽，避免台美時差下仍在進行的比賽
+        p = params or {}
+        last = str(p.get("endDate") or p.get("date") or "")[:10]
+        return CACHE_FOREVER if last and last < _final_cutoff() else 0
+    if path.endswith("/stats"):
+        return CACHE_STATS_TTL
+    return 0
+
+def _cache_path(url, params):
+    raw = url + "?" + json.dumps(params or {}, sort_keys=True, default=str)
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".json")
+
+def _cache_read(path, ttl):
+    try:
+        with open(path, encoding="utf-8") as f:
+            ent = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if ttl != CACHE_FOREVER and ent.get("ts", 0) + ttl < time.time():
+        return None
+    return ent.get("data")
 
-def safe_get(url, params=None, headers=None, timeout=12):
+def _cache_write(path, data):
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        tmp = "%s.%d.tmp" % (path, threading.get_ident())
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"ts": time.time(), "data": data}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        _cache_count("store")
+    except OSError as e:
+        log.debug("http cache write %s: %s", path, e)
+
+def safe_get(url, params=None, headers=None, timeout=12, cache_ttl=None):
+    """GET JSON；失敗回傳 None。cache_ttl=None 依端點自動決定，0 強制不快取。"""
+    ttl  = _cache_ttl(url, params) if cache_ttl is None else cache_ttl
+    if http_replay.active(): ttl = 0   # 錄製 / 重播：每個請求都要經過 http_client
+    path = _cache_path(url, params) if ttl else None
+    if path:
+        data = _cache_read(path, ttl)
+        if data is not None:
+            _cache_count("hit")
+            return data
+        _cache_count("miss")
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=timeout)
+        r = http_client.get(url, params=params, headers=headers, timeout=timeout)
         r.raise_for_status()
-        return r.json()
+        data = r.json()
     except Exception as e:
         log.warning("safe_get %s: %s", url, e)
         return None
+    if path and data is not None:
+        _cache_write(path, data)
+    return data
 
-def _name_to_key(full_name):
-    if not full_name: return None
-    # Strip accents: "Rodríguez" → "rodriguez", "Peña" → "pena"
-    ascii_name = unicodedata.normalize("NFKD", full_name).encode("ascii", "ignore").decode("ascii")
-    parts = ascii_name.strip().split()
-    k = parts[-1].lower() if len(parts) >= 2 else ascii_name.lower()
-    if k in ("jr.","jr","sr.","sr","ii","iii","iv") and len(parts) >= 2:
-        k = parts[-2].lower()
-    return k
+_name_to_key = players.name_key   # "Rodríguez" → "rodriguez"（模型各表的投手 key）
 
 def _player_tier(k):
     if k in KEY_SP:  return "S"
@@ -508,30 +543,157 @@ def get_star_injuries(team):
 # ★ 投手近期 ERA
 # ══════════════════════════════════════════════
 
-def _fetch_recent_era(pitcher_id, last_n=3, expected_key=None, expected_full=None):
+_SEASON_FINALS      = None   # gamePk -> {"date": officialDate, "runs": {team_id: runs}}（本季完賽，每次執行建立一次）
+_SEASON_FINALS_LOCK = threading.Lock()
+
+def _season_finals():
+    """以單一整季 schedule 請求建立完賽索引：供 Run Support 共用（取代逐場 boxscore），
+    也是 gameLog 本地庫的增量來源。"""
+    global _SEASON_FINALS
+    with _SEASON_FINALS_LOCK:
+        if _SEASON_FINALS is not None: return _SEASON_FINALS
+        today = datetime.date.today()
+        data = safe_get(
+            "https://statsapi.mlb.com/api/v1/schedule",
+            params={"sportId": 1, "gameType": "R",
+                    "startDate": "%d-03-01" % today.year,
+                    "endDate": (today - datetime.timedelta(days=1)).isoformat(),
+                    "fields": "dates,date,games,gamePk,officialDate,status,abstractGameState,"
+                              "teams,home,away,team,id,score"},
+            timeout=15, cache_ttl=CACHE_STATS_TTL,
+        )
+        idx = {}
+        for db in (data or {}).get("dates", []):
+            for g in db.get("games", []):
+                if g.get("status",{}).get("abstractGameState") != "Final": continue
+                runs = {}
+                for side in ("home", "away"):
+                    t = g.get("teams",{}).get(side,{})
+                    tid = t.get("team",{}).get("id")
+                    if tid and t.get("score") is not None:
+                        runs[tid] = t["score"]
+                if g.get("gamePk") and runs:
+                    idx[g["gamePk"]] = {"date": g.get("officialDate") or db.get("date",""), "runs": runs}
+        log.info("Season finals index: %d games", len(idx))
+        _SEASON_FINALS = idx
+        return idx
+
+
+# ══════════════════════════════════════════════
+# ★ 賽季投手 gameLog 本地庫（增量：每天只補抓新完賽場次的 boxscore）
+# ══════════════════════════════════════════════
+
+PITCH_LOG_PATH    = os.getenv("PITCH_LOG_PATH", ".cache/pitching_logs.json")
+PITCH_LOG_MAX_BOX = 600   # 單次執行最多補抓的 boxscore 數（季中首次建庫分數次完成）
+# 單次執行補抓的時間預算（秒）：pitch_log 是必要階段（無時間片）且 era 依賴它，
+# 冷快取（新 cache key / 被清除）時不能讓補庫拖住整個執行；超過預算的場次留待下次，庫未完整前 ERA 逐投手查 API
+PITCH_LOG_BUDGET_S = float(os.getenv("PITCH_LOG_BUDGET_S", "45"))
+_PITCH_LOG_STAT_KEYS = ("inningsPitched", "earnedRuns", "baseOnBalls", "hits",
+                        "homeRuns", "strikeOuts", "hitBatsmen", "gamesStarted")
+_PITCH_LOG      = None    # {"season", "games": {gamePk: date}, "logs": {pid: [split]}, "complete": bool}
+_PITCH_LOG_LOCK = threading.Lock()
+
+def _pitch_log_box(gpk, date):
+    """單場完賽 boxscore → [(pid, split)]，split 格式與 people/{id}/stats gameLog 相同。"""
+    box = safe_get(
+        "https://statsapi.mlb.com/api/v1/game/%d/boxscore" % gpk,
+        params={"fields": "teams,home,away,team,id,pitchers,players,person,fullName,stats,pitching,"
+                          + ",".join(_PITCH_LOG_STAT_KEYS)},
+        timeout=8, cache_ttl=0,   # 結果已寫入本地庫，不需重複快取
+    )
+    if not box: return None
+    out = []
+    for side in ("home", "away"):
+        td  = box.get("teams",{}).get(side,{})
+        tid = td.get("team",{}).get("id")
+        box_players = td.get("players",{})
+        for pid in td.get("pitchers",[]):
+            pdata = box_players.get("ID%d" % pid, {})
+            stat  = pdata.get("stats",{}).get("pitching",{})
+            if not stat: continue
+            out.append((pid, {
+                "date":   date,
+                "stat":   {k: str(stat.get(k, "0")) for k in _PITCH_LOG_STAT_KEYS},
+                "game":   {"gamePk": gpk, "gameDate": date},
+                "team":   {"id": tid},
+                "player": {"fullName": pdata.get("person",{}).get("fullName","")},
+            }))
+    return out
+
+@tracing.traced(cat="persist")
+def sync_pitch_log():
+    """載入本地 gameLog 庫並補上尚未收錄的本季完賽場次（每次最多 PITCH_LOG_MAX_BOX 場、PITCH_LOG_BUDGET_S 秒）；
+    庫完整時 _fetch_recent_era 完全不需逐投手請求，未完整時它改走逐投手 gameLog。"""
+    global _PITCH_LOG
+    with _PITCH_LOG_LOCK:
+        if _PITCH_LOG is not None: return _PITCH_LOG
+        year  = datetime.date.today().year
+        store = {"season": year, "games": {}, "logs": {}}
+        try:
+            with open(PITCH_LOG_PATH, encoding="utf-8") as f:
+                _s = json.load(f)
+            # 錄製 / 重播：從空庫開始，請求序列才與本機狀態無關
+            if _s.get("season") == year and not http_replay.active(): store = _s
+        except (OSError, ValueError):
+            pass
+        finals  = _season_finals()
+        missing = sorted((v["date"], gpk) for gpk, v in finals.items() if str(gpk) not in store["games"])
+        batch   = missing[:PITCH_LOG_MAX_BOX]
+        if batch:
+            dl = time.time() + PITCH_LOG_BUDGET_S
+            def _box_job(dg):
+                if time.time() >= dl: return None   # 超過本次預算：不再發新請求，留待下次執行
+                with http_client.deadline(dl):      # 進行中的請求也壓在預算內
+                    return _pitch_log_box(dg[1], dg[0])
+            with ThreadPoolExecutor(max_workers=ERA_WORKERS) as ex:
+                boxes = list(ex.map(_box_job, batch))
+            if time.time() >= dl:
+                log.warning("Pitch log: backfill budget %.0fs used — rest deferred to next run", PITCH_LOG_BUDGET_S)
+            added = 0
+            for (date, gpk), rows in zip(batch, boxes):
+                if rows is None: continue
+                store["games"][str(gpk)] = date
+                for pid, split in rows:
+                    store["logs"].setdefault(str(pid), []).append(split)
+                added += 1
+            for lst in store["logs"].values():
+                lst.sort(key=lambda x: (x["date"], x["game"]["gamePk"]))
+            try:
+                if not http_replay.active():
+                    os.makedirs(os.path.dirname(PITCH_LOG_PATH) or ".", exist_ok=True)
+                    with open(PITCH_LOG_PATH, "w", encoding="utf-8") as f:
+                        json.dump(store, f, ensure_ascii=False, separators=(",", ":"))
+            except OSError as e:
+                log.warning("Pitch log save failed: %s", e)
+            log.info("Pitch log: +%d games (%d pending)", added, len(missing) - added)
+        store["complete"] = bool(finals) and all(str(gpk) in store["games"] for gpk in finals)
+        log.info("Pitch log: %d games, %d pitchers, complete=%s",
+                 len(store["games"]), len(store["logs"]), store["complete"])
+        _PITCH_LOG = store
+        return store
+
+def _pitch_log_splits(pitcher_id):
+    """本地庫完整時回傳該投手本季 gameLog splits（無出賽為 []）；庫不完整回傳 None → 改走 API。"""
+    store = sync_pitch_log()
+    if not store.get("complete"): return None
+    return store["logs"].get(str(pitcher_id), [])
+
+def _fetch_recent_era(pitcher_id, last_n=3):
     """返回 (ERA, RS, avg_ip, WHIP, FIP, K9, last_start, is_reliever, era_trend, babip, lob_pct, bb9) 12-tuple。
-    expected_full: 預期的完整投手姓名，用於全名比對驗證（同姓異人問題）。"""
+    pitcher_id 已由 players 登錄以全名（+球隊）確認，不需再比對 gameLog 回傳的姓名。"""
     _NONE12 = (None, None, None, None, None, None, None, False, None, None, None, None)
-    year = datetime.date.today().year
-    data = safe_get(
-        "https://statsapi.mlb.com/api/v1/people/%d/stats" % pitcher_id,
-        params={"stats":"gameLog","group":"pitching","season":year,"gameType":"R","sportId":1},
-        timeout=10,
-    )
-    if not data: return _NONE12
-    splits = []
-    for s in data.get("stats",[]): splits = s.get("splits",[]); break
-
-    # ── 身份驗證：全名比對，防止同姓不同人的ID錯誤 ─────────────
-    if splits and expected_full:
-        returned_name = splits[0].get("player", {}).get("fullName", "")
-        if returned_name:
-            def _norm(n):
-                return unicodedata.normalize("NFKD", n).encode("ascii","ignore").decode("ascii").lower().strip()
-            if _norm(returned_name) != _norm(expected_full):
-                log.warning("PitcherID mismatch! id=%s expected='%s' got='%s' — ERA discarded",
-                            pitcher_id, expected_full, returned_name)
-                return _NONE12
+    # ★ 優先使用本地 gameLog 庫（零請求）；庫尚未完整才逐投手呼叫 API
+    splits = _pitch_log_splits(pitcher_id)
+    if splits is None:
+        year = datetime.date.today().year
+        data = safe_get(
+            "https://statsapi.mlb.com/api/v1/people/%d/stats" % pitcher_id,
+            params={"stats":"gameLog","group":"pitching","season":year,"gameType":"R","sportId":1},
+            timeout=10,
+        )
+        if not data: return _NONE12
+        splits = []
+        for s in data.get("stats",[]): splits = s.get("splits",[]); break
 
     # 完整先發（IP ≥ 4.0，過濾開場型中繼與牛棚短局出賽）
     proper_starts = [s for s in splits
@@ -610,29 +772,58 @@ def _fetch_recent_era(pitcher_id, last_n=3, expected_key=None, expected_full=Non
     # ── BB/9 ──────────────────────────────────────────────────
     bb9_ret = round(total_bb / total_ip * 9, 1) if total_ip > 0 else None
 
-    # ── Run Support：從各場 boxscore 取隊伍得分 ──
+    # ── Run Support：隊伍得分優先查賽季比分索引，索引缺漏才抓 boxscore ──
+    finals = _season_finals()
     rs_vals = []
     for s in recent:
         gpk = s.get("game",{}).get("gamePk")
         tid = s.get("team",{}).get("id")
         if not gpk or not tid: continue
-        box = safe_get(
-            "https://statsapi.mlb.com/api/v1/game/%d/boxscore" % gpk,
-            params={"fields":"teams,home,away,team,id,teamStats,batting,runs"},
-            timeout=6,
-        )
-        if not box: continue
-        for side in ("home","away"):
-            td = box.get("teams",{}).get(side,{})
-            if td.get("team",{}).get("id") == tid:
-                r = td.get("teamStats",{}).get("batting",{}).get("runs")
-                if r is not None:
-                    try: rs_vals.append(min(float(r), 10.0))
-                    except: pass
-                break
+        r = finals.get(gpk, {}).get("runs", {}).get(tid)
+        if r is None:
+            # 早於昨天（UTC，與 _cache_ttl 同一截止）的先發才確定完賽 → boxscore 永久快取；
+            # gameDate 是 UTC，昨天開打的比賽在 06:00 UTC 執行時可能還在進行，不可快取部分比分
+            _gd   = (s.get("game",{}).get("gameDate") or s.get("date") or "")[:10]
+            _past = bool(_gd) and _gd < _final_cutoff()
+            box = safe_get(
+                "https://statsapi.mlb.com/api/v1/game/%d/boxscore" % gpk,
+                params={"fields":"teams,home,away,team,id,teamStats,batting,runs"},
+                timeout=6, cache_ttl=CACHE_FOREVER if _past else 0,
+            )
+            if not box: continue
+            for side in ("home","away"):
+                td = box.get("teams",{}).get(side,{})
+                if td.get("team",{}).get("id") == tid:
+                    r = td.get("teamStats",{}).get("batting",{}).get("runs")
+                    break
+        if r is not None:
+            try: rs_vals.append(min(float(r), 10.0))
+            except: pass
     rs_ret = round(min(sum(rs_vals)/len(rs_vals), 8.0), 2) if rs_vals else None
     return era_ret, rs_ret, avg_ip, whip_ret, fip_ret, k9_ret, last_start_ret, is_reliever, era_trend, babip_ret, lob_ret, bb9_ret
 
+ERA_WORKERS = 8   # 投手近期數據並行抓取執行緒數
+
+def _recent_era_job(key, full, direct_id, team):
+    """單一投手：取得 pitcher ID 後抓近期數據，回傳 (pid, 12-tuple)；查無 ID 時 (None, None)。"""
+    # ★ ID 優先序：schedule / game feed 直接給的 ID → 本地球員登錄（全名 + 球隊）→ name search
+    pid = direct_id or players.find(full, team)
+    if not pid:
+        # Fallback：name search（新人、登錄尚未收錄），全名一致才採用並寫回登錄
+        sdata = safe_get(
+            "https://statsapi.mlb.com/api/v1/people/search",
+            params={"names": full, "sportId": 1},
+            timeout=8,
+        )
+        if sdata:
+            for p in sdata.get("people", []):
+                if players.norm_name(p.get("fullName","")) == players.norm_name(full):
+                    pid = p.get("id")
+                    players.observe(pid, p.get("fullName"))
+                    break
+    if not pid: return None, None
+    return pid, _fetch_recent_era(pid)
+
 def build_recent_era_cache(pitchers_dict):
     global _RECENT_ERA, _PITCHER_RS, _PITCHER_IP, _PITCHER_WHIP
     global _PITCHER_FIP, _PITCHER_K9, _PITCHER_LAST, _RELIEVER_FLAGS, _PITCHER_TREND
@@ -642,59 +833,52 @@ def build_recent_era_cache(pitchers_dict):
     babip_cache={}; lob_cache={}; bb9_cache={}
     seen = set()
     pitcher_id_map = {}  # pitcher_key -> pitcher_id (for L/R splits)
+    jobs = []
     for (home, away), info in pitchers_dict.items():
-        for key, full, direct_id in [
-            (info.get("home_pitcher"), info.get("home_name"), info.get("home_pitcher_id")),
-            (info.get("away_pitcher"), info.get("away_name"), info.get("away_pitcher_id")),
+        for key, full, direct_id, team in [
+            (info.get("home_pitcher"), info.get("home_name"), info.get("home_pitcher_id"), home.split("__")[0]),
+            (info.get("away_pitcher"), info.get("away_name"), info.get("away_pitcher_id"), away),
         ]:
             if not key or key in seen: continue
             if not full or full == "TBD": continue
             seen.add(key)
-
-            # ★ 優先使用 schedule API 直接給的 pitcher ID（省去 name-search API 往返）
-            pid = direct_id
-            if not pid:
-                # Fallback：name search（API 未給 ID 時）
-                sdata = safe_get(
-                    "https://statsapi.mlb.com/api/v1/people/search",
-                    params={"names": full, "sportId": 1},
-                    timeout=8,
-                )
-                if sdata:
-                    for p in sdata.get("people", []):
-                        if _name_to_key(p.get("fullName","")) == key:
-                            pid = p.get("id"); break
-
-            if not pid: continue
-            if pid: pitcher_id_map[key] = pid
-            era, rs, avg_ip, whip, fip, k9, last_start, is_reliever, era_trend, babip, lob_pct, bb9 = _fetch_recent_era(pid, expected_key=key, expected_full=full)
-            if is_reliever:
-                reliever_set.add(key)
-                log.info("Reliever: %s (no IP≥4.0 starts)", key)
-            if era is not None:
-                cache[key] = era
-                _avgip = avg_ip if avg_ip else 0
-                _suffix = " ⚠️ 小樣本(avgIP<5.0)" if _avgip < 5.0 else ""
-                log.info("ERA %s(id=%s): %.2f (FIP=%.2f K9=%.1f avgIP=%.1f WHIP=%.2f trend=%+.2f)%s",
-                         key, pid, era,
-                         fip if fip else 0, k9 if k9 else 0,
-                         _avgip, whip if whip else 0,
-                         era_trend if era_trend is not None else 0, _suffix)
-                if _avgip < 5.0:
-                    log.warning("⚠️ SMALL SAMPLE pitcher %s(id=%s): avg %.1f IP/start — ERA reliability LOW",
-                                key, pid, _avgip)
-            elif not is_reliever:
-                log.info("ERA %s(id=%s): no recent starts (IP<4.0 or no data)", key, pid)
-            if rs is not None:         rs_cache[key]    = rs
-            if avg_ip is not None:     ip_cache[key]    = avg_ip
-            if whip is not None:       whip_cache[key]  = whip
-            if fip is not None:        fip_cache[key]   = fip
-            if k9 is not None:         k9_cache[key]    = k9
-            if last_start:             last_cache[key]  = last_start
-            if era_trend is not None:  trend_cache[key] = era_trend
-            if babip is not None:      babip_cache[key] = babip
-            if lob_pct is not None:    lob_cache[key]   = lob_pct
-            if bb9 is not None:        bb9_cache[key]   = bb9
+            jobs.append((key, full, direct_id, team))
+
+    # ★ 每位投手的 ID 查詢 + gameLog + boxscore 互相獨立 → 有界執行緒池並行（主機並行數由 http_client 限制）
+    with ThreadPoolExecutor(max_workers=ERA_WORKERS) as ex:
+        fetched = list(ex.map(lambda j: _recent_era_job(*j), jobs))
+
+    for (key, full, _, _), (pid, stats) in zip(jobs, fetched):
+        if not pid: continue
+        pitcher_id_map[key] = pid
+        era, rs, avg_ip, whip, fip, k9, last_start, is_reliever, era_trend, babip, lob_pct, bb9 = stats
+        if is_reliever:
+            reliever_set.add(key)
+            log.info("Reliever: %s (no IP≥4.0 starts)", key)
+        if era is not None:
+            cache[key] = era
+            _avgip = avg_ip if avg_ip else 0
+            _suffix = " ⚠️ 小樣本(avgIP<5.0)" if _avgip < 5.0 else ""
+            log.info("ERA %s(id=%s): %.2f (FIP=%.2f K9=%.1f avgIP=%.1f WHIP=%.2f trend=%+.2f)%s",
+                     key, pid, era,
+                     fip if fip else 0, k9 if k9 else 0,
+                     _avgip, whip if whip else 0,
+                     era_trend if era_trend is not None else 0, _suffix)
+            if _avgip < 5.0:
+                log.warning("⚠️ SMALL SAMPLE pitcher %s(id=%s): avg %.1f IP/start — ERA reliability LOW",
+                            key, pid, _avgip)
+        elif not is_reliever:
+            log.info("ERA %s(id=%s): no recent starts (IP<4.0 or no data)", key, pid)
+        if rs is not None:         rs_cache[key]    = rs
+        if avg_ip is not None:     ip_cache[key]    = avg_ip
+        if whip is not None:       whip_cache[key]  = whip
+        if fip is not None:        fip_cache[key]   = fip
+        if k9 is not None:         k9_cache[key]    = k9
+        if last_start:             last_cache[key]  = last_start
+        if era_trend is not None:  trend_cache[key] = era_trend
+        if babip is not None:      babip_cache[key] = babip
+        if lob_pct is not None:    lob_cache[key]   = lob_pct
+        if bb9 is not None:        bb9_cache[key]   = bb9
     _RECENT_ERA     = cache
     _PITCHER_RS     = rs_cache
     _PITCHER_IP     = ip_cache
@@ -806,11 +990,17 @@ def fetch_weather(team, game_dt):
 
 def fetch_espn_ratings():
     global _ESPN_RATINGS
+    if not circuit.allow("espn"):   # ★ 斷路中 → 直接用 BASE 評分
+        return False
+    # ★ 對沖請求：主機超過延遲百分位未回應才發備援主機，取先回來的
     data = None
-    for url in ["https://site.api.espn.com/apis/v2/sports/baseball/mlb/standings",
-                "https://site.web.api.espn.com/apis/v2/sports/baseball/mlb/standings"]:
-        data = safe_get(url, timeout=15)
-        if data: break
+    resp = http_client.hedged_get(
+        ["https://site.api.espn.com/apis/v2/sports/baseball/mlb/standings",
+         "https://site.web.api.espn.com/apis/v2/sports/baseball/mlb/standings"], timeout=15)
+    if resp is not None:
+        try: data = resp.json()
+        except ValueError as e: log.warning("ESPN json: %s", e)
+    circuit.record("espn", bool(data))
     if not data:
         log.warning("ESPN failed"); return False
     def to_f(s):
@@ -825,7 +1015,7 @@ def fetch_espn_ratings():
         for grp in data.get("children",[]):
             for e in grp.get("standings",{}).get("entries",[]):
                 abbr  = e.get("team",{}).get("abbreviation","").lower()
-                short = ESPN_ABBR.get(abbr)
+                short = teams.key(abbr)
                 if not short:
                     log.debug("ESPN unknown abbr: %s", abbr)
                     continue
@@ -902,17 +1092,12 @@ def fetch_roto_probable_pitchers():
     RW_HEADERS = {"User-Agent":
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"}
+    if not circuit.allow("rotowire_sp"):   # ★ 斷路中 → 只用 MLB probablePitcher
+        return False
     try:
-        resp = None
-        for rw_url in RW_URLS:
-            try:
-                r = requests.get(rw_url, headers=RW_HEADERS, timeout=15)
-                if r.status_code == 200:
-                    resp = r
-                    break
-                log.debug("RotoWire SP URL %s → %d", rw_url, r.status_code)
-            except Exception as e:
-                log.debug("RotoWire SP URL %s error: %s", rw_url, e)
+        # ★ 對沖請求：主要網址慢於延遲百分位才發備援網址
+        resp = http_client.hedged_get(RW_URLS, headers=RW_HEADERS, timeout=15)
+        circuit.record("rotowire_sp", resp is not None)
         if resp is None:
             log.info("RotoWire probable pitchers: all URLs unavailable, skipping")
             return False
@@ -935,7 +1120,7 @@ def fetch_roto_probable_pitchers():
         found = 0
         for block in matchup_blocks:
             # 找隊伍名稱（title 屬性或 lineup__abbr）
-            teams = re.findall(
+            tlabels = re.findall(
                 r'(?:lineup__abbr[^>]*>|data-team=")\s*([A-Za-z ]{2,25}?)(?:\s*<|\s*")',
                 block
             )
@@ -944,11 +1129,9 @@ def fetch_roto_probable_pitchers():
                 r'lineup__player[^>]*>.*?<a[^>]*>([A-Z][a-z]+(?:\s[A-Z][a-z]+)+)',
                 block, re.S
             )
-            if len(teams) >= 2 and len(pitchers) >= 2:
-                away_raw = teams[0].strip().lower()
-                home_raw = teams[1].strip().lower()
-                away_k = norm_team(TEAM_ALIAS.get(away_raw, away_raw.split()[-1]))
-                home_k = norm_team(TEAM_ALIAS.get(home_raw, home_raw.split()[-1]))
+            if len(tlabels) >= 2 and len(pitchers) >= 2:
+                away_k = teams.key(tlabels[0])
+                home_k = teams.key(tlabels[1])
                 if away_k and home_k:
                     _ROTO_SP[(home_k, away_k)] = {
                         "home": pitchers[1].strip(),
@@ -964,39 +1147,43 @@ def fetch_roto_probable_pitchers():
 
 def fetch_injury_list():
     global _DYN_OUT, _DYN_LTD
-    try:
-        r = requests.get(
-            "https://www.rotowire.com/baseball/injury-report.php",
-            headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
-            timeout=15,
-        )
-        r.raise_for_status()
-        text = r.text.lower()
-        out_kw  = ["ruled out","will not play","is out","60-day il","tommy john","season-ending"]
-        ltd_kw  = ["day-to-day","questionable","limited","15-day il","10-day il"]
-        skip_kw = ["probable","available","activated","reinstated"]
-        dyn_out, dyn_ltd = {}, {}
-        for short, players in ROSTER.items():
-            for p in players:
-                if p not in text: continue
-                idx = text.find(p)
-                ctx = text[max(0,idx-80):idx+200]
-                if any(s in ctx for s in skip_kw): continue
-                if any(s in ctx for s in out_kw):
-                    dyn_out.setdefault(short,[]).append(p)
-                elif any(s in ctx for s in ltd_kw):
-                    dyn_ltd.setdefault(short,[]).append((p, _player_tier(p)))
-        for short, players in OUT_STATIC.items():
-            existing = set(dyn_out.get(short,[]))
-            for p in players:
-                if p not in existing: dyn_out.setdefault(short,[]).append(p)
-        total = sum(len(v) for v in dyn_out.values()) + sum(len(v) for v in dyn_ltd.values())
-        log.info("RotoWire: %d injuries", total)
-        if total > 0:
-            _DYN_OUT, _DYN_LTD = dyn_out, dyn_ltd
-            return "rotowire"
-    except Exception as e:
-        log.warning("RotoWire failed: %s", e)
+    # ★ 斷路中 → 直接用靜態傷兵名單
+    if circuit.allow("rotowire_injuries"):
+        try:
+            r = http_client.get(
+                "https://www.rotowire.com/baseball/injury-report.php",
+                headers={"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
+                timeout=15,
+            )
+            r.raise_for_status()
+            circuit.record("rotowire_injuries", True)
+            text = r.text.lower()
+            out_kw  = ["ruled out","will not play","is out","60-day il","tommy john","season-ending"]
+            ltd_kw  = ["day-to-day","questionable","limited","15-day il","10-day il"]
+            skip_kw = ["probable","available","activated","reinstated"]
+            dyn_out, dyn_ltd = {}, {}
+            for short, players in ROSTER.items():
+                for p in players:
+                    if p not in text: continue
+                    idx = text.find(p)
+                    ctx = text[max(0,idx-80):idx+200]
+                    if any(s in ctx for s in skip_kw): continue
+                    if any(s in ctx for s in out_kw):
+                        dyn_out.setdefault(short,[]).append(p)
+                    elif any(s in ctx for s in ltd_kw):
+                        dyn_ltd.setdefault(short,[]).append((p, _player_tier(p)))
+            for short, players in OUT_STATIC.items():
+                existing = set(dyn_out.get(short,[]))
+                for p in players:
+                    if p not in existing: dyn_out.setdefault(short,[]).append(p)
+            total = sum(len(v) for v in dyn_out.values()) + sum(len(v) for v in dyn_ltd.values())
+            log.info("RotoWire: %d injuries", total)
+            if total > 0:
+                _DYN_OUT, _DYN_LTD = dyn_out, dyn_ltd
+                return "rotowire"
+        except Exception as e:
+            circuit.record("rotowire_injuries", False)
+            log.warning("RotoWire failed: %s", e)
     log.warning("Using static injury list")
     _DYN_OUT = {k: list(v) for k,v in OUT_STATIC.items()}
     _DYN_LTD = {k: list(v) for k,v in LTD_STATIC.items()}
@@ -1007,16 +1194,6 @@ def fetch_injury_list():
 # 先發投手
 # ══════════════════════════════════════════════
 
-ESPN_TEAM_ABBR = {
-    "lad":"dodgers","sf":"giants","nyy":"yankees","bos":"red sox","nym":"mets",
-    "atl":"braves","phi":"phillies","sea":"mariners","mil":"brewers","pit":"pirates",
-    "tor":"blue jays","det":"tigers","hou":"astros","tex":"rangers","chc":"cubs",
-    "bal":"orioles","kc":"royals","tb":"rays","ari":"diamondbacks","cin":"reds",
-    "sd":"padres","cle":"guardians","mia":"marlins","min":"twins",
-    "oak":"athletics","sac":"athletics","stl":"cardinals","laa":"angels",
-    "cws":"white sox","wsh":"nationals","col":"rockies",
-}
-
 def fetch_probable_pitchers():
     today   = datetime.date.today().isoformat()
     now_utc = datetime.datetime.utcnow()
@@ -1036,14 +1213,16 @@ def fetch_probable_pitchers():
         for game in de.get("games",[]):
             hd  = game.get("teams",{}).get("home",{})
             ad  = game.get("teams",{}).get("away",{})
-            hs  = MLB_TEAM_ID.get(hd.get("team",{}).get("id")) or norm_team(hd.get("team",{}).get("name",""))
-            as_ = MLB_TEAM_ID.get(ad.get("team",{}).get("id")) or norm_team(ad.get("team",{}).get("name",""))
+            hs  = teams.key(hd.get("team",{})) or norm_team(hd.get("team",{}).get("name",""))
+            as_ = teams.key(ad.get("team",{})) or norm_team(ad.get("team",{}).get("name",""))
             hp    = hd.get("probablePitcher",{}).get("fullName")
             ap    = ad.get("probablePitcher",{}).get("fullName")
             hp_id = hd.get("probablePitcher",{}).get("id")
             ap_id = ad.get("probablePitcher",{}).get("id")
             hp_hand = hd.get("probablePitcher",{}).get("pitchHand",{}).get("code","R")
             ap_hand = ad.get("probablePitcher",{}).get("pitchHand",{}).get("code","R")
+            players.observe(hp_id, hp, hand=hd.get("probablePitcher",{}).get("pitchHand",{}).get("code"), team=hs)
+            players.observe(ap_id, ap, hand=ad.get("probablePitcher",{}).get("pitchHand",{}).get("code"), team=as_)
             gpk   = game.get("gamePk")
             state = game.get("status",{}).get("detailedState","Scheduled")
             # gameDateTime 包含時間（ISO 8601 with Z），gameDate 僅有日期字串
@@ -1078,10 +1257,13 @@ def fetch_probable_pitchers():
         for side, is_home in [("home",True),("away",False)]:
             rname = roto.get("home" if is_home else "away")
             if rname and rname != entry["home_name" if is_home else "away_name"]:
+                # ★ 只有名字 → 由球員登錄（全名 + 球隊）直接對回 ID
                 if is_home:
-                    entry.update({"home_name":rname,"home_pitcher":_name_to_key(rname),"home_pitcher_id":None})
+                    entry.update({"home_name":rname,"home_pitcher":_name_to_key(rname),
+                                  "home_pitcher_id":players.find(rname, key[0])})
                 else:
-                    entry.update({"away_name":rname,"away_pitcher":_name_to_key(rname),"away_pitcher_id":None})
+                    entry.update({"away_name":rname,"away_pitcher":_name_to_key(rname),
+                                  "away_pitcher_id":players.find(rname, key[1])})
                 changed.append(("H" if is_home else "A")+":"+rname)
         if changed:
             entry["_src"] = "rotowire"
@@ -1099,7 +1281,7 @@ def fetch_probable_pitchers():
                 home_k = away_k = home_sp = away_sp = None
                 for cmp in comp.get("competitors", []):
                     abbr = cmp.get("team",{}).get("abbreviation","").lower()
-                    tk   = ESPN_TEAM_ABBR.get(abbr)
+                    tk   = teams.key(abbr)
                     if not tk: continue
                     probs = cmp.get("probables", [])
                     sp    = probs[0].get("athlete",{}).get("fullName") if probs else None
@@ -1112,10 +1294,12 @@ def fetch_probable_pitchers():
                 entry = result[key]
                 changed = []
                 if home_sp and home_sp != entry["home_name"]:
-                    entry.update({"home_name":home_sp,"home_pitcher":_name_to_key(home_sp),"home_pitcher_id":None})
+                    entry.update({"home_name":home_sp,"home_pitcher":_name_to_key(home_sp),
+                                  "home_pitcher_id":players.find(home_sp, home_k)})
                     changed.append("H:"+home_sp)
                 if away_sp and away_sp != entry["away_name"]:
-                    entry.update({"away_name":away_sp,"away_pitcher":_name_to_key(away_sp),"away_pitcher_id":None})
+                    entry.update({"away_name":away_sp,"away_pitcher":_name_to_key(away_sp),
+                                  "away_pitcher_id":players.find(away_sp, away_k)})
                     changed.append("A:"+away_sp)
                 if changed:
                     entry["_src"] = "espn"
@@ -1150,16 +1334,16 @@ def fetch_probable_pitchers():
             for side, is_home in [("home",True),("away",False)]:
                 t            = bs.get(side,{})
                 pitchers_ids = t.get("pitchers",[])
-                players      = t.get("players",{})
+                box_players  = t.get("players",{})
                 name = pid_found = None
                 if pitchers_ids:
                     # 比賽已開始 → 第一個就是先發
                     pk_key   = "ID%d" % pitchers_ids[0]
-                    name     = players.get(pk_key,{}).get("person",{}).get("fullName")
+                    name     = box_players.get(pk_key,{}).get("person",{}).get("fullName")
                     pid_found = pitchers_ids[0]
                 else:
                     # Pre-Game → 找 position code=1 且沒有打序的投手
-                    for pk_key, pdata in players.items():
+                    for pk_key, pdata in box_players.items():
                         pos = pdata.get("position",{})
                         if pos.get("code") == "1" or pos.get("abbreviation") == "P":
                             bo = str(pdata.get("battingOrder") or "").strip()
@@ -1168,6 +1352,7 @@ def fetch_probable_pitchers():
                                 pid_found = pdata.get("person",{}).get("id")
                                 break
                 if name:
+                    players.observe(pid_found, name, team=key[0] if is_home else key[1])
                     old = entry["home_name"] if is_home else entry["away_name"]
                     if name != old:
                         if is_home:
@@ -1182,6 +1367,10 @@ def fetch_probable_pitchers():
             log.warning("Game feed SP failed gpk=%s: %s", gpk, e)
 
     for k, v in result.items():
+        # 覆蓋來源沒有慣用手 → 以登錄中該 ID 的慣用手為準
+        for side in ("home", "away"):
+            _h = players.hand(v.get(side + "_pitcher_id"))
+            if _h and v.get(side + "_pitcher"): _PITCHER_HAND[v[side + "_pitcher"]] = _h
         log.info("SP(final/%s): %s vs %s | H=%s A=%s",
                  v.get("_src","probable"), k[0], k[1], v["home_pitcher"], v["away_pitcher"])
     log.info("Pitchers resolved: %d games", len(result))
@@ -1203,7 +1392,19 @@ def fetch_probable_pitchers():
 # ══════════════════════════════════════════════
 
 def _fetch_pitcher_season_era(pitcher_id):
-    """針對單一投手ID，直接抓取本賽季整體ERA。比 bulk API 更可靠（保證ID對應正確）。"""
+    """針對單一投手ID，直接抓取本賽季整體ERA。比 bulk API 更可靠（保證ID對應正確）。
+    本地 gameLog 庫完整時直接加總計算，不發請求。"""
+    splits = _pitch_log_splits(pitcher_id)
+    if splits:
+        ip = er = 0.0
+        for s in splits:
+            ip_p = str(s["stat"].get("inningsPitched","0") or "0").split(".")
+            try:
+                ip += int(ip_p[0]) + (int(ip_p[1])/3 if len(ip_p)>1 and ip_p[1] else 0)
+                er += float(s["stat"].get("earnedRuns","0") or 0)
+            except ValueError: continue
+        era = er / ip * 9 if ip >= 0.1 else 0
+        return round(era, 2) if ip >= 0.1 and 0.01 <= era <= 15.0 else None
     year = datetime.date.today().year
     data = safe_get(
         "https://statsapi.mlb.com/api/v1/people/%d/stats" % pitcher_id,
@@ -1235,7 +1436,7 @@ def fetch_live_sp_era():
     """從 MLB Stats API 拉取本賽季全部投手ERA，
     補充靜態 PITCHER_ERA 字典（同名者不覆蓋，新名者補入）。
     IP≥20 局過濾，排除純牛棚。"""
-    global _LIVE_SP_ERA
+    global _LIVE_SP_ERA, _LIVE_SP_ERA_ID
     year = datetime.date.today().year
     data = safe_get(
         "https://statsapi.mlb.com/api/v1/stats",
@@ -1244,8 +1445,11 @@ def fetch_live_sp_era():
         timeout=15,
     )
     if not data: return False
-    live = {}
-    for split in data.get("stats",[{}])[0].get("splits",[]):
+    splits = data.get("stats",[{}])[0].get("splits",[])
+    players.update_from_splits(splits)   # ★ 球員登錄增量更新（新人 / 轉隊）
+    live = {}; live_ip = {}; by_id = {}
+    for split in splits:
+        pid   = split.get("player",{}).get("id")
         pname = split.get("player",{}).get("fullName","")
         stat  = split.get("stat",{})
         era_s = stat.get("era","")
@@ -1258,19 +1462,22 @@ def fetch_live_sp_era():
             era = float(era_s)
             if era < 0.1 or era > 12.0: continue
             key = _name_to_key(pname)
-            if key: live[key] = round(era, 2)
+            if pid: by_id[pid] = round(era, 2)
+            # 同姓多人：保留局數最多者；今日先發在 era_topup 依 ID 校正
+            if key and ip_total > live_ip.get(key, 0):
+                live[key] = round(era, 2); live_ip[key] = ip_total
         except: pass
     if live:
-        _LIVE_SP_ERA = live
+        _LIVE_SP_ERA    = live
+        _LIVE_SP_ERA_ID = by_id
         log.info("Live SP ERA: %d pitchers (IP≥10)", len(live))
         return True
     return False
 
 
 def fetch_game_umpires(today_str):
-    """從 MLB Stats API 拉取今日比賽主審裁判，存入 _GAME_UMP。
-    key=(home_key, away_key) → (ump_name, run_adj)。"""
-    global _GAME_UMP
+    """從 MLB Stats API 拉取今日比賽主審裁判，回傳 {(home_key, away_key): (ump_name, run_adj)}
+    （選用階段：由 run() 收集後寫入 _GAME_UMP）。"""
     data = safe_get(
         "https://statsapi.mlb.com/api/v1/schedule",
         params={"date": today_str, "sportId": 1, "gameType": "R",
@@ -1278,7 +1485,7 @@ def fetch_game_umpires(today_str):
                 "fields": "dates,games,teams,home,away,team,name,officials,officialType,official,fullName"},
         timeout=12,
     )
-    if not data: return
+    if not data: return None
     result = {}
     total_games = sum(len(db.get("games",[])) for db in data.get("dates",[]))
     log.info("Umpire API: %d games returned", total_games)
@@ -1286,8 +1493,8 @@ def fetch_game_umpires(today_str):
         for game in db.get("games", []):
             home_raw = game.get("teams",{}).get("home",{}).get("team",{}).get("name","").lower()
             away_raw = game.get("teams",{}).get("away",{}).get("team",{}).get("name","").lower()
-            hk = norm_team(home_raw.split()[-1] if home_raw else "")
-            ak = norm_team(away_raw.split()[-1] if away_raw else "")
+            hk = teams.key(home_raw)
+            ak = teams.key(away_raw)
             officials = game.get("officials", [])
             if not hk or not ak:
                 log.info("Umpire skip: home_raw=%r away_raw=%r hk=%r ak=%r", home_raw, away_raw, hk, ak)
@@ -1302,14 +1509,13 @@ def fetch_game_umpires(today_str):
                     result[(hk, ak)] = (name, adj)
                     log.info("Ump %s@%s: %s (adj=%+.2f)", ak, hk, name, adj)
                     break
-    _GAME_UMP = result
     log.info("Umpires fetched: %d games", len(result))
+    return result
 
 
 def fetch_bullpen_load():
-    """拉取昨日各隊牛棚使用局數（IP），作為疲勞度指標。
-    高使用量 → bullpen_adj 加入ERA懲罰。"""
-    global _BULLPEN_LOAD
+    """拉取昨日各隊牛棚使用局數（IP），作為疲勞度指標，回傳 {team_key: IP}（無資料回傳 None）。
+    高使用量 → bullpen_adj 加入ERA懲罰（選用階段：由 run() 收集後寫入 _BULLPEN_LOAD）。"""
     d = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
     sched = safe_get(
         "https://statsapi.mlb.com/api/v1/schedule",
@@ -1317,7 +1523,7 @@ def fetch_bullpen_load():
                 "fields": "dates,games,gamePk,status,abstractGameState"},
         timeout=8,
     )
-    if not sched: return False
+    if not sched: return None
     pks = [g.get("gamePk") for db in sched.get("dates",[])
            for g in db.get("games",[])
            if g.get("status",{}).get("abstractGameState") == "Final" and g.get("gamePk")]
@@ -1326,17 +1532,16 @@ def fetch_bullpen_load():
         box = safe_get(
             "https://statsapi.mlb.com/api/v1/game/%d/boxscore" % gpk,
             params={"fields":"teams,home,away,team,name,pitchers,players,stats,pitching,inningsPitched,gamesStarted"},
-            timeout=5,
+            timeout=5, cache_ttl=CACHE_FOREVER,   # 只抓 Final 場次
         )
         if not box: continue
         for side in ("home", "away"):
             td = box.get("teams",{}).get(side,{})
-            tname = td.get("team",{}).get("name","").lower()
-            tkey  = norm_team(tname.split()[-1] if tname else "")
+            tkey = teams.key(td.get("team",{}))
             if not tkey: continue
-            players = td.get("players", {})
+            box_players = td.get("players", {})
             for pid in td.get("pitchers", []):
-                pdata = players.get("ID%d" % pid, {})
+                pdata = box_players.get("ID%d" % pid, {})
                 stat  = pdata.get("stats",{}).get("pitching",{})
                 if int(stat.get("gamesStarted",0) or 0) > 0: continue
                 ip_s = str(stat.get("inningsPitched","0") or "0")
@@ -1346,17 +1551,15 @@ def fetch_bullpen_load():
                     if ip > 0: load[tkey] = load.get(tkey, 0) + ip
                 except: pass
     if load:
-        _BULLPEN_LOAD = load
         log.info("Bullpen load(1d): %s",
                  {k:round(v,1) for k,v in sorted(load.items(),key=lambda x:-x[1])[:8]})
-    return bool(load)
+    return load or None
 
 
 def fetch_lineup():
     """從 MLB game feed 抓取今日各隊打線順序（Pre-Game 後才有資料）。
-    結果存入 _TEAM_LINEUP: team_key -> [{"order":int,"name":str,"pos":str}]
+    回傳 team_key -> [{"order":int,"name":str,"pos":str}]（選用階段：由 run() 收集後併入 _TEAM_LINEUP）。
     MLB battingOrder 值：100=第1棒, 200=第2棒 … 900=第9棒。"""
-    global _TEAM_LINEUP
     today = datetime.date.today().isoformat()
     sched = safe_get(
         "https://statsapi.mlb.com/api/v1/schedule",
@@ -1365,7 +1568,7 @@ def fetch_lineup():
         timeout=10,
     )
     if not sched:
-        return
+        return None
     LINEUP_STATES = {"Pre-Game","Warmup","In Progress","Game Over","Final",
                      "Completed Early","Delayed","Delayed Start","Preview"}
     lineup_tmp = {}
@@ -1375,12 +1578,8 @@ def fetch_lineup():
             gpk   = game.get("gamePk")
             if not gpk or state not in LINEUP_STATES:
                 continue
-            hname = game.get("teams", {}).get("home", {}).get("team", {}).get("name", "")
-            aname = game.get("teams", {}).get("away", {}).get("team", {}).get("name", "")
-            hk = norm_team(TEAM_ALIAS.get(hname.lower().split()[-1] if hname else "",
-                                          hname.lower().split()[-1] if hname else ""))
-            ak = norm_team(TEAM_ALIAS.get(aname.lower().split()[-1] if aname else "",
-                                          aname.lower().split()[-1] if aname else ""))
+            hk = teams.key(game.get("teams", {}).get("home", {}).get("team", {}))
+            ak = teams.key(game.get("teams", {}).get("away", {}).get("team", {}))
             try:
                 feed = safe_get(
                     "https://statsapi.mlb.com/api/v1.1/game/%d/feed/live" % gpk,
@@ -1395,9 +1594,9 @@ def fetch_lineup():
                 for side, tkey in [("home", hk), ("away", ak)]:
                     if not tkey:
                         continue
-                    players = bs.get(side, {}).get("players", {})
+                    box_players = bs.get(side, {}).get("players", {})
                     batters = []
-                    for pdata in players.values():
+                    for pdata in box_players.values():
                         bo = pdata.get("battingOrder")
                         if not bo:
                             continue
@@ -1418,8 +1617,8 @@ def fetch_lineup():
             except Exception as e:
                 log.warning("fetch_lineup gpk=%s: %s", gpk, e)
     if lineup_tmp:
-        _TEAM_LINEUP.update(lineup_tmp)
         log.info("Lineup fetched: %d teams", len(lineup_tmp))
+    return lineup_tmp or None
 
 
 def fetch_pitcher_lr_splits(pitcher_id_map):
@@ -1428,7 +1627,8 @@ def fetch_pitcher_lr_splits(pitcher_id_map):
     global _PITCHER_LHB_ERA, _PITCHER_RHB_ERA
     if not pitcher_id_map: return
     year = datetime.date.today().year
-    ids_str = ",".join(str(v) for v in pitcher_id_map.values() if v)
+    key_by_id = {pid: pk for pk, pid in pitcher_id_map.items() if pid}
+    ids_str = ",".join(str(v) for v in key_by_id)
     if not ids_str: return
     for sitcode, dest in [("vl", _PITCHER_LHB_ERA), ("vr", _PITCHER_RHB_ERA)]:
         data = safe_get(
@@ -1449,20 +1649,18 @@ def fetch_pitcher_lr_splits(pitcher_id_map):
                 if era_v is None or ip_total < 5: continue
             except (ValueError, TypeError):
                 continue
-            # 找回 pitcher_key
-            for pk, pid2 in pitcher_id_map.items():
-                if pid2 == pid:
-                    dest[pk] = round(era_v, 2)
-                    break
+            pk = key_by_id.get(pid)
+            if pk: dest[pk] = round(era_v, 2)
     log.info("Pitcher L/R splits: LHB=%d RHB=%d", len(_PITCHER_LHB_ERA), len(_PITCHER_RHB_ERA))
 
 
 def fetch_team_batting_splits():
-    """抓取各隊面對左/右投手的打擊 OPS（MLB Stats API sitCodes=vl/vr）。
+    """抓取各隊面對左/右投手的打擊 OPS（MLB Stats API sitCodes=vl/vr），回傳 (vs LHP, vs RHP) 兩個
+    {team_key: OPS}（選用階段：由 run() 收集後併入 _TEAM_VS_LHP_OPS / _TEAM_VS_RHP_OPS）。
     vl = vs Left-Handed Pitchers, vr = vs Right-Handed Pitchers。"""
-    global _TEAM_VS_LHP_OPS, _TEAM_VS_RHP_OPS
     year = datetime.date.today().year
-    for sitcode, dest in [("vl", _TEAM_VS_LHP_OPS), ("vr", _TEAM_VS_RHP_OPS)]:
+    vs_lhp, vs_rhp = {}, {}
+    for sitcode, dest in [("vl", vs_lhp), ("vr", vs_rhp)]:
         data = safe_get(
             "https://statsapi.mlb.com/api/v1/stats",
             params={"stats":"season","group":"hitting","gameType":"R",
@@ -1487,10 +1685,11 @@ def fetch_team_batting_splits():
             team_ops[tid] = (old_ops + ops_v * ab_v, old_ab + ab_v)
         for tid, (ops_sum, ab_sum) in team_ops.items():
             if ab_sum == 0: continue
-            tk = MLB_TEAM_ID.get(tid)
+            tk = teams.key(tid)
             if not tk: continue
             dest[tk] = round(ops_sum / ab_sum, 3)
-    log.info("Team batting splits vs LHP: %d, vs RHP: %d", len(_TEAM_VS_LHP_OPS), len(_TEAM_VS_RHP_OPS))
+    log.info("Team batting splits vs LHP: %d, vs RHP: %d", len(vs_lhp), len(vs_rhp))
+    return vs_lhp, vs_rhp
 
 
 # 各城市時區 (hours behind UTC)
@@ -1505,9 +1704,10 @@ _CITY_TZ_UTC = {
 
 def fetch_schedule_context(today_str, teams_today):
     """分析近 TRAVEL_LOOKBACK 天的賽程，計算每支球隊的旅行疲勞與連戰天數。
-    teams_today: set of team_key that play today。"""
-    global _TRAVEL_CONTEXT
-    if not teams_today: return
+    teams_today: set of team_key that play today。回傳 {team_key: {"road_days", "tz_cross"}}
+    （選用階段：由 run() 收集後併入 _TRAVEL_CONTEXT）。"""
+    if not teams_today: return None
+    ctx = {}
     start = (datetime.date.today() - datetime.timedelta(days=TRAVEL_LOOKBACK)).isoformat()
     data = safe_get(
         "https://statsapi.mlb.com/api/v1/schedule",
@@ -1521,8 +1721,8 @@ def fetch_schedule_context(today_str, teams_today):
         for g in de.get("games",[]):
             hd = g.get("teams",{}).get("home",{}).get("team",{}).get("name","")
             ad = g.get("teams",{}).get("away",{}).get("team",{}).get("name","")
-            hk = norm_team(TEAM_ALIAS.get(hd.lower(), hd.lower().split()[-1] if hd else ""))
-            ak = norm_team(TEAM_ALIAS.get(ad.lower(), ad.lower().split()[-1] if ad else ""))
+            hk = teams.key(hd)
+            ak = teams.key(ad)
             if hk and ak:
                 game_hist.append((d, hk, ak))
     game_hist.sort()
@@ -1535,7 +1735,7 @@ def fetch_schedule_context(today_str, teams_today):
             if hk == team: appearances.append((d, True))
             elif ak == team: appearances.append((d, False))
         if not appearances:
-            _TRAVEL_CONTEXT[team] = {"road_days": 0, "tz_cross": False}
+            ctx[team] = {"road_days": 0, "tz_cross": False}
             continue
         # Count consecutive road days ending yesterday
         road_days = 0
@@ -1555,8 +1755,9 @@ def fetch_schedule_context(today_str, teams_today):
                         if abs(last_tz - home_tz) >= 3:
                             tz_cross = True
                         break
-        _TRAVEL_CONTEXT[team] = {"road_days": road_days, "tz_cross": tz_cross}
-    log.info("Travel context: %d teams analyzed", len(_TRAVEL_CONTEXT))
+        ctx[team] = {"road_days": road_days, "tz_cross": tz_cross}
+    log.info("Travel context: %d teams analyzed", len(ctx))
+    return ctx
 
 
 def fetch_team_l10():
@@ -1585,8 +1786,7 @@ def fetch_team_l10():
                 continue
             for side in ("home", "away"):
                 td    = g.get("teams", {}).get(side, {})
-                tname = td.get("team", {}).get("name", "").lower()
-                tkey  = norm_team(tname.split()[-1] if tname else "")
+                tkey  = teams.key(td.get("team", {}))
                 if not tkey:
                     continue
                 won = td.get("isWinner")
@@ -1620,10 +1820,8 @@ def fetch_live_scores(today_str):
         for game in db.get("games", []):
             if game.get("status", {}).get("abstractGameState") != "Live":
                 continue
-            home_raw = game.get("teams",{}).get("home",{}).get("team",{}).get("name","").lower()
-            away_raw = game.get("teams",{}).get("away",{}).get("team",{}).get("name","").lower()
-            hk = norm_team(TEAM_ALIAS.get(home_raw, home_raw.split()[-1] if home_raw else ""))
-            ak = norm_team(TEAM_ALIAS.get(away_raw, away_raw.split()[-1] if away_raw else ""))
+            hk = teams.key(game.get("teams",{}).get("home",{}).get("team",{}))
+            ak = teams.key(game.get("teams",{}).get("away",{}).get("team",{}))
             if not hk or not ak:
                 continue
             ls         = game.get("linescore", {})
@@ -1746,7 +1944,6 @@ def fetch_bullpen_era_live():
         gs    = int(stat.get("gamesStarted",0) or 0)
         gp    = int(stat.get("gamesPitched",0) or 0)
         era_s = stat.get("era","")
-        tname = split.get("team",{}).get("name","").lower()
         try:
             ip_parts = ip_s.split(".")
             ip_total = int(ip_parts[0]) + (int(ip_parts[1])/3 if len(ip_parts)>1 and ip_parts[1] else 0)
@@ -1754,8 +1951,7 @@ def fetch_bullpen_era_live():
             if gp > 0 and gs/gp >= 0.20: continue  # 濾掉先發型投手
             era = float(era_s)
             if era < 0.5 or era > 9.5: continue
-            # 標準化球隊名
-            t = norm_team(tname.split()[-1] if tname else "")
+            t = teams.key(split.get("team",{}))
             if not t: continue
             team_ip[t] = team_ip.get(t, 0) + ip_total
             team_er[t] = team_er.get(t, 0) + era * ip_total / 9
@@ -1784,13 +1980,12 @@ def fetch_team_batting_stats():
     if not data: return False
     obp_map = {}
     for split in data.get("stats",[{}])[0].get("splits",[]):
-        tname = split.get("team",{}).get("name","").lower()
         stat  = split.get("stat",{})
         obp_s = stat.get("obp","")
         try:
             obp = float(obp_s)
             if obp < 0.200 or obp > 0.420: continue
-            t = norm_team(tname.split()[-1] if tname else "")
+            t = teams.key(split.get("team",{}))
             if t: obp_map[t] = round(obp, 3)
         except: pass
     if obp_map:
@@ -1826,113 +2021,24 @@ def _purge(records):
     cutoff = (datetime.datetime.utcnow()-datetime.timedelta(days=HIST_TTL)).strftime("%Y-%m-%d")
     return [r for r in records if r.get("date","9999") >= cutoff]
 
-def _tkey(name):
-    """球隊名標準化：移除空格/特殊字元，全小寫，用於比對。"""
-    return re.sub(r'[^a-z]', '', (name or "").lower())
-
-def _team_match(n1, n2):
-    """MLB API / Odds API 隊名可能略有差異（如 Angels vs Angels of Anaheim），
-    用包含關係做模糊比對。"""
-    k1, k2 = _tkey(n1), _tkey(n2)
-    if not k1 or not k2: return False
-    return k1 == k2 or k1 in k2 or k2 in k1
-
+@tracing.traced(cat="settle")
 def settle_hist(hist):
-    """結算 result=None 的過去紀錄，透過 MLB Stats API 查最終比分。
-    直接修改 hist 內容（in-place），回傳結算筆數。"""
-    today = datetime.date.today().isoformat()
-    pending = [r for r in hist
-               if r.get("result") is None and r.get("date","") < today]
-    log.info("settle_hist: total=%d pending=%d (today=%s)", len(hist), len(pending), today)
-    if pending:
-        s = pending[0]
-        log.info("settle_hist sample: date=%s home=%r away=%r team=%r bet=%r",
-                 s.get("date"), s.get("home"), s.get("away"), s.get("team"), s.get("bet_type"))
-    if not pending: return 0
-
-    by_date = {}
-    for r in pending:
-        by_date.setdefault(r["date"], []).append(r)
-
-    updated = 0
-    for date_str, records in sorted(by_date.items()):
-        # 台灣時間存儲的日期可能比ET日期晚一天（TW 07:10 = ET 前一天 23:10）
-        # 同時查詢 date_str 和 date_str-1天，確保能查到正確ET賽程
-        try:
-            prev_day = (datetime.date.fromisoformat(date_str) - datetime.timedelta(days=1)).isoformat()
-        except Exception:
-            prev_day = None
-        dates_to_try = [date_str] + ([prev_day] if prev_day else [])
-
-        score_map = {}
-        for try_date in dates_to_try:
-            data = safe_get(
-                "https://statsapi.mlb.com/api/v1/schedule",
-                params={"sportId":1,"date":try_date},
-                timeout=10,
-            )
-            if not data:
-                log.warning("settle_hist: no API data for %s", try_date); continue
-            # 建立 (home隊名key, away隊名key) -> (h_score, a_score) 查找表
-            for d in data.get("dates",[]):
-                for g in d.get("games",[]):
-                    if "Final" not in g.get("status",{}).get("detailedState",""):
-                        continue
-                    hd = g.get("teams",{}).get("home",{}); ad = g.get("teams",{}).get("away",{})
-                    hs = hd.get("score"); as_ = ad.get("score")
-                    if hs is None or as_ is None: continue
-                    hk = _tkey(hd.get("team",{}).get("name",""))
-                    ak = _tkey(ad.get("team",{}).get("name",""))
-                    if (hk, ak) not in score_map:  # 先找到的優先（date_str優先於prev_day）
-                        score_map[(hk, ak)] = (int(hs), int(as_))
-        log.info("settle_hist %s: %d final games, %d pending picks", date_str, len(score_map), len(records))
-
-        for r in records:
-            r_hk = _tkey(r.get("home",""))
-            r_ak = _tkey(r.get("away",""))
-            scores = None
-            for (hk, ak), sc in score_map.items():
-                if _team_match(r_hk, hk) and _team_match(r_ak, ak):
-                    scores = sc; break
-            if scores is None: continue
-            h_score, a_score = scores
-
-            btype = r.get("bet_type","")
-            team  = r.get("team","")
-            label = r.get("label","") or ""
-            team_is_home = _team_match(_tkey(team), r_hk)
-
-            try:
-                if btype == "獨贏":
-                    win = (h_score > a_score) if team_is_home else (a_score > h_score)
-                elif btype == "讓分":
-                    spread = float(label)
-                    if team_is_home:
-                        win = (h_score + spread) > a_score
-                    else:
-                        win = (a_score + spread) > h_score
-                elif btype == "大小分":
-                    mkt = r.get("market_total")
-                    if mkt is None: continue
-                    total = h_score + a_score
-                    if total == mkt:          # 整數線平局：退注，不計入勝負
-                        r["result"] = "P"; updated += 1
-                        log.info("Push [%s] total=%d line=%.1f", date_str, total, mkt)
-                        continue
-                    win = (total > mkt) if label == "OVER" else (total < mkt)
-                else:
-                    continue
-            except Exception as ex:
-                log.warning("settle calc error %s: %s", r, ex); continue
-
-            r["result"] = "W" if win else "L"
-            updated += 1
-            log.info("Settled [%s] %s (%d-%d) → %s  %s %s",
-                     date_str, r.get("home","")+"v"+r.get("away",""),
-                     h_score, a_score, r["result"], btype, label or team)
-
-    log.info("Auto-settled: %d records", updated)
-    return updated
+    """結算 result=None 的過去紀錄（昨天以前），透過 settlement 一次查詢整段期間的最終比分。
+    待結算紀錄由本地庫索引查出（不掃整份 hist），結算結果只寫回有變化的列並排程 Gist 同步；
+    hist（load_hist 的結果）中同識別的紀錄一併更新（in-place）。回傳結算筆數。
+    查詢範圍必含尚未結算（可能延賽 / 未完賽）的場次 → cache_ttl=0，不走「過去日期賽程永久快取」，
+    否則一次查到非 Final 的結果會被永久快取、該筆紀錄永遠無法結算。"""
+    rows = history_store.unsettled(datetime.date.today().isoformat())
+    n = settlement.settle([r for _, r in rows], until=datetime.date.today().isoformat(),
+                          get_json=lambda url, **kw: safe_get(url, cache_ttl=0, **kw))
+    if not n: return 0
+    done = [(k, r) for k, r in rows if r.get("result") is not None]
+    history_store.update(done)
+    results = {k: r["result"] for k, r in done}
+    for k, r in history_store.keyed(hist):
+        if k in results: r["result"] = results[k]
+    if GH_TOKEN: _schedule_hist_sync()
+    return n
 
 # ── 線路 CLV 快照 ────────────────────────────────
 _SIDE_KEY = {
@@ -1942,6 +2048,7 @@ _SIDE_KEY = {
     "over":"over","under":"under",
 }
 
+@tracing.traced(cat="persist")
 def load_odds_snapshot():
     try:
         with open(ODDS_SNAP_PATH,"r",encoding="utf-8") as f:
@@ -1949,6 +2056,7 @@ def load_odds_snapshot():
     except:
         return {}
 
+@tracing.traced(cat="persist")
 def save_odds_snapshot(snap):
     try:
         with open(ODDS_SNAP_PATH,"w",encoding="utf-8") as f:
@@ -1962,59 +2070,80 @@ def line_clv(curr_price, prev_price):
     if not prev_price or not curr_price: return None
     return round((1/curr_price - 1/prev_price) * 100, 2)
 
-def _gh_h(): return {"Authorization":"token "+GH_TOKEN,"Content-Type":"application/json"}
-
-def _find_gid(gists):
-    old = {"mlb_bot_v107_history","mlb_bot_v108_history","mlb_bot_v109_history"}
-    new_id = old_id = None
-    for g in gists:
-        d = g.get("description","")
-        if d == GIST_DESC: new_id = g["id"]
-        elif d in old and not old_id: old_id = g["id"]
-    return new_id or old_id
+# ★ 歷史紀錄：本地 history_store（SQLite）為主要紀錄，Gist 為背景同步的快照副本（經 gist_client）
+_HIST_SYNC      = None    # 進行中的 Gist 上傳執行緒
+_HIST_RESYNC    = False   # 上傳期間又有新變更 → 傳完再傳一次最新版
+_HIST_SYNC_LOCK = threading.Lock()
 
+@tracing.traced(cat="persist")
 def load_hist():
-    if not GH_TOKEN: return []
-    h = _gh_h()
+    """本地庫為主：以上次同步的 ETag 條件讀取 Gist，304 → 直接用本地；
+    Gist 被其他工作流程改過 → 取回（本地有未上傳變更時合併）；Gist 連不上 → 仍用本地。"""
+    local = history_store.load()
+    if not GH_TOKEN: return _purge(local)
     try:
-        r = requests.get("https://api.github.com/gists", headers=h, timeout=15)
-        r.raise_for_status(); gists = r.json()
+        snap = gist_client.read(GH_TOKEN, etag=history_store.meta_get("gist_etag") if local else None,
+                                desc=GIST_DESC)
     except Exception as e:
-        log.warning("load_hist: %s", e); return []
-    gid = _find_gid(gists)
-    if not gid: return []
-    try:
-        detail = requests.get("https://api.github.com/gists/"+gid, headers=h, timeout=15).json()
-        raw    = list(detail["files"].values())[0]["raw_url"]
-        records = requests.get(raw, timeout=15).json()
-        log.info("Hist loaded: %d records", len(records))
-        return _purge(records)
-    except Exception as e:
-        log.warning("load_hist parse: %s", e); return []
-
+        log.warning("load_hist: %s — using local store (%d records)", e, len(local))
+        return _purge(local)
+    if snap is None:
+        log.info("Hist loaded: %d records (local store, gist not modified)", len(local))
+        if history_store.dirty(): _schedule_hist_sync()   # 上次同步失敗 → 補傳
+        return _purge(local)
+    if not snap["id"]: return _purge(local)
+    remote  = snap["records"]
+    records = history_store.merge(local, remote) if local and history_store.dirty() else remote
+    history_store.write(records)
+    if records is remote: history_store.mark_synced(snap["etag"])
+    else: _schedule_hist_sync()   # 合併結果回寫 Gist
+    log.info("Hist loaded: %d records (gist %s)", len(records), (snap["version"] or "")[:7])
+    return _purge(records)
+
+@tracing.traced(cat="persist")
 def save_hist(records):
-    if not GH_TOKEN: return
-    records = _purge(records)
-    h = _gh_h()
-    body = json.dumps(records, ensure_ascii=False, indent=2)
-    try:
-        r = requests.get("https://api.github.com/gists", headers=h, timeout=15)
-        r.raise_for_status(); gists = r.json()
-    except Exception as e:
-        log.warning("save_hist: %s", e); return
-    gid = _find_gid(gists)
-    pl  = {"description":GIST_DESC,"public":False,"files":{"history.json":{"content":body}}}
+    """寫入本地庫（只動有變化的列）；有變更才在背景把快照（緊湊 JSON）同步到 Gist。"""
+    history_store.write(_purge(records))
+    if GH_TOKEN and history_store.dirty(): _schedule_hist_sync()
+
+def _schedule_hist_sync():
+    global _HIST_SYNC, _HIST_RESYNC
+    with _HIST_SYNC_LOCK:
+        if _HIST_SYNC is not None and _HIST_SYNC.is_alive():
+            _HIST_RESYNC = True; return
+        # 非 daemon：程式結束前一定會傳完
+        _HIST_SYNC = threading.Thread(target=_hist_sync_loop, name="gist-sync")
+        _HIST_SYNC.start()
+
+def _hist_sync_loop():
+    global _HIST_RESYNC
+    while True:
+        _upload_hist()
+        with _HIST_SYNC_LOCK:
+            if not _HIST_RESYNC: return
+            _HIST_RESYNC = False
+
+@tracing.traced(cat="persist")
+def _upload_hist():
+    """本地快照與 Gist 最新版合併後寫回（並行寫入由 gist_client 重新套用合併）；
+    合併進來的遠端紀錄（如手動補登）同時寫回本地庫。"""
+    gen   = history_store.generation()
+    local = history_store.load()
     for attempt in range(1, 4):
         try:
-            if gid:
-                requests.patch("https://api.github.com/gists/"+gid, headers=h, json=pl, timeout=10).raise_for_status()
-            else:
-                requests.post("https://api.github.com/gists", headers=h, json=pl, timeout=10).raise_for_status()
-            log.info("Hist saved (%d records)", len(records)); return
+            snap = gist_client.update(GH_TOKEN, lambda remote: _purge(history_store.merge(local, remote)),
+                                      desc=GIST_DESC)
+            history_store.adopt(snap["records"], snap["etag"], gen)
+            return
         except Exception as e:
             log.warning("save_hist %d/3: %s", attempt, e)
             if attempt < 3: time.sleep(2 ** attempt)  # 指數退避：2s, 4s
 
+def flush_hist(timeout=120):
+    """等待背景 Gist 同步完成（run() 結束前呼叫，讓 log 順序完整）。"""
+    t = _HIST_SYNC
+    if t is not None: t.join(timeout)
+
 
 # ══════════════════════════════════════════════
 # ★ 模型核心
@@ -2201,11 +2330,114 @@ def poisson_cdf(k_int, lam):
         term *= lam / (i + 1)
     return total
 
+# ── ★ Poisson 查表（λ 細格點 × 全部實際盤口；線性內插，超出範圍精確計算）──
+POIS_LAM_STEP = 0.01   # λ 格點間距（內插誤差 < 1e-5）
+POIS_LAM_MAX  = 30.0
+POIS_K_MAX    = 40
+_POIS_TABLE   = None   # (pmf, cdf)：shape (λ格點數, POIS_K_MAX+1)
+_POIS_CDF_ROWS = None  # 同一張 CDF 表的 list 版（純量查表，不經 NumPy）
+
+def poisson_table():
+    """建立（一次）並回傳 Poisson PMF/CDF 表；需 NumPy。"""
+    global _POIS_TABLE
+    if _POIS_TABLE is None:
+        import numpy as np
+        lam = np.arange(0.0, POIS_LAM_MAX + POIS_LAM_STEP / 2, POIS_LAM_STEP)
+        pmf = np.empty((lam.size, POIS_K_MAX + 1))
+        pmf[:, 0] = np.exp(-lam)
+        for k in range(1, POIS_K_MAX + 1):
+            pmf[:, k] = pmf[:, k - 1] * lam / k
+        _POIS_TABLE = (pmf, np.minimum(np.cumsum(pmf, axis=1), 1.0))
+    return _POIS_TABLE
+
+def _pois_lookup(tbl, exact_fn, k, lam):
+    import numpy as np
+    scalar = np.ndim(k) == 0 and np.ndim(lam) == 0
+    k, lam = np.broadcast_arrays(np.atleast_1d(np.asarray(k, dtype=np.int64)),
+                                 np.atleast_1d(np.asarray(lam, dtype=float)))
+    pos  = lam / POIS_LAM_STEP
+    i0   = np.clip(np.floor(pos).astype(np.int64), 0, tbl.shape[0] - 2)
+    frac = pos - i0
+    kc   = np.clip(k, 0, POIS_K_MAX)
+    out  = tbl[i0, kc] * (1 - frac) + tbl[i0 + 1, kc] * frac
+    miss = (lam < 0) | (lam > POIS_LAM_MAX) | (k > POIS_K_MAX)
+    for idx in zip(*np.nonzero(miss)):
+        out[idx] = exact_fn(int(k[idx]), float(lam[idx]))
+    out = np.where(k < 0, 0.0, out)
+    return float(out[0]) if scalar else out
+
+def _pois_exact_many(exact_fn, k, lam):
+    """無 NumPy 的退路：逐一精確計算；純量與序列可混用（純量重複套用），兩者皆純量時回傳純量。"""
+    k_seq, lam_seq = isinstance(k, (list, tuple)), isinstance(lam, (list, tuple))
+    if not (k_seq or lam_seq):
+        return exact_fn(int(k), float(lam)) if k >= 0 else 0.0
+    ks   = k   if k_seq   else [k] * len(lam)
+    lams = lam if lam_seq else [lam] * len(k)
+    return [exact_fn(int(ki), float(li)) if ki >= 0 else 0.0 for ki, li in zip(ks, lams)]
+
+def poisson_cdf_many(k, lam):
+    """向量化 P(Poisson(lam) ≤ k)：k、lam 可為純量或陣列（可廣播）；純量輸入回傳純量。
+    無 NumPy 時逐一精確計算（k、lam 為純量或 list / tuple）。"""
+    try:
+        return _pois_lookup(poisson_table()[1], poisson_cdf, k, lam)
+    except ImportError:
+        return _pois_exact_many(poisson_cdf, k, lam)
+
+def poisson_pmf_many(k, lam):
+    """向量化 P(Poisson(lam) = k)，介面同 poisson_cdf_many。"""
+    def _pmf(ki, li):
+        return math.exp(ki * math.log(li) - li - math.lgamma(ki + 1)) if li > 0 else float(ki == 0)
+    try:
+        return _pois_lookup(poisson_table()[0], _pmf, k, lam)
+    except ImportError:
+        return _pois_exact_many(_pmf, k, lam)
+
+def over_prob_many(exp_totals, lines):
+    """over_prob 的陣列版：整個賽程的 (期望合計, 盤口) 一次查表。"""
+    try:
+        import numpy as np
+        lam = np.maximum(0.1, np.asarray(exp_totals, dtype=float))
+        k   = np.floor(np.asarray(lines, dtype=float)).astype(np.int64)
+        return np.clip(1.0 - poisson_cdf_many(k, lam), 0.02, 0.98)
+    except ImportError:
+        return [max(0.02, min(0.98, 1.0 - poisson_cdf(int(l), max(0.1, e))))
+                for e, l in zip(exp_totals, lines)]
+
+def _pois_cdf_rows():
+    """CDF 表的巢狀 list（一次建立）：有 NumPy 時直接轉自 poisson_table()，否則以同一遞推純 Python 建表。"""
+    global _POIS_CDF_ROWS
+    if _POIS_CDF_ROWS is None:
+        try:
+            _POIS_CDF_ROWS = poisson_table()[1].tolist()
+        except ImportError:
+            rows = []
+            for i in range(int(round(POIS_LAM_MAX / POIS_LAM_STEP)) + 1):
+                lam = i * POIS_LAM_STEP
+                term = total = math.exp(-lam); row = [min(total, 1.0)]
+                for k in range(1, POIS_K_MAX + 1):
+                    term *= lam / k; total += term
+                    row.append(min(total, 1.0))
+                rows.append(row)
+            _POIS_CDF_ROWS = rows
+    return _POIS_CDF_ROWS
+
 def over_prob(exp_total, line):
     """P(合計得分 > line) — Poisson 模型（棒球得分正確分佈）。
-    8.5線 → P(X≥9) = 1 - P(X≤8)；9.0線 → P(X≥10) = 1 - P(X≤9)。"""
-    k = int(line)  # floor: P(X > line) = P(X >= k+1) = 1 - P(X <= k)
-    return max(0.02, min(0.98, 1.0 - poisson_cdf(k, max(0.1, exp_total))))
+    8.5線 → P(X≥9) = 1 - P(X≤8)；9.0線 → P(X≥10) = 1 - P(X≤9)。
+    純量路徑：直接查 CDF 表（純 Python，與 over_prob_many 同表同內插）；整個賽程請用 over_prob_many。"""
+    k   = math.floor(line)  # floor: P(X > line) = P(X >= k+1) = 1 - P(X <= k)
+    lam = max(0.1, exp_total)
+    if k < 0:
+        cdf = 0.0
+    elif lam > POIS_LAM_MAX or k > POIS_K_MAX:
+        cdf = poisson_cdf(k, lam)
+    else:
+        rows = _pois_cdf_rows()
+        pos  = lam / POIS_LAM_STEP
+        i0   = min(int(pos), len(rows) - 2)
+        frac = pos - i0
+        cdf  = rows[i0][k] * (1 - frac) + rows[i0 + 1][k] * frac
+    return max(0.02, min(0.98, 1.0 - cdf))
 
 def _era_sigma(key):
     """投手ERA估算的標準誤差（換算為每場期望得分的不確定性）。
@@ -2216,60 +2448,195 @@ def _era_sigma(key):
     elif avg_ip < 6.0: return 0.50   # 中等樣本（5.5-6.0局）
     else:              return 0.30   # 足夠樣本（≥6.0局）
 
+# ── ★ 精確機率引擎（Poisson / Skellam，無抽樣）────────────────
+
+_GH_CACHE = {}
+
+def _gauss_hermite(n):
+    """標準常態的 n 點高斯-厄米特求積（節點 z、權重 w，Σw=1）；Newton 法求根，純 Python。"""
+    if n in _GH_CACHE: return _GH_CACHE[n]
+    x = [0.0] * n; w = [0.0] * n
+    z = 0.0
+    for i in range((n + 1) // 2):
+        if i == 0:   z = math.sqrt(2*n + 1) - 1.85575 * (2*n + 1) ** -0.16667
+        elif i == 1: z -= 1.14 * n ** 0.426 / z
+        elif i == 2: z = 1.86 * z - 0.86 * x[0]
+        elif i == 3: z = 1.91 * z - 0.91 * x[1]
+        else:        z = 2.0 * z - x[i - 2]
+        for _ in range(50):
+            p1, p2 = math.pi ** -0.25, 0.0
+            for j in range(n):
+                p3, p2 = p2, p1
+                p1 = z * math.sqrt(2.0 / (j + 1)) * p2 - math.sqrt(j / (j + 1)) * p3
+            pp = math.sqrt(2.0 * n) * p2
+            z1, z = z, z - p1 / pp
+            if abs(z - z1) <= 3e-14: break
+        x[i], x[n - 1 - i] = z, -z
+        w[i] = w[n - 1 - i] = 2.0 / (pp * pp)
+    # 物理學家版本 → 標準常態：z = √2·x，w / √π
+    nodes = ([math.sqrt(2.0) * xi for xi in x], [wi / math.sqrt(math.pi) for wi in w])
+    _GH_CACHE[n] = nodes
+    return nodes
+
+def _poisson_pmf_list(lam, kmax=MC_POIS_KMAX):
+    """Poisson(lam) 在 k=0..kmax 的機率（遞推，純 Python）。"""
+    pmf = [math.exp(-lam)]
+    for k in range(1, kmax + 1):
+        pmf.append(pmf[-1] * lam / k)
+    return pmf
+
+def _runs_pmf(exp, sigma):
+    """單隊得分分佈：λ = clip(exp + σ·z, 1, 15)，z~N(0,1)；σ>0 時以求積混合 Poisson。"""
+    if sigma <= 0:
+        return _poisson_pmf_list(min(max(exp, 1.0), 15.0))
+    zs, ws = _gauss_hermite(EXACT_QUAD_N)
+    out = [0.0] * (MC_POIS_KMAX + 1)
+    for z, w in zip(zs, ws):
+        for k, p in enumerate(_poisson_pmf_list(min(max(exp + sigma * z, 1.0), 15.0))):
+            out[k] += w * p
+    return out
+
+@tracing.traced(cat="mc")
+def exact_game(h_exp, a_exp, h_sigma=0.0, a_sigma=0.0, market_total=None, rl_spreads=None):
+    """精確機率：主/客得分分佈（含投手不確定性求積）直接組合，得分差即 Skellam（混合）分佈、合計為 Poisson 卷積。
+    與 monte_carlo_game 同模型、同回傳 (home_win_prob, over_prob, mean_total, std_total, rl_probs)，但無抽樣雜訊；
+    平手以 0.5 計入主勝（等同 MC 擲硬幣的期望值）。"""
+    ph = _runs_pmf(h_exp, a_sigma)   # 客隊投手不確定性影響主隊得分
+    pa = _runs_pmf(a_exp, h_sigma)
+    diff, total = {}, {}
+    for i, pi in enumerate(ph):
+        if pi < 1e-15: continue
+        for j, pj in enumerate(pa):
+            p = pi * pj
+            diff[i - j]  = diff.get(i - j, 0.0) + p
+            total[i + j] = total.get(i + j, 0.0) + p
+    mass   = sum(total.values())
+    home_w = (sum(p for d, p in diff.items() if d > 0) + 0.5 * diff.get(0, 0.0)) / mass
+    mean   = sum(t * p for t, p in total.items()) / mass
+    var    = sum(t * t * p for t, p in total.items()) / mass - mean * mean
+    over_p = (sum(p for t, p in total.items() if t > market_total) / mass
+              if market_total is not None else None)
+    rl_probs = {sp: round(sum(p for d, p in diff.items() if d > sp) / mass, 4)
+                for sp in (rl_spreads or [])}
+    return home_w, over_p, mean, math.sqrt(max(var, 0.0)), rl_probs
+
+def _mc_seed(seed_key):
+    """由 MC_SEED + 本次執行日期 + 場次 key 推導固定種子；MC_SEED 為空或無 key → None（不固定）。"""
+    if not MC_SEED or seed_key is None: return None
+    raw = "%s|%s|%s" % (MC_SEED, _MC_RUN_KEY, seed_key)
+    return int.from_bytes(hashlib.sha256(raw.encode("utf-8")).digest()[:8], "big")
+
+def _poisson_icdf(lam, u):
+    """反函數法 Poisson 抽樣（向量化）：回傳最小 k 使 CDF(k; lam) ≥ u。λ 已截斷 ≤15，k 上限 MC_POIS_KMAX。"""
+    import numpy as np
+    term = np.exp(-lam); cdf = term.copy()
+    k = np.zeros(lam.shape, dtype=np.int64)
+    for i in range(1, MC_POIS_KMAX + 1):
+        k += u > cdf
+        term = term * lam / i
+        cdf = cdf + term
+    return k
+
+def _mc_uniform(rng, n, mode):
+    """驅動 Poisson 的均勻亂數：antithetic → (u, 1-u) 成對；stratified → 每層 [i/n,(i+1)/n) 各一點後打散。"""
+    import numpy as np
+    if mode == "stratified":
+        return rng.permutation((np.arange(n) + rng.random(n)) / n)
+    half = rng.random((n + 1) // 2)
+    return np.concatenate([half, 1.0 - half])[:n]
+
+def _mc_normal(rng, n, mode):
+    """投手不確定性的常態亂數；antithetic / stratified 皆以 (z, -z) 成對抵銷。"""
+    import numpy as np
+    half = rng.standard_normal((n + 1) // 2)
+    return np.concatenate([half, -half])[:n]
+
+@tracing.traced("mc_batch", "mc")
+def _mc_slate_np(h_exp, a_exp, h_sigma, a_sigma, market_totals, n_sims, rl_spreads, seed_keys=None):
+    """NumPy 批次模擬（無 NumPy 時 ImportError）：每批 (games × MC_CHUNK) 矩陣，累加計數避免大記憶體。
+    每場有自己的亂數流（MC_SEED 時由場次 key 固定），同場 ML/RL/TOT 共用同一組模擬（common random numbers）。"""
+    import numpy as np
+    n_games = len(h_exp)
+    seed_keys = seed_keys or [None] * n_games
+    _MC_COUNTS["calls"] += 1; _MC_COUNTS["games"] += n_games; _MC_COUNTS["sims"] += n_games * n_sims
+    rngs    = [np.random.default_rng(_mc_seed(k)) for k in seed_keys]
+    mode    = MC_VARIANCE
+    h_exp   = np.asarray(h_exp, dtype=float)[:, None]
+    a_exp   = np.asarray(a_exp, dtype=float)[:, None]
+    h_sigma = np.asarray(h_sigma, dtype=float)[:, None]
+    a_sigma = np.asarray(a_sigma, dtype=float)[:, None]
+    lines   = np.array([np.nan if m is None else float(m) for m in market_totals])[:, None]
+    spreads = list(rl_spreads or [])
+    wins = np.zeros(n_games); overs = np.zeros(n_games)
+    s1 = np.zeros(n_games); s2 = np.zeros(n_games)
+    rl_cnt = np.zeros((n_games, len(spreads)))
+    for start in range(0, n_sims, MC_CHUNK):
+        n = min(MC_CHUNK, n_sims - start)
+        if mode == "none":
+            h_z = np.stack([r.standard_normal(n) for r in rngs])
+            a_z = np.stack([r.standard_normal(n) for r in rngs])
+        else:
+            h_z = np.stack([_mc_normal(r, n, mode) for r in rngs])
+            a_z = np.stack([_mc_normal(r, n, mode) for r in rngs])
+        # 客隊投手不確定性影響主隊得分；主隊投手不確定性影響客隊得分
+        h_lam = np.clip(h_exp + h_z * a_sigma, 1.0, 15.0)
+        a_lam = np.clip(a_exp + a_z * h_sigma, 1.0, 15.0)
+        if mode == "none":
+            h_runs = np.stack([r.poisson(l) for r, l in zip(rngs, h_lam)])
+            a_runs = np.stack([r.poisson(l) for r, l in zip(rngs, a_lam)])
+            ties = h_runs == a_runs
+            coin = np.stack([r.random(n) for r in rngs]) < 0.5
+            wins += ((h_runs > a_runs) | (ties & coin)).sum(axis=1)
+        else:
+            h_runs = _poisson_icdf(h_lam, np.stack([_mc_uniform(r, n, mode) for r in rngs]))
+            a_runs = _poisson_icdf(a_lam, np.stack([_mc_uniform(r, n, mode) for r in rngs]))
+            # 平手以期望值 0.5 計入（取代擲硬幣，少一層抽樣變異）
+            wins += (h_runs > a_runs).sum(axis=1) + 0.5 * (h_runs == a_runs).sum(axis=1)
+        totals = h_runs + a_runs
+        diff = h_runs - a_runs  # 主客得分差，用於讓分MC計算
+        overs += (totals > lines).sum(axis=1)
+        s1 += totals.sum(axis=1); s2 += (totals.astype(float) ** 2).sum(axis=1)
+        for j, sp in enumerate(spreads):
+            rl_cnt[:, j] += (diff > sp).sum(axis=1)
+    mean = s1 / n_sims
+    std  = np.sqrt(np.maximum(s2 / n_sims - mean ** 2, 0.0))
+    out = []
+    for g in range(n_games):
+        over_p = float(overs[g] / n_sims) if market_totals[g] is not None else None
+        rl_probs = {sp: round(float(rl_cnt[g, j] / n_sims), 4) for j, sp in enumerate(spreads)}
+        out.append((float(wins[g] / n_sims), over_p, float(mean[g]), float(std[g]), rl_probs))
+    return out
+
+def monte_carlo_slate(h_exp, a_exp, h_sigma, a_sigma, market_totals=None,
+                      n_sims=MC_SLATE_SIMS, rl_spreads=None, seed_keys=None):
+    """整個賽程一次蒙地卡羅：參數為每場一個值的序列（market_totals 元素可為 None）。
+    seed_keys：每場的種子 key（見 _mc_seed），同 key 同日重跑結果相同。
+    回傳 list，每場一個 (home_win_prob, over_prob_mc, mean_total, std_total, rl_probs_dict)，與 monte_carlo_game 相同。"""
+    if market_totals is None: market_totals = [None] * len(h_exp)
+    try:
+        return _mc_slate_np(h_exp, a_exp, h_sigma, a_sigma, market_totals, n_sims, rl_spreads, seed_keys)
+    except ImportError:
+        return [monte_carlo_game(h, a, hs, as_, mt, n_sims=n_sims, rl_spreads=rl_spreads)
+                for h, a, hs, as_, mt in zip(h_exp, a_exp, h_sigma, a_sigma, market_totals)]
+
 def monte_carlo_game(h_exp, a_exp, h_sigma=0.0, a_sigma=0.0,
-                     market_total=None, n_sims=MC_SIMS, rl_spreads=None):
+                     market_total=None, n_sims=MC_SIMS, rl_spreads=None, seed_key=None):
     """蒙地卡羅模擬：Poisson泊松離散得分 + 投手ERA估算不確定性。
 
     h_sigma/a_sigma：主/客隊得分的不確定性（由對方投手樣本大小決定）。
     rl_spreads: list of spread values to compute P(h_runs - a_runs > spread).
+    seed_key: 場次 key，MC_SEED 啟用時固定亂數流（可重現）。
     Returns: (home_win_prob, over_prob_mc, mean_total, std_total, rl_probs_dict)
     """
     try:
-        import numpy as np
-        rng = np.random.default_rng()
-        # 客隊投手不確定性影響主隊得分；主隊投手不確定性影響客隊得分
-        h_lam = np.clip(h_exp + (rng.normal(0, a_sigma, n_sims) if a_sigma > 0 else 0.0), 1.0, 15.0)
-        a_lam = np.clip(a_exp + (rng.normal(0, h_sigma, n_sims) if h_sigma > 0 else 0.0), 1.0, 15.0)
-        h_runs = rng.poisson(h_lam)
-        a_runs = rng.poisson(a_lam)
-        ties = h_runs == a_runs
-        home_wins = (h_runs > a_runs) | (ties & (rng.random(n_sims) < 0.5))
-        totals = h_runs + a_runs
-        diff = h_runs - a_runs  # 主客得分差，用於讓分MC計算
-        over_p = float(np.mean(totals > market_total)) if market_total is not None else None
-        rl_probs = {}
-        if rl_spreads:
-            for sp in rl_spreads:
-                rl_probs[sp] = round(float(np.mean(diff > sp)), 4)
-        return float(np.mean(home_wins)), over_p, float(np.mean(totals)), float(np.std(totals)), rl_probs
+        return _mc_slate_np([h_exp], [a_exp], [h_sigma], [a_sigma], [market_total],
+                            n_sims, rl_spreads, [seed_key])[0]
     except ImportError:
-        # 純Python備援：Knuth泊松採樣
-        import random
-        wins = 0; total_sum = 0; over_cnt = 0
-        rl_cnts = {sp: 0 for sp in (rl_spreads or [])}
-        def _pois(lam):
-            lam = max(1.0, min(float(lam), 20.0))
-            L = math.exp(-lam); k = 0; p = 1.0
-            while p > L:
-                k += 1; p *= random.random()
-            return k - 1
-        for _ in range(n_sims):
-            h_n = random.gauss(0, a_sigma) if a_sigma > 0 else 0.0
-            a_n = random.gauss(0, h_sigma) if h_sigma > 0 else 0.0
-            h_r = _pois(max(1.0, h_exp + h_n))
-            a_r = _pois(max(1.0, a_exp + a_n))
-            if h_r > a_r or (h_r == a_r and random.random() < 0.5): wins += 1
-            tr = h_r + a_r; total_sum += tr
-            if market_total is not None and tr > market_total: over_cnt += 1
-            d = h_r - a_r
-            for sp in rl_cnts:
-                if d > sp: rl_cnts[sp] += 1
-        mean_t = total_sum / n_sims
-        over_p = over_cnt / n_sims if market_total is not None else None
-        rl_probs = {sp: round(cnt / n_sims, 4) for sp, cnt in rl_cnts.items()}
-        return wins / n_sims, over_p, mean_t, 0.0, rl_probs
-
-def predict(home, away, home_sp, away_sp, market_total=8.5, game_dt=None):
+        # 無 NumPy：改用純 Python 精確分佈（同模型、同欄位，std_total 為真實值，且每場僅約 1ms）
+        return exact_game(h_exp, a_exp, h_sigma, a_sigma, market_total, rl_spreads)
+
+def _predict_inputs(home, away, home_sp, away_sp, market_total=8.5, game_dt=None):
+    """predict 前半：各項修正後的主/客期望得分與 MC 不確定性；回傳中間值 dict 供 _predict_output 使用。"""
     hr = get_rating(home)
     ar = get_rating(away)
     games = hr.get("games", 0)
@@ -2360,8 +2727,9 @@ def predict(home, away, home_sp, away_sp, market_total=8.5, game_dt=None):
 
     # ⑧ ★ 天氣（Open-Meteo 免費API，無需KEY；室內球場自動跳過）
     _wf = 1.0
-    if game_dt:
-        _wf = fetch_weather(home, game_dt)
+    if game_dt and stage_open("weather"):   # ★ 超過預算時間片 → 係數 1.0
+        with http_client.deadline(stage_deadline("weather")):
+            _wf = fetch_weather(home, game_dt)
         h_exp     *= _wf; a_exp     *= _wf
         h_exp_tot *= _wf; a_exp_tot *= _wf
 
@@ -2409,14 +2777,31 @@ def predict(home, away, home_sp, away_sp, market_total=8.5, game_dt=None):
 
     dyn_std = STD + max(0, (10-games)/10) * 0.15
 
-    # ── ★ 蒙地卡羅模擬 ──────────────────────────────────────────
     # 客隊投手ERA不確定性 → 主隊得分標準差；主隊投手ERA不確定性 → 客隊得分標準差
     _h_sigma = _era_sigma(away_sp) if away_sp else 0.50
     _a_sigma = _era_sigma(home_sp) if home_sp else 0.50
-    mc_home_wp, mc_over_p, mc_mean_tot, mc_std_tot, mc_rl_probs = monte_carlo_game(
-        h_exp, a_exp, _h_sigma, _a_sigma, market_total,
-        rl_spreads=[1.5, -1.5, 2.5, -2.5]
-    )
+
+    return {
+        "home": home, "away": away, "home_sp": home_sp, "away_sp": away_sp,
+        "market_total": market_total, "hr": hr, "ar": ar,
+        "h_exp": h_exp, "a_exp": a_exp, "h_exp_tot": h_exp_tot, "a_exp_tot": a_exp_tot,
+        "margin": margin, "dyn_std": dyn_std, "h_sigma": _h_sigma, "a_sigma": _a_sigma,
+        "pf": pf, "wf": _wf, "ump_name": _ump_name, "ump_adj": _ump_adj,
+        "h_rs": h_rs, "a_rs": a_rs, "h_l10": h_l10, "a_l10": a_l10,
+    }
+
+def _predict_output(ctx, mc):
+    """predict 後半：混合 MC 結果（monte_carlo_game 5-tuple）與 norm_cdf，輸出預測 dict。"""
+    home, away, home_sp, away_sp = ctx["home"], ctx["away"], ctx["home_sp"], ctx["away_sp"]
+    market_total = ctx["market_total"]
+    hr, ar = ctx["hr"], ctx["ar"]
+    h_exp, a_exp, h_exp_tot, a_exp_tot = ctx["h_exp"], ctx["a_exp"], ctx["h_exp_tot"], ctx["a_exp_tot"]
+    margin, dyn_std = ctx["margin"], ctx["dyn_std"]
+    _h_sigma, _a_sigma = ctx["h_sigma"], ctx["a_sigma"]
+    pf, _wf, _ump_name, _ump_adj = ctx["pf"], ctx["wf"], ctx["ump_name"], ctx["ump_adj"]
+    h_rs, a_rs, h_l10, a_l10 = ctx["h_rs"], ctx["a_rs"], ctx["h_l10"], ctx["a_l10"]
+
+    mc_home_wp, mc_over_p, mc_mean_tot, mc_std_tot, mc_rl_probs = mc
     log.info("MC %s@%s: win=%.3f over=%.3f meanTot=%.2f std=%.2f (σh=%.2f σa=%.2f)",
              away, home, mc_home_wp, mc_over_p or 0, mc_mean_tot, mc_std_tot,
              _h_sigma, _a_sigma)
@@ -2464,6 +2849,116 @@ def predict(home, away, home_sp, away_sp, market_total=8.5, game_dt=None):
         "a_l10_wpct":     a_l10,                   # 客隊近10場勝率
     }
 
+def _mc_game_key(ctx):
+    """MC 種子用場次 key：對戰組合 + 先發（加賽兩場先發不同 → 不同亂數流）。"""
+    return "%s@%s|%s|%s" % (ctx["away"], ctx["home"], ctx["home_sp"], ctx["away_sp"])
+
+@tracing.traced(cat="predict")
+def predict(home, away, home_sp, away_sp, market_total=8.5, game_dt=None, engine=None):
+    """engine："mc"（蒙地卡羅）或 "exact"（Poisson 精確加總，無抽樣雜訊）；None → MC_ENGINE。"""
+    ctx = _predict_inputs(home, away, home_sp, away_sp, market_total, game_dt)
+    if (engine or MC_ENGINE) == "exact":
+        mc = exact_game(ctx["h_exp"], ctx["a_exp"], ctx["h_sigma"], ctx["a_sigma"],
+                        market_total, rl_spreads=MC_RL_SPREADS)
+    else:
+        mc = monte_carlo_game(ctx["h_exp"], ctx["a_exp"], ctx["h_sigma"], ctx["a_sigma"],
+                              market_total, rl_spreads=MC_RL_SPREADS, seed_key=_mc_game_key(ctx))
+    return _predict_output(ctx, mc)
+
+@tracing.traced(cat="predict")
+def predict_slate(specs, n_sims=MC_SLATE_SIMS, engine=None):
+    """整個賽程一次預測：specs = [(home, away, home_sp, away_sp, market_total, game_dt)]。
+    各場期望得分照常計算，MC 以 monte_carlo_slate 一次批次模擬（engine="exact" 改逐場精確計算）；
+    回傳與 specs 同序的預測 dict list。"""
+    ctxs = [_predict_inputs(*sp) for sp in specs]
+    if not ctxs: return []
+    if (engine or MC_ENGINE) == "exact":
+        return [_predict_output(c, exact_game(c["h_exp"], c["a_exp"], c["h_sigma"], c["a_sigma"],
+                                              c["market_total"], rl_spreads=MC_RL_SPREADS))
+                for c in ctxs]
+    mcs = monte_carlo_slate([c["h_exp"] for c in ctxs], [c["a_exp"] for c in ctxs],
+                            [c["h_sigma"] for c in ctxs], [c["a_sigma"] for c in ctxs],
+                            [c["market_total"] for c in ctxs], n_sims=n_sims,
+                            rl_spreads=MC_RL_SPREADS, seed_keys=[_mc_game_key(c) for c in ctxs])
+    return [_predict_output(c, mc) for c, mc in zip(ctxs, mcs)]
+
+def market_total_line(bms, default=8.5):
+    """大小分盤口：各書商 totals 報價中最後一個有效 point（賠率 ≤1.0 的報價略過）。"""
+    line = default
+    for bm in bms:
+        for mkt in bm.get("markets",[]):
+            if mkt.get("key") != "totals": continue
+            for o in mkt.get("outcomes",[]):
+                pt = o.get("point")
+                if o.get("price",0) <= 1.0 or pt is None: continue
+                try: line = float(pt)
+                except (ValueError, TypeError): pass
+    return line
+
+def collect_market_bids(bms, home, away):
+    """run() 的書商報價收集：逐書商、逐市場把有效報價 (price, 書商) 分組。
+    回傳 dict：h/a（獨贏）、rl_h/rl_a（讓分）、rl_h_neg/rl_h_pos/rl_a_neg/rl_a_pos（讓分方向分組）、
+    rl_h_25/rl_a_25（±2.5 替代讓分）、ov/un（大小分）、rl_h_pts/rl_h_pts_25（主隊讓分點數）。"""
+    rl_h_pts=rl_h_pts_25=None
+    _h_bids=[]; _a_bids=[]
+    _rl_h_bids=[]; _rl_a_bids=[]
+    _rl_h_bids_25=[]; _rl_a_bids_25=[]
+    _ov_bids=[]; _un_bids=[]
+    # 方向分組：依書商報價中主隊點數正負分開收集，用多數決防止跨方向混池
+    _rl_h_neg=[]; _rl_h_pos=[]  # home負(主隊讓分-1.5) / 正(主隊受讓+1.5)
+    _rl_a_neg=[]; _rl_a_pos=[]  # away負(客隊讓分-1.5) / 正(客隊受讓+1.5)
+    for bm in bms:
+        bk_name=bm.get("title","?")
+        for mkt in bm.get("markets",[]):
+            mk=mkt.get("key")
+            if mk=="h2h":
+                for o in mkt.get("outcomes",[]):
+                    t=norm_team(o.get("name","")); p=o.get("price",0)
+                    if p<=1.0: continue
+                    if t==home: _h_bids.append((p,bk_name))
+                    elif t==away: _a_bids.append((p,bk_name))
+            elif mk=="spreads":
+                for o in mkt.get("outcomes",[]):
+                    t=norm_team(o.get("name","")); p=o.get("price",0)
+                    pt=o.get("point")
+                    if p<=1.0: continue
+                    try: pt_f = float(pt) if pt is not None else None
+                    except (ValueError, TypeError): pt_f = None
+                    if t==home:
+                        _rl_h_bids.append((p,bk_name))
+                        if pt_f is not None:
+                            if pt_f < 0: _rl_h_neg.append((p,bk_name))
+                            else:        _rl_h_pos.append((p,bk_name))
+                        if rl_h_pts is None and pt_f is not None:
+                            rl_h_pts = pt_f
+                    elif t==away:
+                        _rl_a_bids.append((p,bk_name))
+                        if pt_f is not None:
+                            if pt_f < 0: _rl_a_neg.append((p,bk_name))
+                            else:        _rl_a_pos.append((p,bk_name))
+            elif mk=="alternate_spreads":
+                for o in mkt.get("outcomes",[]):
+                    t=norm_team(o.get("name","")); p=o.get("price",0)
+                    pt=o.get("point")
+                    if pt is None or p<=1.0: continue
+                    try: pt_f=float(pt)
+                    except (ValueError, TypeError): continue
+                    if abs(abs(pt_f)-2.5)>0.01: continue
+                    if t==home:
+                        _rl_h_bids_25.append((p,bk_name))
+                        if rl_h_pts_25 is None: rl_h_pts_25=pt_f
+                    elif t==away: _rl_a_bids_25.append((p,bk_name))
+            elif mk=="totals":
+                for o in mkt.get("outcomes",[]):
+                    pt=o.get("point"); p=o.get("price",0); nm=o.get("name","")
+                    if p<=1.0: continue
+                    if nm=="Over": _ov_bids.append((p,bk_name))
+                    elif nm=="Under": _un_bids.append((p,bk_name))
+    return {"h": _h_bids, "a": _a_bids, "rl_h": _rl_h_bids, "rl_a": _rl_a_bids,
+            "rl_h_25": _rl_h_bids_25, "rl_a_25": _rl_a_bids_25, "ov": _ov_bids, "un": _un_bids,
+            "rl_h_neg": _rl_h_neg, "rl_h_pos": _rl_h_pos, "rl_a_neg": _rl_a_neg, "rl_a_pos": _rl_a_pos,
+            "rl_h_pts": rl_h_pts, "rl_h_pts_25": rl_h_pts_25}
+
 def runline_prob(margin, spread, dyn_std):
     """P(主場隊蓋掉 -spread 讓分，即贏分差 > spread)"""
     return max(0.02, min(0.98, norm_cdf((margin - spread) / dyn_std)))
@@ -2522,6 +3017,7 @@ def calc_perf_by_type(hist):
         for bt, v in buckets.items()
     }
 
+@tracing.traced(cat="persist")
 def write_pages_json(picks, hist, now_tw, live_games=None):
     # 保留 live_update.py 寫入的 live_updated_ts，不讓 bot 預賽跑時蓋掉
     _prev_live_ts = 0
@@ -2658,6 +3154,8 @@ def write_pages_json(picks, hist, now_tw, live_games=None):
         "recent_history": recent_history,
         "live_games":      live_games or [],
         "live_updated_ts": _prev_live_ts or None,  # 由 live_update.py 維護，bot 不覆寫
+        "tripped_sources": circuit.tripped(),        # ★ 本次斷路跳過的來源（改用備援資料）
+        "skipped_stages":  sorted(_SKIPPED_STAGES),  # ★ 超過執行預算而跳過的選用階段（中性係數）
         # 供 live_update.py 使用（輕量場中更新不重跑 Odds API）
         "game_preds": {
             "%s|%s" % (h, a): {
@@ -2683,6 +3181,7 @@ def write_pages_json(picks, hist, now_tw, live_games=None):
 SUPABASE_URL      = os.getenv("SUPABASE_URL", "")
 SUPABASE_SVC_KEY  = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
 
+@tracing.traced(cat="persist")
 def _upload_to_supabase(payload: dict):
     if not SUPABASE_URL or not SUPABASE_SVC_KEY:
         log.info("Supabase not configured, skipping upload")
@@ -2695,7 +3194,7 @@ def _upload_to_supabase(payload: dict):
             "Content-Type": "application/json",
             "x-upsert": "true",
         }
-        r = requests.put(url, data=body, headers=headers, timeout=15)
+        r = http_client.put(url, data=body, headers=headers, timeout=15)
         if r.status_code in (200, 201):
             log.info("Supabase Storage upload OK")
         else:
@@ -2708,6 +3207,7 @@ def _upload_to_supabase(payload: dict):
 # Discord
 # ══════════════════════════════════════════════
 
+@tracing.traced(cat="persist")
 def send(content):
     if not DISCORD_WEBHOOK: print(content); return
     LIMIT = 1900
@@ -2719,28 +3219,176 @@ def send(content):
     total = len(chunks)
     for i, chunk in enumerate(chunks,1):
         label = "(%d/%d)\n%s"%(i,total,chunk) if total>1 else chunk
-        try: requests.post(DISCORD_WEBHOOK, json={"content":label}, timeout=10).raise_for_status()
+        try: http_client.post(DISCORD_WEBHOOK, json={"content":label}, timeout=10).raise_for_status()
         except Exception as e: log.error("Discord %d: %s", i, e)
 
 
+# ══════════════════════════════════════════════
+# ★ 並行抓取（依賴感知）
+# ══════════════════════════════════════════════
+
+FETCH_WORKERS = 8   # 賽前資料抓取最大並行數
+
+# ★ 整體執行預算：賠率 / 先發 / ERA 為必要階段（不設截止）；
+# 選用階段超過自己的時間片（佔預算比例）就跳過，改用中性係數，確保定價準時完成
+RUN_BUDGET_S = float(os.getenv("RUN_BUDGET_S", "900"))
+OPTIONAL_STAGE_SLICE = {
+    "umpires":        0.30,   # 裁判 → 跑分調整 0
+    "batting_splits": 0.30,   # 打擊 vs 左右投 → 聯盟平均 OPS
+    "lineup":         0.30,   # 打線順序 → 不調整
+    "sched_ctx":      0.30,   # 旅行 / 連戰 → 無疲勞
+    "bullpen_load":   0.30,   # 牛棚昨日用量 → 無疲勞
+    "weather":        0.60,   # 天氣（逐場於 predict 取得）→ 係數 1.0
+}
+_RUN_T0          = None    # run() 開始時間；None = 不套用預算（live_update 等外部呼叫）
+_SKIPPED_STAGES  = {}      # stage -> 原因（寫入 picks_latest.json skipped_stages）
+_SKIPPED_LOCK    = threading.Lock()
+
+def stage_deadline(name):
+    """選用階段的絕對截止時間；必要階段或未啟動預算時回傳 None。"""
+    frac = OPTIONAL_STAGE_SLICE.get(name)
+    if frac is None or _RUN_T0 is None: return None
+    return _RUN_T0 + RUN_BUDGET_S * frac
+
+def skip_stage(name, why):
+    with _SKIPPED_LOCK:
+        if name not in _SKIPPED_STAGES:
+            _SKIPPED_STAGES[name] = why
+            log.warning("Stage %s skipped (%s) — neutral factors", name, why)
+
+def stage_open(name):
+    """選用階段仍在時間片內？已超時 → 記錄跳過並回傳 False。"""
+    dl = stage_deadline(name)
+    if dl is not None and time.time() >= dl:
+        skip_stage(name, "budget")
+        return False
+    return True
+
+def _run_with_deadline(fn, dl, results, name=None):
+    t0 = time.time()
+    try:
+        with http_client.deadline(dl), tracing.span("fetch." + (name or "?"), "fetch"):
+            return fn(results)
+    finally:
+        if name: record_stage_time("fetch." + name, time.time() - t0)
+
+# ★ 執行指標：run() 各階段耗時、每主機 HTTP 次數 / 位元組 / 延遲直方圖、本地快取命中率、MC 模擬數
+# run() 結束時（含提早結束 / 拋錯）寫入 docs/run_metrics.json（與 picks_latest.json 一起提交 → 可沿整季追蹤執行成本、發現退化）
+RUN_METRICS_PATH = os.getenv("RUN_METRICS_PATH", "docs/run_metrics.json")
+_STAGE_TIMES     = {}      # stage -> 秒（主流程依序 + fetch.<來源> 各自的耗時，並行故加總會大於 fetch）
+_STAGE_LAP       = None    # 上一個主流程階段結束的時間
+_METRICS_LOCK    = threading.Lock()
+
+def record_stage_time(name, seconds):
+    with _METRICS_LOCK:
+        _STAGE_TIMES[name] = round(_STAGE_TIMES.get(name, 0.0) + seconds, 3)
+
+def stage_lap(name):
+    """主流程計時：把上一個 stage_lap（或 run() 開始）到現在的耗時記為 name。"""
+    global _STAGE_LAP
+    now = time.time()
+    if _STAGE_LAP is not None:
+        record_stage_time(name, now - _STAGE_LAP)
+        tracing.complete("stage." + name, "stage", _STAGE_LAP, now)
+    _STAGE_LAP = now
+
+def write_run_metrics(now_tw, n_picks):
+    """寫出本次執行指標 docs/run_metrics.json，並在 log 印一行摘要（Actions log 可直接比對）。"""
+    with _HTTP_CACHE_LOCK:
+        hc = dict(_HTTP_CACHE_STATS)
+    looked = hc["hit"] + hc["miss"]
+    http = http_client.metrics()
+    doc = {
+        "generated_at":    now_tw.strftime("%Y-%m-%d %H:%M"),
+        "run_seconds":     round(time.time() - _RUN_T0, 3) if _RUN_T0 else None,
+        "budget_seconds":  RUN_BUDGET_S,
+        "stages":          dict(_STAGE_TIMES),
+        "http":            http,
+        "http_totals": {
+            "requests": sum(h["requests"] for h in http.values()),
+            "errors":   sum(h["errors"] for h in http.values()),
+            "bytes":    sum(h["bytes"] for h in http.values()),
+        },
+        "http_cache":      dict(hc, hit_rate=round(hc["hit"] / looked, 3) if looked else None),
+        "mc":              dict(_MC_COUNTS),
+        "picks":           n_picks,
+        "skipped_stages":  sorted(_SKIPPED_STAGES),
+        "tripped_sources": circuit.tripped(),
+    }
+    os.makedirs(os.path.dirname(RUN_METRICS_PATH) or ".", exist_ok=True)
+    with open(RUN_METRICS_PATH, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    log.info("Metrics: %d HTTP (%.0fKB) · cache hit %s · MC %d sims · %s → %s",
+             doc["http_totals"]["requests"], doc["http_totals"]["bytes"] / 1024,
+             doc["http_cache"]["hit_rate"], _MC_COUNTS["sims"],
+             " ".join("%s=%.1fs" % kv for kv in _STAGE_TIMES.items() if not kv[0].startswith("fetch.")),
+             RUN_METRICS_PATH)
+
+def run_fetch_stage(tasks, max_workers=FETCH_WORKERS):
+    """依賴感知的並行抓取：tasks = {name: (fn, deps)}，fn 接收目前的結果 dict。
+    deps 全部完成後才提交該任務，其餘獨立來源同時進行；就緒時必要階段優先提交。
+    單一任務失敗只記錄警告（結果為 None），依賴它的任務照常執行（與原本逐一 try/except 語意一致）。
+    選用階段（OPTIONAL_STAGE_SLICE）的 HTTP 受截止時間限制；超時則放棄：結果為 None 並記錄跳過，
+    執行緒池不等它結束（shutdown(wait=False)）。被放棄的任務仍在背景跑完（HTTP 已過截止而快速失敗），
+    其回傳值不再被讀取 — 因此選用階段只能回傳結果，不可自行寫入全域（由呼叫端寫入）。
+    回傳 {name: result}。"""
+    results, pending, running = {}, dict(tasks), {}
+    t0 = time.time()
+    ex = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while pending or running:
+            ready = [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]
+            for name in sorted(ready, key=lambda n: n in OPTIONAL_STAGE_SLICE):
+                fn, _ = pending.pop(name)
+                if not stage_open(name):
+                    results[name] = None; continue
+                running[ex.submit(_run_with_deadline, fn, stage_deadline(name), results, name)] = name
+            if not running:
+                if pending: raise ValueError("run_fetch_stage: unresolved deps %s" % sorted(pending))
+                break
+            dls = [stage_deadline(n) for n in running.values()]
+            dls = [d for d in dls if d is not None]
+            tmo = max(0.0, min(dls) - time.time()) if dls else None
+            done, _ = wait(running, timeout=tmo, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception as e:
+                    log.warning("Fetch %s failed: %s", name, e)
+                    results[name] = None
+            # 超過時間片仍未完成的選用階段：放棄（結果丟棄；未開始的直接取消）
+            for fut, name in list(running.items()):
+                if not stage_open(name):
+                    running.pop(fut).cancel()
+                    results[name] = None
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    log.info("Fetch stage: %d sources in %.1fs", len(tasks), time.time() - t0)
+    return results
+
+
 # ══════════════════════════════════════════════
 # 主流程
 # ══════════════════════════════════════════════
 
-def run():
-    now_tw    = datetime.datetime.utcnow() + datetime.timedelta(hours=8)
+def _run(now_tw):
+    """run() 的主體；回傳推薦數（提早結束回傳 0）。"""
+    global _MC_RUN_KEY
     today_str = now_tw.strftime("%Y-%m-%d")
+    _MC_RUN_KEY = today_str   # 同日重跑 → MC 結果可重現、可比對
     log.info("TW time: %s", now_tw.strftime("%Y-%m-%d %H:%M"))
     # 官方記錄時段：TW 22:00–隔日08:00（提早至22:00以捕捉當晚早觸發的盤口）
     tw_mins  = now_tw.hour * 60 + now_tw.minute
     official = (tw_mins >= 22 * 60) or (tw_mins < 8 * 60)
     log.info("official=%s (TW %02d:%02d)", official, now_tw.hour, now_tw.minute)
 
-    if not ODDS_API_KEY: log.error("ODDS_API_KEY not set"); return
+    if not ODDS_API_KEY: log.error("ODDS_API_KEY not set"); return 0
 
     hist      = load_hist()
-    settled_n = settle_hist(hist)       # 結算昨天以前的未結算紀錄
-    if settled_n > 0: save_hist(hist)   # 有更新就立即存回 Gist
+    settled_n = settle_hist(hist)       # 結算昨天以前的未結算紀錄（只寫回被結算的列，背景同步 Gist）
+    stage_lap("history")
 
     # ★ Series suppression: build set of (home, away, bet_team, bet_type) that lost within 3 days
     # MLB series are typically 3-4 games; re-betting same direction in same series consistently loses
@@ -2774,72 +3422,91 @@ def run():
         log.info("Slump detected (last %d: WR<%.0f%%), Kelly x%.2f",
                  SLUMP_WINDOW, SLUMP_WR_THRESH * 100, _slump_mult)
 
-    espn_ok   = fetch_espn_ratings()
-    il_src    = fetch_injury_list()
-    try: fetch_roto_probable_pitchers()
-    except Exception as e: log.warning("RotoWire SP failed: %s", e)
-    pitchers, _dh_pitchers = fetch_probable_pitchers()
-    if pitchers or _dh_pitchers:
+    # ── ★ 賽前資料並行抓取：獨立來源同時進行，只在有依賴處等待 ──
+    def _era_stage(r):
+        pitchers, _dh_pitchers = r["pitchers"] or ({}, {})
+        if not (pitchers or _dh_pitchers): return
         # 加賽時兩場有不同投手；合併全部投手資料送入ERA快取（加賽第一場用合成key）
         _era_pitchers = dict(pitchers)
         for (_h, _a), _entries in _dh_pitchers.items():
             for _i, (_ct, _info) in enumerate(_entries[:-1]):  # 末場已在 pitchers 裡，只補前場
                 _era_pitchers[(_h + "__dh%d" % (_i + 1), _a)] = _info
-        try: build_recent_era_cache(_era_pitchers)
-        except Exception as e: log.warning("Recent ERA failed: %s", e)
-    # ★ 即時賽季 ERA（bulk API，74+投手）
-    try: fetch_live_sp_era()
-    except Exception as e: log.warning("Live SP ERA fetch failed: %s", e)
-    # ★ 賽季ERA補抓：針對今日先發中 bulk API 遺漏的投手，逐一用ID直接抓
-    if _RECENT_ERA:
+        build_recent_era_cache(_era_pitchers)
+
+    def _era_topup_stage(r):
+        # ★ 今日先發依 ID 對回 bulk 賽季 ERA（同姓投手不會互相覆蓋）
+        for k, pid in _PITCHER_ID_MAP.items():
+            if pid in _LIVE_SP_ERA_ID: _LIVE_SP_ERA[k] = _LIVE_SP_ERA_ID[pid]
+        # ★ 賽季ERA補抓：針對今日先發中 bulk API 遺漏的投手，逐一用ID直接抓
+        if not _RECENT_ERA: return
         missing = [k for k in _RECENT_ERA if not (_LIVE_SP_ERA.get(k) or PITCHER_ERA.get(k))]
-        if missing:
-            log.info("SeasonERA topup: %d pitchers not in bulk — fetching individually", len(missing))
-            filled = 0
-            for k in missing:
-                pid = _PITCHER_ID_MAP.get(k)
-                if not pid: continue
-                era = _fetch_pitcher_season_era(pid)
-                if era is not None:
-                    _LIVE_SP_ERA[k] = era
-                    filled += 1
-                    log.info("SeasonERA filled: %s=%.2f (id=%s)", k, era, pid)
-            still = [k for k in missing if not _LIVE_SP_ERA.get(k)]
-            if still:
-                log.warning("SeasonERA still missing (new/no-IP pitcher, fallback LEAGUE_ERA): %s", ", ".join(still))
-            else:
-                log.info("SeasonERA topup complete: all %d filled", len(missing))
-    # ★ 動態牛棚ERA（即時更新 bullpen_adj）
-    try: fetch_bullpen_era_live()
-    except Exception as e: log.warning("Live Bullpen ERA fetch failed: %s", e)
-    # ★ 動態球隊打擊OBP（即時更新 predict 打擊得分）
-    try: fetch_team_batting_stats()
-    except Exception as e: log.warning("Team OBP fetch failed: %s", e)
-    # ★ 球隊打擊 vs 左/右投手 OPS
-    try: fetch_team_batting_splits()
-    except Exception as e: log.warning("Team L/R batting failed: %s", e)
-    # ★ 旅行疲勞/連戰分析
-    try:
+        if not missing: return
+        log.info("SeasonERA topup: %d pitchers not in bulk — fetching individually", len(missing))
+        filled = 0
+        for k in missing:
+            pid = _PITCHER_ID_MAP.get(k)
+            if not pid: continue
+            era = _fetch_pitcher_season_era(pid)
+            if era is not None:
+                _LIVE_SP_ERA[k] = era
+                filled += 1
+                log.info("SeasonERA filled: %s=%.2f (id=%s)", k, era, pid)
+        still = [k for k in missing if not _LIVE_SP_ERA.get(k)]
+        if still:
+            log.warning("SeasonERA still missing (new/no-IP pitcher, fallback LEAGUE_ERA): %s", ", ".join(still))
+        else:
+            log.info("SeasonERA topup complete: all %d filled", len(missing))
+
+    def _sched_ctx_stage(r):
+        # ★ 旅行疲勞/連戰分析（需今日對戰組合）
+        pitchers = (r["pitchers"] or ({}, {}))[0]
         _teams_today = set()
         for (hk, ak) in pitchers.keys():
             _teams_today.add(hk); _teams_today.add(ak)
-        fetch_schedule_context(today_str, _teams_today)
-    except Exception as e: log.warning("Schedule context failed: %s", e)
-    # ★ 主審裁判（今日比賽分配）
-    try: fetch_game_umpires(today_str)
-    except Exception as e: log.warning("Umpire fetch failed: %s", e)
-    # ★ 牛棚昨日使用量（疲勞度）
-    try: fetch_bullpen_load()
-    except Exception as e: log.warning("Bullpen load fetch failed: %s", e)
-    # ★ 近10場勝率（MLB schedule isWinner，比ESPN更可靠）
-    try: fetch_team_l10()
-    except Exception as e: log.warning("Team L10 fetch failed: %s", e)
-    # ★ 打線順序（Pre-Game後才有，用於網頁顯示和打線品質評分）
-    try: fetch_lineup()
-    except Exception as e: log.warning("Lineup fetch failed: %s", e)
-
-    odds_data = fetch_odds()
-    if not odds_data: log.error("No odds data"); return
+        return fetch_schedule_context(today_str, _teams_today)
+
+    fetched = run_fetch_stage({
+        "espn":           (lambda r: fetch_espn_ratings(),           ()),
+        "injuries":       (lambda r: fetch_injury_list(),            ()),
+        "roto_sp":        (lambda r: fetch_roto_probable_pitchers(), ()),
+        # RotoWire 覆蓋 MLB probable → 需等 RotoWire 完成
+        "pitchers":       (lambda r: fetch_probable_pitchers(),      ("roto_sp",)),
+        # ★ 本季 gameLog 本地庫增量同步（ERA/FIP 等在本地計算）
+        "pitch_log":      (lambda r: sync_pitch_log(),               ()),
+        # ERA 快取需球員登錄先由 live_era 的 bulk 資料更新（只有名字的先發才查得到 ID）
+        "era":            (_era_stage,                               ("pitchers", "pitch_log", "live_era")),
+        # ★ 即時賽季 ERA（bulk API，74+投手）
+        "live_era":       (lambda r: fetch_live_sp_era(),            ()),
+        "era_topup":      (_era_topup_stage,                         ("era", "live_era")),
+        # ★ 動態牛棚ERA / 球隊OBP / 打擊 vs 左右投 OPS
+        "bullpen_era":    (lambda r: fetch_bullpen_era_live(),       ()),
+        "obp":            (lambda r: fetch_team_batting_stats(),     ()),
+        "batting_splits": (lambda r: fetch_team_batting_splits(),    ()),
+        "sched_ctx":      (_sched_ctx_stage,                         ("pitchers",)),
+        # ★ 主審裁判 / 牛棚昨日使用量 / 近10場勝率 / 打線順序
+        "umpires":        (lambda r: fetch_game_umpires(today_str),  ()),
+        "bullpen_load":   (lambda r: fetch_bullpen_load(),           ()),
+        "l10":            (lambda r: fetch_team_l10(),               ()),
+        "lineup":         (lambda r: fetch_lineup(),                 ()),
+        "odds":           (lambda r: fetch_odds(),                   ()),
+    })
+    # ★ 選用階段只回傳結果，在這裡（主執行緒）寫入全域；逾時被放棄的階段結果為 None，
+    #   背景執行緒之後才完成也不會再改動模型輸入
+    if fetched["umpires"]:      _GAME_UMP.update(fetched["umpires"])
+    if fetched["bullpen_load"]: _BULLPEN_LOAD.update(fetched["bullpen_load"])
+    if fetched["lineup"]:       _TEAM_LINEUP.update(fetched["lineup"])
+    if fetched["sched_ctx"]:    _TRAVEL_CONTEXT.update(fetched["sched_ctx"])
+    if fetched["batting_splits"]:
+        _TEAM_VS_LHP_OPS.update(fetched["batting_splits"][0])
+        _TEAM_VS_RHP_OPS.update(fetched["batting_splits"][1])
+    espn_ok = bool(fetched["espn"])
+    il_src  = fetched["injuries"] or "static"
+    players.save()   # 本次抓取新增的球員 / 慣用手 / 轉隊寫回本地登錄
+    stage_lap("fetch")
+    pitchers, _dh_pitchers = fetched["pitchers"] or ({}, {})
+
+    odds_data = fetched["odds"]
+    if not odds_data: log.error("No odds data"); return 0
 
     # ★ 加賽偵測：同一組球隊在同一天出現兩場比賽 → 雙頭賽（加賽）
     _dh_count = {}  # (date, home_key, away_key) -> count
@@ -2868,8 +3535,9 @@ def run():
     prev_snap = load_odds_snapshot()
     new_snap  = {}
 
-    for game in odds_data:
-        if game.get("sport_key") != "baseball_mlb": continue
+    def _game_header(game):
+        """開賽時間（台灣時間）、主客隊與對應先發投手；非 MLB 或未知球隊回傳 None。"""
+        if game.get("sport_key") != "baseball_mlb": return None
         commence = game.get("commence_time","")
         try:
             game_utc      = datetime.datetime.fromisoformat(commence.replace("Z","+00:00"))
@@ -2880,12 +3548,9 @@ def run():
         except Exception:
             game_date_str = today_str; game_time_str = commence[:16]; game_dt = None
 
-        # 已開賽的比賽仍繼續解析並建立預測（供場中分析使用），但不生成賽前注單
-        game_started = bool(game_dt and game_dt < now_tw - datetime.timedelta(minutes=10))
-
         home = norm_team(game.get("home_team",""))
         away = norm_team(game.get("away_team",""))
-        if home not in BASE or away not in BASE: continue
+        if home not in BASE or away not in BASE: return None
 
         # 加賽標籤：同一對球隊同一天有兩場比賽 → 加賽（補賽）
         is_doubleheader = (game_date_str, home, away) in _dh_pairs
@@ -2903,6 +3568,39 @@ def run():
                 sp_info = _dh_entries[0][1] if _dh_entries else {}
         else:
             sp_info = pitchers.get((home, away), {})
+        return game_date_str, game_time_str, game_dt, home, away, is_doubleheader, sp_info
+
+    # ★ 整個賽程先批次預測（MC 一次向量化模擬），主循環直接取用
+    _slate_games = []
+    for game in odds_data:
+        hdr = _game_header(game)
+        if hdr is None or not game.get("bookmakers"): continue
+        _slate_games.append((id(game), (hdr[3], hdr[4], hdr[6].get("home_pitcher"), hdr[6].get("away_pitcher"),
+                                        market_total_line(game["bookmakers"]), hdr[2])))
+    _slate_preds = {}
+    try:
+        _slate_preds = dict(zip([gid for gid, _ in _slate_games],
+                                predict_slate([spec for _, spec in _slate_games])))
+    except Exception as e:
+        log.warning("Slate predict failed, falling back to per-game: %s", e)
+    # ★ 大小分 Poisson 概率：整個賽程的 (混合期望合計, 盤口) 一次查表
+    #   30% model（pure_total_tot，RS權重極低）+ 70% market，與主循環的 _tot_blend 相同
+    _slate_over = {}
+    _ov_games = [(gid, spec[4]) for gid, spec in _slate_games if gid in _slate_preds]
+    if _ov_games:
+        _slate_over = dict(zip([gid for gid, _ in _ov_games], over_prob_many(
+            [_slate_preds[gid]["pure_total_tot"] * 0.30 + mt * 0.70 for gid, mt in _ov_games],
+            [mt for _, mt in _ov_games])))
+    stage_lap("predict_slate")
+
+    for game in odds_data:
+        hdr = _game_header(game)
+        if hdr is None: continue
+        game_date_str, game_time_str, game_dt, home, away, is_doubleheader, sp_info = hdr
+
+        # 已開賽的比賽仍繼續解析並建立預測（供場中分析使用），但不生成賽前注單
+        game_started = bool(game_dt and game_dt < now_tw - datetime.timedelta(minutes=10))
+
         home_sp  = sp_info.get("home_pitcher")
         away_sp  = sp_info.get("away_pitcher")
         _sp_src       = sp_info.get("_src","probable") if sp_info else "probable"
@@ -2911,65 +3609,16 @@ def run():
         if not bms: continue
 
         # ── 收集所有市場報價（兩段式：先收全部，再篩離群取最佳）──
-        market_total=8.5
-        rl_h_pts=rl_h_pts_25=None
-        _h_bids=[]; _a_bids=[]
-        _rl_h_bids=[]; _rl_a_bids=[]
-        _rl_h_bids_25=[]; _rl_a_bids_25=[]
-        _ov_bids=[]; _un_bids=[]
+        market_total=market_total_line(bms)
+        _mb = collect_market_bids(bms, home, away)
+        rl_h_pts, rl_h_pts_25 = _mb["rl_h_pts"], _mb["rl_h_pts_25"]
+        _h_bids, _a_bids         = _mb["h"], _mb["a"]
+        _rl_h_bids, _rl_a_bids   = _mb["rl_h"], _mb["rl_a"]
+        _rl_h_bids_25, _rl_a_bids_25 = _mb["rl_h_25"], _mb["rl_a_25"]
+        _ov_bids, _un_bids       = _mb["ov"], _mb["un"]
         # 方向分組：依書商報價中主隊點數正負分開收集，用多數決防止跨方向混池
-        _rl_h_neg=[]; _rl_h_pos=[]  # home負(主隊讓分-1.5) / 正(主隊受讓+1.5)
-        _rl_a_neg=[]; _rl_a_pos=[]  # away負(客隊讓分-1.5) / 正(客隊受讓+1.5)
-        for bm in bms:
-            bk_name=bm.get("title","?")
-            for mkt in bm.get("markets",[]):
-                mk=mkt.get("key")
-                if mk=="h2h":
-                    for o in mkt.get("outcomes",[]):
-                        t=norm_team(o.get("name","")); p=o.get("price",0)
-                        if p<=1.0: continue
-                        if t==home: _h_bids.append((p,bk_name))
-                        elif t==away: _a_bids.append((p,bk_name))
-                elif mk=="spreads":
-                    for o in mkt.get("outcomes",[]):
-                        t=norm_team(o.get("name","")); p=o.get("price",0)
-                        pt=o.get("point")
-                        if p<=1.0: continue
-                        try: pt_f = float(pt) if pt is not None else None
-                        except (ValueError, TypeError): pt_f = None
-                        if t==home:
-                            _rl_h_bids.append((p,bk_name))
-                            if pt_f is not None:
-                                if pt_f < 0: _rl_h_neg.append((p,bk_name))
-                                else:        _rl_h_pos.append((p,bk_name))
-                            if rl_h_pts is None and pt_f is not None:
-                                rl_h_pts = pt_f
-                        elif t==away:
-                            _rl_a_bids.append((p,bk_name))
-                            if pt_f is not None:
-                                if pt_f < 0: _rl_a_neg.append((p,bk_name))
-                                else:        _rl_a_pos.append((p,bk_name))
-                elif mk=="alternate_spreads":
-                    for o in mkt.get("outcomes",[]):
-                        t=norm_team(o.get("name","")); p=o.get("price",0)
-                        pt=o.get("point")
-                        if pt is None or p<=1.0: continue
-                        try: pt_f=float(pt)
-                        except (ValueError, TypeError): continue
-                        if abs(abs(pt_f)-2.5)>0.01: continue
-                        if t==home:
-                            _rl_h_bids_25.append((p,bk_name))
-                            if rl_h_pts_25 is None: rl_h_pts_25=pt_f
-                        elif t==away: _rl_a_bids_25.append((p,bk_name))
-                elif mk=="totals":
-                    for o in mkt.get("outcomes",[]):
-                        pt=o.get("point"); p=o.get("price",0); nm=o.get("name","")
-                        if p<=1.0: continue
-                        if pt is not None:
-                            try: market_total=float(pt)
-                            except (ValueError, TypeError): pass
-                        if nm=="Over": _ov_bids.append((p,bk_name))
-                        elif nm=="Under": _un_bids.append((p,bk_name))
+        _rl_h_neg, _rl_h_pos = _mb["rl_h_neg"], _mb["rl_h_pos"]  # home負(主隊讓分-1.5) / 正(主隊受讓+1.5)
+        _rl_a_neg, _rl_a_pos = _mb["rl_a_neg"], _mb["rl_a_pos"]  # away負(客隊讓分-1.5) / 正(客隊受讓+1.5)
 
         def _con_avg(bids): return round(sum(p for p,_ in bids)/len(bids),3) if bids else None
         def _best_valid(bids, con):
@@ -3024,7 +3673,8 @@ def run():
         con_ov_p   = round(sum(con_over)/len(con_over),3) if con_over else over_price
         con_un_p   = round(sum(con_under)/len(con_under),3) if con_under else under_price
 
-        pred    = predict(home,away,home_sp,away_sp,market_total=market_total,game_dt=game_dt)
+        pred    = (_slate_preds.get(id(game))
+                   or predict(home,away,home_sp,away_sp,market_total=market_total,game_dt=game_dt))
         _ALL_GAME_PREDS[(home, away)] = {
             "home_win_prob": pred.get("home_win_prob", 0.5),
             "market_total":  market_total,
@@ -3095,7 +3745,10 @@ def run():
         # 使用 pure_total_tot（RS權重極低），防止高RS誤拉高Over概率
         # 30% model + 70% market（與model_total顯示權重一致，更貼近市場現實）
         _tot_blend = pred["pure_total_tot"] * 0.30 + market_total * 0.70
-        _poisson_over = over_prob(_tot_blend, market_total)
+        _poisson_over = _slate_over.get(id(game))
+        if _poisson_over is None:   # 批次預測失敗、逐場預測的場次
+            _poisson_over = over_prob(_tot_blend, market_total)
+        _poisson_over = float(_poisson_over)
         _mc_ov = pred.get("mc_over_p")
         # MC over概率：同時考慮Poisson離散和ERA不確定性，比點估計更準
         p_over  = (_poisson_over * 0.50 + _mc_ov * 0.50) if _mc_ov is not None else _poisson_over
@@ -3677,6 +4330,7 @@ def run():
         else:
             picks.append(_pick)
 
+    stage_lap("game_loop")
     # 當天比賽優先，同日純按 CLV（score）降序排列，讓輸出穩定
     picks.sort(key=lambda x:(0 if x["game_date"]==today_str else 1,
                               -x.get("score", x.get("edge",0)),
@@ -3808,6 +4462,9 @@ def run():
     wx_str   = "✅天氣" if _WEATHER_CACHE else "⚠️天氣"
     lr_str   = "✅L/R打擊" if (_TEAM_VS_LHP_OPS or _TEAM_VS_RHP_OPS) else "⚠️L/R"
     trav_str = "✅旅行" if _TRAVEL_CONTEXT else "⚠️旅行"
+    _tripped = circuit.tripped()
+    cb_str   = (" ⛔斷路:%s" % ",".join(_tripped)) if _tripped else ""
+    if _SKIPPED_STAGES: cb_str += " ⏱跳過:%s" % ",".join(sorted(_SKIPPED_STAGES))
 
     # ★ 分類型歷史統計（勝率 + ROI，用於頁尾顯示）
     _type_stats = []
@@ -3826,7 +4483,7 @@ def run():
 
     lines=[
         "⚾ **MLB V2 分析報告**",
-        "🕐 %s | %s %s %s %s %s %s %s %s"%(now_str,espn_str,il_str,sp_str,era_str,ump_str,wx_str,lr_str,trav_str),
+        "🕐 %s | %s %s %s %s %s %s %s %s%s"%(now_str,espn_str,il_str,sp_str,era_str,ump_str,wx_str,lr_str,trav_str,cb_str),
         "📌 正式記錄（TW %02d:%02d）" % (now_tw.hour, now_tw.minute) if official else "🔕 非記錄時段（TW %02d:%02d，不寫入 Gist）" % (now_tw.hour, now_tw.minute),
         "📊 歷史: %d勝/%d場 (%.1f%%)%s"%(wins,total_settled,wr,
             "  [%s]"%_type_stats_str if _type_stats_str else ""),
@@ -4067,6 +4724,7 @@ def run():
 
     # MLB schedule API 使用美東時間日期（ET = UTC-4）
     # TW 比 ET 快 12 小時，TW 凌晨 00:00-11:59 對應前一天 ET 日期
+    stage_lap("sizing_report")
     _et_now      = datetime.datetime.utcnow() - datetime.timedelta(hours=4)
     _et_date_str = _et_now.strftime("%Y-%m-%d")
     log.info("Fetching live games for ET date: %s", _et_date_str)
@@ -4085,11 +4743,36 @@ def run():
         lines += ["", "📡 場中分析: 目前沒有場中推薦"]
 
     out="\n".join(lines)
+    stage_lap("live")
     write_pages_json(picks, hist, now_tw, live_games=_live_picks)
     save_odds_snapshot(new_snap)
     if official and today_records: save_hist(hist+today_records)
+    stage_lap("persist")
     log.info("Sending %d chars",len(out))
     send(out)
+    stage_lap("send")
+    flush_hist()
+    stage_lap("gist_sync")
+    return len(picks)
+
+
+def run():
+    """主流程。run_metrics.json 在 finally 寫出：提早結束（無賠率等）或中途拋錯也留下一筆指標。"""
+    global _RUN_T0, _STAGE_LAP
+    _RUN_T0    = time.time()    # ★ 執行預算起算
+    _STAGE_LAP = _RUN_T0        # ★ 階段計時起點
+    now_tw     = datetime.datetime.utcnow() + datetime.timedelta(hours=8)
+    n_picks    = None           # 中途拋錯 → picks 記為 null
+    try:
+        n_picks = _run(now_tw)
+    finally:
+        http_client.log_summary(log)
+        try:
+            write_run_metrics(now_tw, n_picks)
+        except Exception as e:   # 不蓋掉主流程的例外
+            log.warning("run metrics not written: %s", e)
+        log.info("Run %.0fs / budget %.0fs%s", time.time() - _RUN_T0, RUN_BUDGET_S,
+                 (" — skipped: %s" % ",".join(sorted(_SKIPPED_STAGES))) if _SKIPPED_STAGES else "")
     log.info("Done")
 
 
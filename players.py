@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+球員身分表 — 以 MLB player id 為主鍵的本地登錄（投手為主），跨執行保存。
+
+  PLAYERS_PATH   登錄檔路徑（預設 .cache/players.json，CI 與 HTTP 快取一起以 actions/cache 保留）
+
+每筆：id -> {"name": 全名, "key": 姓氏 key（模型各表用）, "hand": "L"/"R", "team": teams ID}。
+來源：本季投手 bulk stats（fetch_live_sp_era 每次執行都會抓，增量合併新球員 / 轉隊）、
+probablePitcher（含慣用手）、game feed 確認的先發。
+全名另建索引（去重音、去 Jr.、只留小寫英數）：RotoWire / ESPN 只給名字的先發直接查得到 ID，
+不再呼叫 people/search，也不會因只比姓氏而抓到同姓的另一位投手。
+錄製 / 重播模式（http_replay）下從空登錄開始且不寫檔，確保請求序列一致。
+"""
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+import http_replay
+import teams
+
+log = logging.getLogger("players")
+
+PLAYERS_PATH = os.getenv("PLAYERS_PATH", ".cache/players.json")
+
+_SUFFIX = ("jr.", "jr", "sr.", "sr", "ii", "iii", "iv")
+
+_lock    = threading.RLock()
+_store   = None    # {"updated", "players": {str(id): {...}}}
+_by_name = {}      # norm_name(全名) -> [id, ...]
+_dirty   = False
+
+
+def _ascii(name):
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+
+
+def name_key(full_name):
+    """姓氏 key："Rodríguez" → "rodriguez"，"Vladimir Guerrero Jr." → "guerrero"。"""
+    if not full_name: return None
+    ascii_name = _ascii(full_name)
+    parts = ascii_name.strip().split()
+    k = parts[-1].lower() if len(parts) >= 2 else ascii_name.lower()
+    if k in _SUFFIX and len(parts) >= 2:
+        k = parts[-2].lower()
+    return k
+
+
+def norm_name(full_name):
+    """全名比對用："Luis García Jr." → "luisgarcia"；"Cole, Gerrit" → "gerritcole"。"""
+    if not full_name: return ""
+    n = _ascii(full_name).lower().strip()
+    if "," in n:
+        last, first = [p.strip() for p in n.split(",", 1)]
+        n = first + " " + last
+    parts = [p for p in n.split() if p not in _SUFFIX]
+    return re.sub(r"[^a-z0-9]", "", "".join(parts))
+
+
+def _index(pid, rec):
+    ids = _by_name.setdefault(norm_name(rec["name"]), [])
+    if pid not in ids: ids.append(pid)
+
+
+def _load():
+    global _store
+    if _store is not None: return _store
+    store = {"updated": None, "players": {}}
+    if not http_replay.active():
+        try:
+            with open(PLAYERS_PATH, encoding="utf-8") as f:
+                _s = json.load(f)
+            if isinstance(_s.get("players"), dict): store = _s
+        except (OSError, ValueError):
+            pass
+    _by_name.clear()
+    for sid, rec in store["players"].items():
+        _index(int(sid), rec)
+    _store = store
+    return store
+
+
+def get(pid):
+    """id -> {"name", "key", "hand", "team"}；未登錄回傳 None。"""
+    if not pid: return None
+    with _lock:
+        return _load()["players"].get(str(pid))
+
+
+def observe(pid, name, hand=None, team=None):
+    """登錄 / 更新一位球員（只覆寫有給的欄位）。回傳是否有變更。"""
+    global _dirty
+    if not pid or not name: return False
+    tid = teams.team_id(team) if team is not None else None
+    with _lock:
+        players = _load()["players"]
+        old = players.get(str(pid)) or {}
+        rec = {"name": name, "key": name_key(name),
+               "hand": hand or old.get("hand"), "team": tid or old.get("team")}
+        if rec == old: return False
+        if old.get("name") and norm_name(old["name"]) != norm_name(name):
+            ids = _by_name.get(norm_name(old["name"]), [])
+            if pid in ids: ids.remove(pid)
+        players[str(pid)] = rec
+        _index(pid, rec)
+        _dirty = True
+        return True
+
+
+def update_from_splits(splits):
+    """由 stats API 的 splits（player.id / fullName、team）增量合併，回傳新增或變更筆數。"""
+    n = 0
+    for s in splits:
+        p = s.get("player") or {}
+        hand = (p.get("pitchHand") or {}).get("code")
+        n += observe(p.get("id"), p.get("fullName"), hand=hand, team=s.get("team") or None)
+    if n:
+        log.info("players: %d new/changed (%d registered)", n, len(_load()["players"]))
+    return n
+
+
+def find(name, team=None):
+    """全名 -> id；同名多人時以 team（任何 teams 可辨識的寫法）區分，仍無法唯一決定回傳 None。"""
+    with _lock:
+        _load()
+        ids = _by_name.get(norm_name(name), [])
+        if len(ids) > 1 and team is not None:
+            tid = teams.team_id(team)
+            ids = [i for i in ids if _store["players"][str(i)].get("team") == tid]
+        return ids[0] if len(ids) == 1 else None
+
+
+def hand(pid):
+    rec = get(pid)
+    return rec.get("hand") if rec else None
+
+
+def save():
+    """有變更才寫檔。"""
+    global _dirty
+    with _lock:
+        if not _dirty or _store is None or http_replay.active(): return False
+        _store["updated"] = datetime.date.today().isoformat()
+        try:
+            os.makedirs(os.path.dirname(PLAYERS_PATH) or ".", exist_ok=True)
+            tmp = PLAYERS_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(_store, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, PLAYERS_PATH)
+        except OSError as e:
+            log.warning("players save failed: %s", e)
+            return False
+        _dirty = False
+        log.info("players: saved %d → %s", len(_store["players"]), PLAYERS_PATH)
+        return True
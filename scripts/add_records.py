@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 """Manually add settled records to Gist history."""
 import os
-import json
-import requests
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import gist_client
 
 GH_TOKEN  = os.environ["GH_TOKEN"]
-GIST_DESC = "mlb_bot_history"
-HEADERS   = {"Authorization": "token " + GH_TOKEN, "Content-Type": "application/json"}
 
 NEW_RECORDS = [
     {
@@ -43,30 +43,36 @@ NEW_RECORDS = [
     },
 ]
 
-r = requests.get("https://api.github.com/gists", headers=HEADERS, timeout=15)
-r.raise_for_status()
-gid = next((g["id"] for g in r.json() if g.get("description") == GIST_DESC), None)
-if not gid:
+snap = gist_client.read(GH_TOKEN)
+if not snap["id"]:
     raise SystemExit("Gist not found")
+print(f"Loaded {len(snap['records'])} existing records")
+
+
+def _key(rec):
+    return (rec.get("home"), rec.get("away"), rec.get("date"), rec.get("bet_type"))
+
 
-detail = requests.get("https://api.github.com/gists/" + gid, headers=HEADERS, timeout=15).json()
-raw = list(detail["files"].values())[0]["content"]
-hist = json.loads(raw)
-print(f"Loaded {len(hist)} existing records")
+# Re-evaluated against whatever version is current if another job writes concurrently.
+added = []
+def _add(hist):
+    added.clear()
+    have = {_key(h) for h in hist}
+    for rec in NEW_RECORDS:
+        if _key(rec) not in have:
+            hist.append(rec)
+            added.append(rec)
+    return hist if added else None
 
-added = 0
+
+snap = gist_client.update(GH_TOKEN, _add, base=snap)
 for rec in NEW_RECORDS:
-    key = (rec["home"], rec["away"], rec["date"], rec["bet_type"])
-    if any((h.get("home"), h.get("away"), h.get("date"), h.get("bet_type")) == key for h in hist):
-        print(f"  SKIP (already exists): {key}")
-    else:
-        hist.append(rec)
-        added += 1
+    if rec in added:
         print(f"  ADDED: {rec['away']} vs {rec['home']} {rec['bet_type']} {rec['result']}")
+    else:
+        print(f"  SKIP (already exists): {_key(rec)}")
 
-if added == 0:
+if not added:
     print("Nothing to add.")
 else:
-    body = {"files": {"history.json": {"content": json.dumps(hist, ensure_ascii=False, indent=2)}}}
-    requests.patch("https://api.github.com/gists/" + gid, headers=HEADERS, json=body, timeout=15).raise_for_status()
-    print(f"Saved {len(hist)} records ({added} new) to Gist.")
+    print(f"Saved {len(snap['records'])} records ({len(added)} new) to Gist.")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bot's hot paths on fixed synthetic fixtures and compare against
+the stored baseline (scripts/bench_baseline.json).
+
+Fixtures come from the deterministic mock world in scripts/mock_server.py
+(same --seed → same slate, odds and 90-day history). settle_hist talks to an
+in-process mock server through HTTP_HOST_OVERRIDE and reads its pending rows
+from a throw-away local history store (each round re-seeds the last week as
+unsettled, so the store write is part of the measured call).
+
+Each benchmark reports ops/s, p50/p95 latency and peak traced memory
+(tracemalloc, measured in a separate single call so it doesn't skew timing).
+
+Usage:
+  python scripts/bench.py                 # run all, compare with baseline
+  python scripts/bench.py --only mc_game,predict_slate --min-time 2
+  python scripts/bench.py --save          # overwrite the baseline
+  python scripts/bench.py --check         # exit 1 on a >1.5x p50 regression
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+BASELINE_PATH = os.path.join(HERE, "bench_baseline.json")
+REGRESS_RATIO = 1.5
+
+
+def _setup_env(tmp: str, port: int) -> None:
+    """Isolate every on-disk cache and route all HTTP to the in-process mock."""
+    os.environ.update({
+        "HTTP_HOST_OVERRIDE": "*=http://127.0.0.1:%d" % port,
+        "HTTP_RATE_LIMITS": "statsapi.mlb.com=1000/1000",
+        "HTTP_CACHE_DIR": os.path.join(tmp, "http"),
+        "PITCH_LOG_PATH": os.path.join(tmp, "pitching_logs.json"),
+        "HISTORY_DB": os.path.join(tmp, "history.sqlite"),
+        "PLAYERS_PATH": os.path.join(tmp, "players.json"),
+        "CIRCUIT_PATH": os.path.join(tmp, "circuit.json"),
+        "HTTP_LATENCY_PATH": os.path.join(tmp, "latency.json"),
+        "MC_SEED": "bench",
+    })
+    for k in ("GH_TOKEN", "DISCORD_WEBHOOK", "SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY",
+              "MLB_HTTP_MODE", "MLB_TRACE"):
+        os.environ.pop(k, None)
+
+
+def _start_mock(world):
+    from http.server import ThreadingHTTPServer
+    import mock_server
+    mock_server.Handler.world = world
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), mock_server.Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def measure(fn, min_time: float, min_iter: int) -> list:
+    """Call fn repeatedly for at least min_time seconds / min_iter calls; return per-call seconds."""
+    fn()  # warm-up (imports, caches, numpy dispatch)
+    samples, t_end = [], time.perf_counter() + min_time
+    while len(samples) < min_iter or time.perf_counter() < t_end:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def pct(xs: list, q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def build_benches(bot, live_update, world, slate_games: int) -> dict:
+    """name -> zero-arg callable, all closed over fixed fixtures."""
+    today = world.today
+    tw_now = datetime.datetime.combine(today, datetime.time(23, 0))
+    odds = world.odds()[:slate_games]
+    specs = []
+    for g, gd in zip(odds, world.slate(today)):
+        home, away = bot.norm_team(g["home_team"]), bot.norm_team(g["away_team"])
+        specs.append((home, away,
+                      bot._name_to_key(world.pitchers[gd["hsp"]]["name"]),
+                      bot._name_to_key(world.pitchers[gd["asp"]]["name"]),
+                      bot.market_total_line(g["bookmakers"]), None))
+    preds = bot.predict_slate(specs)
+    hist = json.loads(world.gist["content"])
+    picks = [dict(p, home=s[0], away=s[1], away_sp_name=s[3], home_sp_name=s[2],
+                  btype="獨贏", bp=1.91, edge=0.05, conf=0.7, stake=50.0,
+                  model_p=p.get("home_win_prob", 0.5), tier="A")
+             for p, s in zip(preds, specs)]
+    game_preds = {"%s|%s" % (s[0], s[1]): {"home_win_prob": p.get("home_win_prob", 0.5),
+                                          "market_total": s[4]} for p, s in zip(preds, specs)}
+    live_games = [{"home": s[0], "away": s[1], "inning": 1 + i % 9, "top_inning": i % 2 == 0,
+                   "home_runs": i % 5, "away_runs": (i * 3) % 6} for i, s in enumerate(specs)]
+
+    def settle():
+        # reset the last week to unsettled in the local store, then settle from its index
+        recs = [dict(r, result=None) if r["date"] >= (today - datetime.timedelta(days=7)).isoformat()
+                else dict(r) for r in hist]
+        bot.history_store.write(recs)
+        bot.settle_hist(recs)
+
+    def market_parse():
+        for g, s in zip(odds, specs):
+            bot.collect_market_bids(g["bookmakers"], s[0], s[1])
+
+    def pnl():
+        bot.calc_pnl(hist)
+        bot.calc_perf_by_type(hist)
+
+    return {
+        "mc_game":         lambda: bot.monte_carlo_game(4.6, 4.1, 0.35, 0.30, 8.5, seed_key="bench"),
+        "predict_slate":   lambda: bot.predict_slate(specs),
+        "market_parse":    market_parse,
+        "settle_hist_90d": settle,
+        "calc_pnl_perf":   pnl,
+        "write_pages_json": lambda: bot.write_pages_json(picks, hist, tw_now, live_games=[]),
+        "live_picks":      lambda: live_update.generate_live_picks(live_games, game_preds),
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark mlb-predictor hot paths")
+    ap.add_argument("--only", default="", help="comma-separated benchmark names")
+    ap.add_argument("--min-time", type=float, default=1.0, help="seconds per benchmark")
+    ap.add_argument("--min-iter", type=int, default=5)
+    ap.add_argument("--slate", type=int, default=15, help="games in the benchmark slate")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--check", action="store_true", help="exit 1 on a p50 regression vs baseline")
+    ap.add_argument("--json", default="", help="also write results to this path")
+    args = ap.parse_args()
+
+    sys.path.insert(0, HERE)
+    sys.path.insert(0, ROOT)
+    import mock_server
+
+    json_out = os.path.abspath(args.json) if args.json else ""
+    tmp = tempfile.mkdtemp(prefix="mlb_bench_")
+    world = mock_server.World(datetime.date.today(), max(args.slate, 15), args.seed, 90)
+    srv = _start_mock(world)
+    _setup_env(tmp, srv.server_address[1])
+    os.chdir(tmp)  # write_pages_json writes docs/ relative to cwd
+
+    import mlb_bot_v101 as bot
+    import live_update
+    logging.disable(logging.INFO)
+
+    benches = build_benches(bot, live_update, world, args.slate)
+    only = {x for x in args.only.split(",") if x}
+    results = {}
+    for name, fn in benches.items():
+        if only and name not in only:
+            continue
+        xs = measure(fn, args.min_time, args.min_iter)
+        results[name] = {
+            "ops_s":  round(len(xs) / sum(xs), 2),
+            "p50_ms": round(pct(xs, 0.50) * 1000, 3),
+            "p95_ms": round(pct(xs, 0.95) * 1000, 3),
+            "mean_ms": round(statistics.fmean(xs) * 1000, 3),
+            "iters":  len(xs),
+            "peak_kb": round(peak_memory(fn) / 1024, 1),
+        }
+
+    base = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            base = json.load(f).get("results", {})
+
+    print(f"{'benchmark':<18}{'ops/s':>10}{'p50 ms':>11}{'p95 ms':>11}{'peak KB':>11}{'vs base':>10}")
+    regressed = []
+    for name, r in results.items():
+        b = base.get(name)
+        ratio = r["p50_ms"] / b["p50_ms"] if b and b.get("p50_ms") else None
+        if ratio and ratio > REGRESS_RATIO:
+            regressed.append(name)
+        print(f"{name:<18}{r['ops_s']:>10.1f}{r['p50_ms']:>11.3f}{r['p95_ms']:>11.3f}"
+              f"{r['peak_kb']:>11.1f}{(f'{ratio:.2f}x' if ratio else '-'):>10}")
+
+    doc = {"rev": _git_rev(), "python": sys.version.split()[0],
+           "date": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+           "slate": args.slate, "seed": args.seed, "results": results}
+    if json_out:
+        with open(json_out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    if args.save:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved → {BASELINE_PATH}")
+    srv.shutdown()
+    if regressed:
+        print(f"Regressions (p50 > {REGRESS_RATIO}x baseline): {', '.join(regressed)}")
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,25 +7,30 @@ Run order (in mlb_bot.yml):
   1. mlb_bot_v101.py   → writes docs/picks_latest.json
   2. this script        → downloads/caches pitcher photos
   3. git commit         → pushes everything
+
+Pitcher IDs come from the bot's player registry (players.py,
+.cache/players.json) by full name; people/search is only called for names the
+registry doesn't know yet.
+
+Request pacing is handled by http_client's per-host rate limiter
+(statsapi.mlb.com / img.mlbstatic.com), so there is no fixed sleep.
 """
 
 import json
 import os
 import re
-import time
-import urllib.request
-import urllib.parse
-import urllib.error
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import http_client
+import players
 
 PICKS_JSON = "docs/picks_latest.json"
 OUTPUT_DIR = "docs/images/pitchers"
 
 # MLB Stats API – public, no key needed
-SEARCH_URL = (
-    "https://statsapi.mlb.com/api/v1/people/search"
-    "?names={name}&sportId=1"
-    "&fields=people,id,fullName,primaryPosition,active"
-)
+SEARCH_URL = "https://statsapi.mlb.com/api/v1/people/search"
+SEARCH_FIELDS = "people,id,fullName,primaryPosition,active"
 # Cloudinary MLB CDN – d_people:generic:… ensures a fallback silhouette is
 # returned even if the player has no official headshot yet, so we always get
 # a valid image.
@@ -50,12 +55,17 @@ def normalize_name(name: str) -> str:
     return name.strip()
 
 
+def resolve_player(name: str) -> int | None:
+    """Registry lookup first; fall back to people/search."""
+    return players.find(normalize_name(name)) or search_player(name)
+
+
 def search_player(name: str) -> int | None:
-    url = SEARCH_URL.format(name=urllib.parse.quote(normalize_name(name)))
+    params = {"names": normalize_name(name), "sportId": 1, "fields": SEARCH_FIELDS}
     try:
-        req = urllib.request.Request(url, headers=HEADERS)
-        with urllib.request.urlopen(req, timeout=12) as r:
-            data = json.loads(r.read())
+        r = http_client.get(SEARCH_URL, params=params, headers=HEADERS, timeout=12)
+        r.raise_for_status()
+        data = r.json()
         people = data.get("people", [])
         if not people:
             return None
@@ -81,9 +91,9 @@ def search_player(name: str) -> int | None:
 def download_photo(mlb_id: int, out_path: str) -> bool:
     url = PHOTO_URL.format(mlb_id=mlb_id)
     try:
-        req = urllib.request.Request(url, headers=HEADERS)
-        with urllib.request.urlopen(req, timeout=20) as r:
-            data = r.read()
+        r = http_client.get(url, headers=HEADERS, timeout=20)
+        r.raise_for_status()
+        data = r.content
         # Sanity-check: a valid JPEG/PNG starts with known magic bytes
         if len(data) < 100:
             print(f"  [warn] response too small ({len(data)} B) for id={mlb_id}")
@@ -131,7 +141,7 @@ def main() -> None:
             continue
 
         print(f"  → {name} …", end="", flush=True)
-        mlb_id = search_player(name)
+        mlb_id = resolve_player(name)
         if not mlb_id:
             print("  [MLB ID not found]")
             failed += 1
@@ -145,8 +155,6 @@ def main() -> None:
         else:
             failed += 1
 
-        time.sleep(0.5)  # polite rate-limiting
-
     print(f"\nDone: {fetched} fetched, {skipped} cached, {failed} failed")
 
 
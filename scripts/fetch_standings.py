@@ -2,45 +2,12 @@
 """Fetch MLB standings from statsapi.mlb.com and write docs/standings.json."""
 import json
 import os
-import requests
+import sys
 from datetime import datetime, timezone
 
-TEAM_CN = {
-    'Houston Astros': '太空人', 'Los Angeles Angels': '天使',
-    'Oakland Athletics': '運動家', 'Sacramento River Cats': '運動家',
-    'Seattle Mariners': '水手', 'Texas Rangers': '遊騎兵',
-    'Chicago White Sox': '白襪', 'Cleveland Guardians': '守護者',
-    'Detroit Tigers': '老虎', 'Kansas City Royals': '皇家',
-    'Minnesota Twins': '雙城', 'Baltimore Orioles': '金鶯',
-    'Boston Red Sox': '紅襪', 'New York Yankees': '洋基',
-    'Tampa Bay Rays': '光芒', 'Toronto Blue Jays': '藍鳥',
-    'Arizona Diamondbacks': '響尾蛇', 'Colorado Rockies': '落磯',
-    'Los Angeles Dodgers': '道奇', 'San Diego Padres': '教士',
-    'San Francisco Giants': '巨人', 'Chicago Cubs': '小熊',
-    'Cincinnati Reds': '紅人', 'Milwaukee Brewers': '釀酒人',
-    'Pittsburgh Pirates': '海盜', 'St. Louis Cardinals': '紅雀',
-    'Atlanta Braves': '勇士', 'Miami Marlins': '馬林魚',
-    'New York Mets': '大都會', 'Philadelphia Phillies': '費城人',
-    'Washington Nationals': '國民',
-}
-
-TEAM_ABBR = {
-    'Houston Astros': 'HOU', 'Los Angeles Angels': 'LAA',
-    'Oakland Athletics': 'OAK', 'Seattle Mariners': 'SEA',
-    'Texas Rangers': 'TEX', 'Chicago White Sox': 'CWS',
-    'Cleveland Guardians': 'CLE', 'Detroit Tigers': 'DET',
-    'Kansas City Royals': 'KC', 'Minnesota Twins': 'MIN',
-    'Baltimore Orioles': 'BAL', 'Boston Red Sox': 'BOS',
-    'New York Yankees': 'NYY', 'Tampa Bay Rays': 'TB',
-    'Toronto Blue Jays': 'TOR', 'Arizona Diamondbacks': 'ARI',
-    'Colorado Rockies': 'COL', 'Los Angeles Dodgers': 'LAD',
-    'San Diego Padres': 'SD', 'San Francisco Giants': 'SF',
-    'Chicago Cubs': 'CHC', 'Cincinnati Reds': 'CIN',
-    'Milwaukee Brewers': 'MIL', 'Pittsburgh Pirates': 'PIT',
-    'St. Louis Cardinals': 'STL', 'Atlanta Braves': 'ATL',
-    'Miami Marlins': 'MIA', 'New York Mets': 'NYM',
-    'Philadelphia Phillies': 'PHI', 'Washington Nationals': 'WSH',
-}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import http_client
+import teams
 
 DIV_CN = {
     'American League East': '美聯東區',
@@ -69,8 +36,8 @@ def parse_team(tr, rank):
         'rank': rank,
         'team_id': tid,
         'team': name,
-        'team_cn': TEAM_CN.get(name, name),
-        'abbr': TEAM_ABBR.get(name, name[:3].upper()),
+        'team_cn': teams.cn(tid, name),
+        'abbr': teams.abbr(tid, name[:3].upper()),
         'w': tr['wins'],
         'l': tr['losses'],
         'pct': float(tr.get('winningPercentage', 0)),
@@ -96,7 +63,7 @@ def fetch():
         'User-Agent': 'Mozilla/5.0 (compatible; mlb-standings-bot/1.0)',
         'Accept': 'application/json',
     }
-    r = requests.get(url, headers=headers, timeout=20)
+    r = http_client.get(url, headers=headers, timeout=20)
     r.raise_for_status()
     data = r.json()
 
@@ -106,13 +73,13 @@ def fetch():
     for rec in records:
         league_id = rec['league']['id']
         div_name = rec['division']['name']
-        teams = [parse_team(tr, i + 1) for i, tr in enumerate(rec['teamRecords'])]
-        div = {'division': div_name, 'division_cn': DIV_CN.get(div_name, div_name), 'teams': teams}
+        rows = [parse_team(tr, i + 1) for i, tr in enumerate(rec['teamRecords'])]
+        div = {'division': div_name, 'division_cn': DIV_CN.get(div_name, div_name), 'teams': rows}
         if league_id == 103:
             al_divs.append(div)
         else:
             nl_divs.append(div)
-        all_teams.extend(teams)
+        all_teams.extend(rows)
 
     all_teams.sort(key=lambda t: (-t['pct'], -t['w']))
     for i, t in enumerate(all_teams):
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the external APIs the bot talks to, for load tests and
+offline development.
+
+Emulates the subset of endpoints actually used by mlb_bot_v101.py,
+live_update.py and sync_history.py:
+  statsapi.mlb.com     /api/v1/schedule, /api/v1/people/{id}/stats,
+                       /api/v1/game/{pk}/boxscore, /api/v1/stats,
+                       /api/v1/teams/stats, /api/v1.1/game/{pk}/feed/live
+  api.the-odds-api.com /v4/sports/baseball_mlb/odds/
+  site(.web).api.espn.com  standings (+ empty scoreboard)
+  api.github.com       /gists (list / get / revision / create / patch, ETag + 304) + raw content
+  api.open-meteo.com, www.rotowire.com, discord.com, ntfy.sh  (neutral stubs)
+
+The world is synthetic and deterministic for a given --seed: 30 real MLB
+teams, 5 starters + 8 relievers each, a full season of final games up to
+yesterday, and a slate of --games games today. Slates larger than 15 games
+reuse teams (the bot sees them as doubleheaders).
+
+Usage:
+  python scripts/mock_server.py --games 30 --latency 80 --jitter 40
+  export HTTP_HOST_OVERRIDE='*=http://127.0.0.1:8765'
+  ODDS_API_KEY=mock GH_TOKEN=mock DISCORD_WEBHOOK=https://discord.com/api/webhooks/mock \\
+      python mlb_bot_v101.py
+"""
+
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# (id, full name, ESPN abbreviation)
+TEAMS = [
+    (108, "Los Angeles Angels", "LAA"), (109, "Arizona Diamondbacks", "ARI"),
+    (110, "Baltimore Orioles", "BAL"), (111, "Boston Red Sox", "BOS"),
+    (112, "Chicago Cubs", "CHC"), (113, "Cincinnati Reds", "CIN"),
+    (114, "Cleveland Guardians", "CLE"), (115, "Colorado Rockies", "COL"),
+    (116, "Detroit Tigers", "DET"), (117, "Houston Astros", "HOU"),
+    (118, "Kansas City Royals", "KC"), (119, "Los Angeles Dodgers", "LAD"),
+    (120, "Washington Nationals", "WSH"), (121, "New York Mets", "NYM"),
+    (133, "Athletics", "ATH"), (134, "Pittsburgh Pirates", "PIT"),
+    (135, "San Diego Padres", "SD"), (136, "Seattle Mariners", "SEA"),
+    (137, "San Francisco Giants", "SF"), (138, "St. Louis Cardinals", "STL"),
+    (139, "Tampa Bay Rays", "TB"), (140, "Texas Rangers", "TEX"),
+    (141, "Toronto Blue Jays", "TOR"), (142, "Minnesota Twins", "MIN"),
+    (143, "Philadelphia Phillies", "PHI"), (144, "Atlanta Braves", "ATL"),
+    (145, "Chicago White Sox", "CWS"), (146, "Miami Marlins", "MIA"),
+    (147, "New York Yankees", "NYY"), (158, "Milwaukee Brewers", "MIL"),
+]
+TEAM_BY_ID = {t[0]: t for t in TEAMS}
+FIRST = ["Aaron", "Blake", "Caleb", "Dylan", "Ethan", "Felix", "Grant", "Hunter",
+         "Isaac", "Jacob", "Kyle", "Logan", "Mason", "Nolan", "Owen", "Parker",
+         "Quinn", "Ryan", "Shane", "Tyler", "Victor", "Wade", "Xavier", "Zack"]
+LAST = ["Abbott", "Barnes", "Carver", "Dalton", "Ellis", "Foster", "Garner",
+        "Hayes", "Ingram", "Jensen", "Keller", "Lawson", "Mercer", "Norris",
+        "Ortega", "Porter", "Ramsey", "Sutton", "Tanner", "Underwood", "Vance",
+        "Walsh", "Yates", "Ziegler"]
+N_SP, N_RP = 5, 8
+SEASON_START = "03-27"
+DAILY_GAMES = 15
+BOOKS = ["draftkings", "fanduel", "betmgm"]
+GIST_DESC = "mlb_bot_history"
+EPOCH = datetime.date(2000, 1, 1)
+
+
+def team_key(name: str) -> str:
+    """'Boston Red Sox' → 'red sox', 'New York Mets' → 'mets' (the bot's history keys)."""
+    words = name.lower().split()
+    return " ".join(words[-2:]) if words[-1] in ("sox", "jays") else words[-1]
+
+
+def ip_str(outs: int) -> str:
+    return "%d.%d" % (outs // 3, outs % 3)
+
+
+def _utc_stamp() -> str:
+    return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def poisson(rng: random.Random, lam: float) -> int:
+    k, p, limit = 0, 1.0, math.exp(-lam)
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+class World:
+    """Deterministic synthetic season: schedule, box scores, stats, odds, gist."""
+
+    def __init__(self, today: datetime.date, games: int, seed: int, hist_days: int):
+        self.today, self.games_today, self.seed = today, games, seed
+        rng = random.Random(seed)
+        self.pitchers = {}          # pid -> {"name", "team", "sp", "hand", "skill"}
+        self.rotation = {}          # team_id -> [sp ids]
+        self.bullpen = {}           # team_id -> [rp ids]
+        self.strength = {}          # team_id -> run-scoring mean
+        names = [f"{f} {l}" for f in FIRST for l in LAST]
+        rng.shuffle(names)
+        for ti, (tid, _, _) in enumerate(TEAMS):
+            self.strength[tid] = rng.uniform(3.8, 5.2)
+            sps, rps = [], []
+            for j in range(N_SP + N_RP):
+                pid = 600000 + tid * 100 + j
+                self.pitchers[pid] = {"name": names[ti * (N_SP + N_RP) + j], "team": tid,
+                                      "sp": j < N_SP, "hand": rng.choice("LRR"),
+                                      "skill": rng.uniform(0.75, 1.25)}
+                (sps if j < N_SP else rps).append(pid)
+            self.rotation[tid], self.bullpen[tid] = sps, rps
+        self.season_start = datetime.date.fromisoformat("%d-%s" % (today.year, SEASON_START))
+        self._slates = {}
+        self._boxes = {}
+        self._lock = threading.Lock()
+        self.logs = self._build_logs()
+        self.gist = {"id": "mockgist0001", "versions": []}
+        self.gist_write(json.dumps(self._history(hist_days)))
+
+    # ── schedule ───────────────────────────────────────
+    def slate(self, day: datetime.date) -> list:
+        with self._lock:
+            if day in self._slates:
+                return self._slates[day]
+        if day < self.season_start or day > self.today:
+            out = []
+        else:
+            n = self.games_today if day == self.today else DAILY_GAMES
+            rng = random.Random("%d-%s" % (self.seed, day))
+            ids = [t[0] for t in TEAMS]
+            pairs = []
+            while len(pairs) < n:
+                rng.shuffle(ids)
+                pairs.extend((ids[i], ids[i + 1]) for i in range(0, len(ids), 2))
+            dn = (day - self.season_start).days
+            out = []
+            for i, (h, a) in enumerate(pairs[:n]):
+                out.append({"pk": (day - EPOCH).days * 200 + i, "date": day, "home": h, "away": a,
+                            "hsp": self.rotation[h][(dn + i // 15) % N_SP],
+                            "asp": self.rotation[a][(dn + i // 15) % N_SP],
+                            "hour": 17 + (i % 15) // 3})
+        with self._lock:
+            self._slates[day] = out
+        return out
+
+    def game(self, pk: int):
+        day = EPOCH + datetime.timedelta(days=pk // 200)
+        for g in self.slate(day):
+            if g["pk"] == pk:
+                return g
+        return None
+
+    def box(self, g: dict) -> dict:
+        """Final score and pitching lines for a past game."""
+        with self._lock:
+            if g["pk"] in self._boxes:
+                return self._boxes[g["pk"]]
+        rng = random.Random("%d-box-%d" % (self.seed, g["pk"]))
+        lines, runs = {}, {}
+        for side, tid, opp, sp in (("home", g["home"], g["away"], g["hsp"]),
+                                   ("away", g["away"], g["home"], g["asp"])):
+            outs_sp = rng.randint(12, 21)
+            pitched = [(sp, outs_sp)]
+            left = 27 - outs_sp
+            for rp in rng.sample(self.bullpen[tid], 3):
+                if left <= 0:
+                    break
+                o = min(left, rng.randint(2, 6))
+                pitched.append((rp, o))
+                left -= o
+            allowed = 0
+            rows = []
+            for pid, outs in pitched:
+                lam = self.strength[opp] * self.pitchers[pid]["skill"] * outs / 27
+                er = poisson(rng, lam)
+                allowed += er
+                rows.append((pid, {
+                    "inningsPitched": ip_str(outs), "earnedRuns": er,
+                    "hits": er + poisson(rng, outs / 4), "baseOnBalls": poisson(rng, outs / 9),
+                    "homeRuns": poisson(rng, outs / 30), "strikeOuts": poisson(rng, outs / 3),
+                    "hitBatsmen": poisson(rng, outs / 60),
+                    "gamesStarted": 1 if pid == sp else 0}))
+            lines[side] = rows
+            runs["away" if side == "home" else "home"] = allowed
+        if runs["home"] == runs["away"]:
+            runs["home"] += 1
+        out = {"runs": runs, "lines": lines}
+        with self._lock:
+            self._boxes[g["pk"]] = out
+        return out
+
+    def _build_logs(self) -> dict:
+        logs = {}
+        day = self.season_start
+        while day < self.today:
+            for g in self.slate(day):
+                for side, rows in self.box(g)["lines"].items():
+                    for pid, st in rows:
+                        logs.setdefault(pid, []).append((g, st))
+            day += datetime.timedelta(days=1)
+        return logs
+
+    def schedule_game(self, g: dict) -> dict:
+        final = g["date"] < self.today
+        runs = self.box(g)["runs"] if final else {}
+        ts = datetime.datetime.combine(g["date"], datetime.time(g["hour"]))
+        teams = {}
+        for side in ("home", "away"):
+            tid, sp = g[side], g["hsp" if side == "home" else "asp"]
+            t = {"team": {"id": tid, "name": TEAM_BY_ID[tid][1]},
+                 "probablePitcher": {"id": sp, "fullName": self.pitchers[sp]["name"],
+                                     "pitchHand": {"code": self.pitchers[sp]["hand"]}}}
+            if final:
+                other = "away" if side == "home" else "home"
+                t.update(score=runs[side], isWinner=runs[side] > runs[other])
+            teams[side] = t
+        return {
+            "gamePk": g["pk"], "gameDate": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "officialDate": g["date"].isoformat(),
+            "status": {"abstractGameState": "Final" if final else "Preview",
+                       "detailedState": "Final" if final else "Scheduled"},
+            "teams": teams,
+            "officials": [{"officialType": "Home Plate",
+                           "official": {"fullName": "Mock Umpire %d" % (g["pk"] % 40)}}],
+            "linescore": {"teams": {s: {"runs": runs.get(s, 0)} for s in ("home", "away")}},
+        }
+
+    def schedule(self, q: dict) -> dict:
+        if "date" in q:
+            start = end = datetime.date.fromisoformat(q["date"])
+        else:
+            start = datetime.date.fromisoformat(q.get("startDate", self.today.isoformat()))
+            end = datetime.date.fromisoformat(q.get("endDate", self.today.isoformat()))
+        dates, day = [], start
+        while day <= end:
+            games = [self.schedule_game(g) for g in self.slate(day)]
+            if games:
+                dates.append({"date": day.isoformat(), "games": games})
+            day += datetime.timedelta(days=1)
+        return {"dates": dates}
+
+    # ── stats ──────────────────────────────────────────
+    def _agg(self, pid: int, scale: float = 1.0) -> dict:
+        rows = self.logs.get(pid, [])
+        outs = sum(int(s["inningsPitched"].split(".")[0]) * 3 + int(s["inningsPitched"].split(".")[1])
+                   for _, s in rows)
+        er = sum(s["earnedRuns"] for _, s in rows) * scale
+        era = er * 27 / outs if outs else 0.0
+        return {"era": "%.2f" % era, "inningsPitched": ip_str(outs), "earnedRuns": round(er),
+                "gamesStarted": sum(s["gamesStarted"] for _, s in rows), "gamesPitched": len(rows)}
+
+    def people_stats(self, pid: int, q: dict) -> dict:
+        p = self.pitchers.get(pid)
+        if not p:
+            return {"stats": []}
+        if q.get("stats") == "gameLog":
+            splits = [{"date": g["date"].isoformat(),
+                       "stat": {k: str(v) for k, v in st.items()},
+                       "game": {"gamePk": g["pk"], "gameDate": g["date"].isoformat()},
+                       "team": {"id": p["team"]},
+                       "player": {"fullName": p["name"]}} for g, st in self.logs.get(pid, [])]
+        else:
+            splits = [{"stat": self._agg(pid), "player": {"id": pid, "fullName": p["name"]}}]
+        return {"stats": [{"sport": {"id": 1}, "splits": splits}]}
+
+    def bulk_stats(self, q: dict) -> dict:
+        sit = q.get("sitCodes", "")
+        scale = {"vl": 1.08, "vr": 0.96}.get(sit, 1.0)
+        splits = []
+        if q.get("group") == "hitting":
+            rng = random.Random("%d-hit-%s" % (self.seed, sit))
+            for tid, name, _ in TEAMS:
+                base = 0.640 + (self.strength[tid] - 3.8) * 0.08
+                for _ in range(9):
+                    splits.append({"team": {"id": tid, "name": name},
+                                   "stat": {"ops": "%.3f" % (base + rng.uniform(-0.08, 0.08)),
+                                            "atBats": str(rng.randint(60, 400))}})
+        else:
+            ids = {int(x) for x in q.get("playerId", "").split(",") if x.isdigit()}
+            for pid, p in self.pitchers.items():
+                if ids and pid not in ids:
+                    continue
+                splits.append({"player": {"id": pid, "fullName": p["name"]},
+                               "team": {"id": p["team"], "name": TEAM_BY_ID[p["team"]][1]},
+                               "stat": self._agg(pid, scale)})
+        return {"stats": [{"splits": splits}]}
+
+    def team_stats(self) -> dict:
+        return {"stats": [{"splits": [
+            {"team": {"id": tid, "name": name},
+             "stat": {"obp": "%.3f" % (0.290 + (self.strength[tid] - 3.8) * 0.03)}}
+            for tid, name, _ in TEAMS]}]}
+
+    def boxscore(self, pk: int) -> dict | None:
+        g = self.game(pk)
+        if not g:
+            return None
+        teams = {}
+        lines = self.box(g)["lines"] if g["date"] < self.today else {"home": [], "away": []}
+        for side in ("home", "away"):
+            tid = g[side]
+            teams[side] = {
+                "team": {"id": tid, "name": TEAM_BY_ID[tid][1]},
+                "pitchers": [pid for pid, _ in lines[side]],
+                "players": {"ID%d" % pid: {"person": {"id": pid, "fullName": self.pitchers[pid]["name"]},
+                                           "stats": {"pitching": st}}
+                            for pid, st in lines[side]},
+            }
+        return {"teams": teams}
+
+    # ── odds / ESPN ────────────────────────────────────
+    def odds(self) -> list:
+        out = []
+        for g in self.slate(self.today):
+            rng = random.Random("%d-odds-%d" % (self.seed, g["pk"]))
+            hs, as_ = self.strength[g["home"]] * 1.04, self.strength[g["away"]]
+            p_home = min(0.75, max(0.25, 0.5 + (hs - as_) * 0.08))
+            total = round((hs + as_) * 2) / 2
+            home, away = TEAM_BY_ID[g["home"]][1], TEAM_BY_ID[g["away"]][1]
+            books = []
+            for bk in BOOKS:
+                v = 1.045 + rng.uniform(-0.01, 0.01)
+                ph = min(0.9, max(0.1, p_home + rng.uniform(-0.02, 0.02)))
+                rl = 0.62 if ph > 0.5 else 0.38
+                books.append({"key": bk, "title": bk.title(), "last_update": "%sT12:00:00Z" % self.today,
+                              "markets": [
+                    {"key": "h2h", "outcomes": [
+                        {"name": home, "price": round(1 / (ph * v), 2)},
+                        {"name": away, "price": round(1 / ((1 - ph) * v), 2)}]},
+                    {"key": "spreads", "outcomes": [
+                        {"name": home, "price": round(1 / ((1 - rl) * v), 2), "point": -1.5 if ph > 0.5 else 1.5},
+                        {"name": away, "price": round(1 / (rl * v), 2), "point": 1.5 if ph > 0.5 else -1.5}]},
+                    {"key": "totals", "outcomes": [
+                        {"name": "Over", "price": round(1.91 + rng.uniform(-0.05, 0.05), 2), "point": total},
+                        {"name": "Under", "price": round(1.91 + rng.uniform(-0.05, 0.05), 2), "point": total}]},
+                ]})
+            out.append({"id": "mock%d" % g["pk"], "sport_key": "baseball_mlb",
+                        "commence_time": "%sT%02d:05:00Z" % (self.today, g["hour"] + 6),
+                        "home_team": home, "away_team": away, "bookmakers": books})
+        return out
+
+    def espn_standings(self) -> dict:
+        rec = {tid: {"w": 0, "l": 0, "rs": 0, "ra": 0, "hw": 0, "hl": 0, "aw": 0, "al": 0} for tid, _, _ in TEAMS}
+        day = self.season_start
+        while day < self.today:
+            for g in self.slate(day):
+                r = self.box(g)["runs"]
+                hw = r["home"] > r["away"]
+                h, a = rec[g["home"]], rec[g["away"]]
+                h["rs"] += r["home"]; h["ra"] += r["away"]; a["rs"] += r["away"]; a["ra"] += r["home"]
+                h["w" if hw else "l"] += 1; a["l" if hw else "w"] += 1
+                h["hw" if hw else "hl"] += 1; a["al" if hw else "aw"] += 1
+            day += datetime.timedelta(days=1)
+        entries = [{"team": {"abbreviation": abbr},
+                    "stats": [{"name": k, "value": rec[tid][v]} for k, v in
+                              (("wins", "w"), ("losses", "l"), ("pointsFor", "rs"), ("pointsAgainst", "ra"))],
+                    "records": [{"name": "Home", "wins": rec[tid]["hw"], "losses": rec[tid]["hl"]},
+                                {"name": "Road", "wins": rec[tid]["aw"], "losses": rec[tid]["al"]}]}
+                   for tid, _, abbr in TEAMS]
+        return {"children": [{"standings": {"entries": entries[:15]}},
+                             {"standings": {"entries": entries[15:]}}]}
+
+    # ── gist ───────────────────────────────────────────
+    def _history(self, days: int) -> list:
+        """Synthetic pick history; the last 3 days are left unsettled."""
+        rng = random.Random("%d-hist" % self.seed)
+        recs = []
+        for back in range(days, 0, -1):
+            day = self.today - datetime.timedelta(days=back)
+            for g in self.slate(day)[:4]:
+                r = self.box(g)["runs"]
+                home = team_key(TEAM_BY_ID[g["home"]][1])
+                away = team_key(TEAM_BY_ID[g["away"]][1])
+                kind = rng.choice(["獨贏", "讓分", "大小分"])
+                team, label, mkt = home, "", None
+                if kind == "讓分":
+                    label = "+1.5"
+                elif kind == "大小分":
+                    mkt = 8.5
+                    team = label = rng.choice(["OVER", "UNDER"])
+                if kind == "獨贏":
+                    win = r["home"] > r["away"]
+                elif kind == "讓分":
+                    win = r["home"] + 1.5 > r["away"]
+                else:
+                    win = (r["home"] + r["away"] > mkt) == (label == "OVER")
+                recs.append({"date": day.isoformat(), "team": team, "home": home, "away": away,
+                             "price": round(rng.uniform(1.6, 2.3), 2), "stake": 50.0,
+                             "edge": round(rng.uniform(0.02, 0.15), 4), "conf": round(rng.uniform(0.5, 0.9), 3),
+                             "bet_type": kind, "label": label, "market_total": mkt,
+                             "result": None if back <= 3 else ("W" if win else "L"),
+                             "sp_src": "probable"})
+        return recs
+
+    def gist_write(self, content: str) -> None:
+        """New gist revision (newest first, like the API's history list).
+
+        Like GitHub, a write that leaves the content unchanged creates no revision.
+        """
+        with self._lock:
+            if self.gist["versions"] and content == self.gist["content"]:
+                return
+            ver = hashlib.sha1(("%d:%s" % (len(self.gist["versions"]), content)).encode("utf-8")).hexdigest()
+            self.gist["versions"].insert(0, {"version": ver, "content": content,
+                                             "committed_at": _utc_stamp()})
+            self.gist["content"] = content
+
+    def gist_meta(self, version: str = "") -> dict:
+        """Gist detail at the latest (or a given) revision; None if the revision is unknown."""
+        vs = self.gist["versions"]
+        i = next((i for i, v in enumerate(vs) if v["version"] == version), None) if version else 0
+        if i is None:
+            return None
+        cur = vs[i]
+        # raw_url keeps the real host; HTTP_HOST_OVERRIDE routes it back here
+        raw = "https://gist.githubusercontent.com/mock/%s/raw/%s/history.json" % (self.gist["id"], cur["version"])
+        return {"id": self.gist["id"], "description": GIST_DESC, "updated_at": cur["committed_at"],
+                "history": [{"version": v["version"], "committed_at": v["committed_at"]} for v in vs[i:i + 10]],
+                "files": {"history.json": {"filename": "history.json", "raw_url": raw,
+                                           "content": cur["content"]}}}
+
+
+class Handler(BaseHTTPRequestHandler):
+    world: World = None
+    latency = jitter = error_rate = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code: int, body, ctype: str = "application/json", headers: dict = None):
+        data = body if isinstance(body, bytes) else (
+            json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            if not isinstance(body, str) else body.encode("utf-8"))
+        gz = "gzip" in (self.headers.get("Accept-Encoding") or "") and len(data) > 1024
+        if gz:
+            data = gzip.compress(data, 5)
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, random.gauss(self.latency, self.jitter)) / 1000)
+
+    def _route(self, method: str):
+        self._delay()
+        if self.error_rate and random.random() < self.error_rate:
+            return self._send(503, {"error": "injected"})
+        parts = urlsplit(self.path)
+        q = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        host, _, path = parts.path.lstrip("/").partition("/")
+        path = "/" + path
+        w = self.world
+        if host == "statsapi.mlb.com":
+            if path == "/api/v1/schedule":
+                return self._send(200, w.schedule(q))
+            if path == "/api/v1/stats":
+                return self._send(200, w.bulk_stats(q))
+            if path == "/api/v1/teams/stats":
+                return self._send(200, w.team_stats())
+            m = re.fullmatch(r"/api/v1/people/(\d+)/stats", path)
+            if m:
+                return self._send(200, w.people_stats(int(m.group(1)), q))
+            m = re.fullmatch(r"/api/v1/game/(\d+)/boxscore", path)
+            if m:
+                box = w.boxscore(int(m.group(1)))
+                return self._send(200, box) if box else self._send(404, {"message": "no game"})
+            if re.fullmatch(r"/api/v1\.1/game/\d+/feed/live", path):
+                return self._send(200, {"liveData": {"boxscore": {"teams": {}}}})
+        elif host == "api.the-odds-api.com" and path.startswith("/v4/sports/baseball_mlb/odds"):
+            return self._send(200, w.odds())
+        elif host in ("site.api.espn.com", "site.web.api.espn.com"):
+            if path.endswith("/standings"):
+                return self._send(200, w.espn_standings())
+            if path.endswith("/scoreboard"):
+                return self._send(200, {"events": []})
+        elif host == "api.github.com" and path.startswith("/gists"):
+            gid = path[len("/gists/"):] if path.startswith("/gists/") else ""
+            if method == "GET" and not gid:
+                return self._send(200, [w.gist_meta()])
+            gid, _, ver = gid.partition("/")
+            if method == "GET" and gid == w.gist["id"]:
+                meta = w.gist_meta(ver)
+                if meta is None:
+                    return self._send(404, {"message": "Not Found"})
+                etag = '"%s"' % meta["history"][0]["version"]
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, b"", headers={"ETag": etag})
+                return self._send(200, meta, headers={"ETag": etag})
+            if method in ("PATCH", "POST"):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                files = body.get("files") or {}
+                if files:
+                    w.gist_write(next(iter(files.values())).get("content", w.gist["content"]))
+                meta = w.gist_meta()
+                return self._send(201 if method == "POST" else 200, meta,
+                                  headers={"ETag": '"%s"' % meta["history"][0]["version"]})
+        elif host == "gist.githubusercontent.com":
+            ver = path.split("/raw/", 1)[-1].split("/")[0]
+            meta = w.gist_meta(ver) or w.gist_meta()
+            return self._send(200, meta["files"]["history.json"]["content"])
+        elif host == "api.open-meteo.com":
+            n = 72
+            start = datetime.datetime.combine(w.today, datetime.time())
+            return self._send(200, {"hourly": {
+                "time": [(start + datetime.timedelta(hours=i)).strftime("%Y-%m-%dT%H:00") for i in range(n)],
+                "temperature_2m": [20] * n, "precipitation_probability": [0] * n,
+                "wind_speed_10m": [0] * n, "wind_direction_10m": [0] * n}})
+        elif host == "www.rotowire.com":
+            return self._send(200, "<html><body></body></html>", "text/html")
+        elif host in ("discord.com", "ntfy.sh"):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            return self._send(204, b"")
+        return self._send(404, {"message": "mock: no route for %s%s" % (host, path)})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--games", type=int, default=15, help="games on today's slate (15/30/100…)")
+    ap.add_argument("--latency", type=float, default=0, help="mean response latency in ms")
+    ap.add_argument("--jitter", type=float, default=0, help="latency std-dev in ms")
+    ap.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered 503")
+    ap.add_argument("--hist-days", type=int, default=90, help="days of synthetic gist history")
+    ap.add_argument("--date", default=None, help="slate date (YYYY-MM-DD, default today)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    today = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+    t0 = time.time()
+    Handler.world = World(today, args.games, args.seed, args.hist_days)
+    Handler.latency, Handler.jitter, Handler.error_rate = args.latency, args.jitter, args.error_rate
+    srv = ThreadingHTTPServer((args.host, args.port), Handler)
+    srv.daemon_threads = True
+    print(f"Mock world ready in {time.time() - t0:.1f}s: {args.games} games on {today}, "
+          f"{len(Handler.world.pitchers)} pitchers")
+    print(f"export HTTP_HOST_OVERRIDE='*=http://{args.host}:{args.port}'")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+結算引擎 — mlb_bot_v101.settle_hist 與 sync_history 共用。
+
+所有待結算紀錄（result=None）只發一次 schedule?startDate=&endDate= 請求（最早日期前一天 ～ 最晚日期），
+完賽比分建成 {(ET 日期, 主隊 ID, 客隊 ID): (主隊得分, 客隊得分)} 索引，一次走過全部紀錄結算。
+紀錄日期是台灣時間，可能比 ET 日期晚一天（TW 07:10 = ET 前一天 23:10）→ 先查同日、再查前一天。
+紀錄裡的隊名（"red sox"、"redsox"、"Boston Red Sox"…）與賽程都經 teams 身分表轉成 MLB 球隊 ID，
+比對是單純的 dict 查表。
+"""
+import datetime
+import logging
+
+import http_client
+import teams
+
+log = logging.getLogger("settlement")
+
+SCHEDULE_URL    = "https://statsapi.mlb.com/api/v1/schedule"
+SCHEDULE_FIELDS = "dates,date,games,status,detailedState,teams,home,away,team,id,name,score"
+
+
+def fetch_finals(start, end, get_json=None):
+    """[start, end] 期間所有完賽比分（一次請求）；請求失敗回傳空索引。"""
+    get_json = get_json or http_client.get_json
+    data = get_json(SCHEDULE_URL, params={"sportId": 1, "startDate": start, "endDate": end,
+                                          "fields": SCHEDULE_FIELDS}, timeout=15)
+    finals = {}
+    if not data:
+        log.warning("settlement: no schedule data for %s~%s", start, end)
+        return finals
+    for d in data.get("dates", []):
+        for g in d.get("games", []):
+            if "Final" not in g.get("status", {}).get("detailedState", ""): continue
+            hd = g.get("teams", {}).get("home", {}); ad = g.get("teams", {}).get("away", {})
+            hs, as_ = hd.get("score"), ad.get("score")
+            if hs is None or as_ is None: continue
+            key = (d.get("date"), teams.team_id(hd.get("team", {})), teams.team_id(ad.get("team", {})))
+            finals.setdefault(key, (int(hs), int(as_)))   # 雙頭賽：API 順序第一場優先（與舊版一致）
+    return finals
+
+
+def grade(r, h_score, a_score, team_is_home):
+    """單筆結果：W / L / P（整數大小分線平局退注）；無法判定回傳 None。讓分標籤無法解析時拋 ValueError。"""
+    btype = r.get("bet_type", "")
+    label = r.get("label", "") or ""
+    if btype == "獨贏":
+        win = (h_score > a_score) if team_is_home else (a_score > h_score)
+    elif btype == "讓分":
+        spread = float(label)
+        win = (h_score + spread > a_score) if team_is_home else (a_score + spread > h_score)
+    elif btype == "大小分":
+        mkt = r.get("market_total")
+        if mkt is None: return None
+        total = h_score + a_score
+        if total == mkt: return "P"
+        win = (total > mkt) if label == "OVER" else (total < mkt)
+    else:
+        return None
+    return "W" if win else "L"
+
+
+def settle(hist, until, get_json=None):
+    """結算 hist 中 result=None 且日期早於 until 的紀錄（in-place），回傳結算筆數。"""
+    pending = [r for r in hist if r.get("result") is None and r.get("date") and r["date"] < until]
+    log.info("settle: total=%d pending=%d (until %s)", len(hist), len(pending), until)
+    if not pending: return 0
+    dates = sorted({r["date"] for r in pending})
+    try:
+        start = (datetime.date.fromisoformat(dates[0]) - datetime.timedelta(days=1)).isoformat()
+    except ValueError:
+        start = dates[0]
+    finals = fetch_finals(start, dates[-1], get_json)
+    log.info("settle %s~%s: %d final games, %d pending picks (1 request)",
+             start, dates[-1], len(finals), len(pending))
+
+    updated = 0
+    for r in pending:
+        h_id, a_id = teams.team_id(r.get("home")), teams.team_id(r.get("away"))
+        scores = None
+        if h_id is not None and a_id is not None:
+            try:
+                prev_day = (datetime.date.fromisoformat(r["date"]) - datetime.timedelta(days=1)).isoformat()
+            except ValueError:
+                prev_day = None
+            scores = finals.get((r["date"], h_id, a_id)) or finals.get((prev_day, h_id, a_id))
+        if scores is None:
+            log.info("settle: no final score for %s %s@%s", r.get("date"), r.get("away"), r.get("home"))
+            continue
+        h_score, a_score = scores
+        try:
+            result = grade(r, h_score, a_score, teams.team_id(r.get("team")) == h_id)
+        except (TypeError, ValueError) as e:
+            log.warning("settle calc error %s: %s", r, e); continue
+        if result is None: continue
+        r["result"] = result
+        updated += 1
+        log.info("Settled [%s] %s (%d-%d) → %s  %s %s", r["date"], "%sv%s" % (r.get("home"), r.get("away")),
+                 h_score, a_score, result, r.get("bet_type", ""), r.get("label") or r.get("team", ""))
+
+    log.info("Auto-settled: %d records", updated)
+    return updated
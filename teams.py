@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+球隊身分表 — 全部來源的球隊表示法對應到同一個整數 ID（= MLB statsapi team id）。
+
+  MLB statsapi   team.id / team.name（"Boston Red Sox"、"Athletics"）
+  Odds API       home_team / away_team / outcome name（全名）
+  ESPN           team.abbreviation（"bos"、"cws"、"wsh"…，含各種備用縮寫）
+  RotoWire       lineup__abbr / data-team（縮寫或隊名）
+  歷史紀錄 / 內部 key（"red sox"）與中文隊名（"紅襪"）
+
+模組載入時把每種寫法標準化（只留小寫英數）後預先建成單一 dict，不再 split()[-1] 取最後一個字、
+也不做子字串比對（"sox" / "reds" 這類撞名不會再發生）。同一個寫法對應到兩隊時於載入時直接拋錯。
+熱路徑（賠率解析、場中推薦）只查一次原字串 dict：ID、key、全名、縮寫的原樣 / 小寫寫法預先放入，
+其他寫法第一次遇到時標準化一次後記住（含查無結果）。
+"""
+import re
+
+# (MLB ID, 內部 key, 全名, 中文, 顯示縮寫, 其他寫法：舊全名 / ESPN、RotoWire 縮寫 / 暱稱)
+TEAMS = (
+    (108, "angels",       "Los Angeles Angels",    "天使",   "LAA", ("la angels",)),
+    (109, "diamondbacks", "Arizona Diamondbacks",  "響尾蛇", "ARI", ("az diamondbacks", "az", "dbacks", "d-backs")),
+    (110, "orioles",      "Baltimore Orioles",     "金鶯",   "BAL", ()),
+    (111, "red sox",      "Boston Red Sox",        "紅襪",   "BOS", ()),
+    (112, "cubs",         "Chicago Cubs",          "小熊",   "CHC", ()),
+    (113, "reds",         "Cincinnati Reds",       "紅人",   "CIN", ()),
+    (114, "guardians",    "Cleveland Guardians",   "守護者", "CLE", ()),
+    (115, "rockies",      "Colorado Rockies",      "落磯",   "COL", ()),
+    (116, "tigers",       "Detroit Tigers",        "老虎",   "DET", ()),
+    (117, "astros",       "Houston Astros",        "太空人", "HOU", ()),
+    (118, "royals",       "Kansas City Royals",    "皇家",   "KC",  ("kcr",)),
+    (119, "dodgers",      "Los Angeles Dodgers",   "道奇",   "LAD", ("la dodgers",)),
+    (120, "nationals",    "Washington Nationals",  "國民",   "WSH", ("was", "wsn", "nats")),
+    (121, "mets",         "New York Mets",         "大都會", "NYM", ("ny mets",)),
+    (133, "athletics",    "Athletics",             "運動家", "ATH", ("oakland athletics", "sacramento athletics",
+                                                                   "oak", "sac", "a's")),
+    (134, "pirates",      "Pittsburgh Pirates",    "海盜",   "PIT", ()),
+    (135, "padres",       "San Diego Padres",      "教士",   "SD",  ("sdp",)),
+    (136, "mariners",     "Seattle Mariners",      "水手",   "SEA", ()),
+    (137, "giants",       "San Francisco Giants",  "巨人",   "SF",  ("sfg",)),
+    (138, "cardinals",    "St. Louis Cardinals",   "紅雀",   "STL", ("st louis cardinals",)),
+    (139, "rays",         "Tampa Bay Rays",        "光芒",   "TB",  ("tbr",)),
+    (140, "rangers",      "Texas Rangers",         "遊騎兵", "TEX", ()),
+    (141, "blue jays",    "Toronto Blue Jays",     "藍鳥",   "TOR", ("jays",)),
+    (142, "twins",        "Minnesota Twins",       "雙城",   "MIN", ()),
+    (143, "phillies",     "Philadelphia Phillies", "費城人", "PHI", ()),
+    (144, "braves",       "Atlanta Braves",        "勇士",   "ATL", ()),
+    (145, "white sox",    "Chicago White Sox",     "白襪",   "CWS", ("chw", "chisox")),
+    (146, "marlins",      "Miami Marlins",         "馬林魚", "MIA", ()),
+    (147, "yankees",      "New York Yankees",      "洋基",   "NYY", ("ny yankees",)),
+    (158, "brewers",      "Milwaukee Brewers",     "釀酒人", "MIL", ()),
+)
+
+KEY  = {t[0]: t[1] for t in TEAMS}   # ID -> 內部 key（舊 MLB_TEAM_ID）
+NAME = {t[0]: t[2] for t in TEAMS}   # ID -> 全名
+ABBR = {t[0]: t[4] for t in TEAMS}   # ID -> 顯示縮寫
+CN   = {t[1]: t[3] for t in TEAMS}   # 內部 key -> 中文
+
+
+def _norm(s):
+    """寫法標準化：只留小寫英數（"St. Louis"、"red sox"、"RedSox" 都對得上）。"""
+    return re.sub(r"[^a-z0-9]", "", s.lower())
+
+
+def _build():
+    idx = {}
+    for tid, key, name, cn, abbr, extra in TEAMS:
+        for s in (key, name, cn, abbr) + extra:
+            k = _norm(s) if s.isascii() else s
+            if not k: continue
+            if idx.setdefault(k, tid) != tid:
+                raise ValueError("teams: %r maps to both %d and %d" % (s, idx[k], tid))
+    return idx
+
+_INDEX = _build()   # 標準化寫法 / 中文 -> ID
+
+_RAW_MAX = 4096     # 原字串快取上限（來源寫法有限；防止異常輸入無限成長）
+_RAW = {tid: tid for tid in KEY}   # 原字串 / ID -> ID（None = 查無）
+for _t in TEAMS:
+    for _s in (_t[1], _t[2], _t[3], _t[4]) + _t[5]:
+        _RAW[_s] = _RAW[_s.lower()] = _RAW[_s.upper()] = _INDEX[_norm(_s) if _s.isascii() else _s]
+_RAW_KEY = {s: KEY[tid] for s, tid in _RAW.items()}   # 原字串 / ID -> 內部 key
+
+
+def _resolve(t):
+    if isinstance(t, dict):
+        return team_id(t.get("id")) or team_id(t.get("name") or t.get("abbreviation") or "")
+    if isinstance(t, int):
+        return t if t in KEY else None
+    if not t: return None
+    s = t.strip()
+    tid = _INDEX.get(_norm(s) if s.isascii() else s)
+    if len(_RAW) < _RAW_MAX:
+        _RAW[t] = tid
+        if tid is not None: _RAW_KEY[t] = KEY[tid]
+    return tid
+
+
+def team_id(t):
+    """任何來源的球隊表示法 -> 整數 ID；無法辨識回傳 None。
+    t 可以是 ID、名稱 / 縮寫 / key / 中文字串，或 statsapi / ESPN 的 team dict（id 優先）。"""
+    try:
+        return _RAW[t]
+    except (KeyError, TypeError):   # 未見過的字串 / dict（不可雜湊）
+        return _resolve(t)
+
+
+def key(t):
+    """內部 key（"red sox"）；無法辨識回傳 None。"""
+    try:
+        return _RAW_KEY[t]
+    except (KeyError, TypeError):
+        return KEY.get(team_id(t))
+
+
+def cn(t, default=None):
+    return CN.get(key(t), default)
+
+
+def name(t, default=None):
+    return NAME.get(team_id(t), default)
+
+
+def abbr(t, default=None):
+    return ABBR.get(team_id(t), default)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+執行追蹤（Chrome trace-event JSON）— 選用的效能剖析模式，mlb_bot_v101.py / live_update.py 共用：
+
+  MLB_TRACE=trace.json      啟用，程式結束時寫出（chrome://tracing、ui.perfetto.dev、speedscope 可直接開啟）
+  MLB_TRACE_SAMPLE_MS=5     另外每 N 毫秒取樣全部執行緒的 Python 堆疊（預設 0 = 不取樣）
+
+span() / @traced 產生完整事件（ph="X"），依執行緒分列：每個 HTTP 請求、抓取來源、predict、
+MC 批次、存檔步驟各一段，可直接看出 I/O 與 CPU 的重疊。取樣堆疊把相鄰相同的框架合併成區段，
+放在獨立的 "sampled stacks" process 下，效果等同火焰圖。
+未啟用時 span() 回傳共用的空 context，@traced 只多一次判斷，不影響正式執行。
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+log = logging.getLogger("tracing")
+
+TRACE_PATH   = os.getenv("MLB_TRACE", "")
+SAMPLE_MS    = float(os.getenv("MLB_TRACE_SAMPLE_MS", "0") or 0)
+SAMPLE_DEPTH = 48   # 取樣堆疊最多保留幾層（由最外層算起）
+
+PID_SPANS, PID_SAMPLES = 1, 2
+_T0      = time.time()
+_lock    = threading.Lock()
+_events  = []
+_names   = {}                 # tid -> 執行緒名稱
+_NULL    = nullcontext({})    # 未啟用時的 span：寫入的 args 直接丟棄
+_stop    = threading.Event()
+_sampler = None
+
+
+def enabled():
+    return bool(TRACE_PATH)
+
+
+def _us(t):
+    return round((t - _T0) * 1e6, 1)
+
+
+def complete(name, cat, t0, t1, **args):
+    """加入一段已結束的區段（t0/t1 為 time.time()），記在目前執行緒。"""
+    if not TRACE_PATH: return
+    th = threading.current_thread()
+    ev = {"name": name, "cat": cat, "ph": "X", "pid": PID_SPANS,
+          "tid": th.ident, "ts": _us(t0), "dur": round((t1 - t0) * 1e6, 1)}
+    if args: ev["args"] = args
+    with _lock:
+        _events.append(ev)
+        _names.setdefault(th.ident, th.name)
+
+
+@contextmanager
+def _span(name, cat, args):
+    t0 = time.time()
+    try:
+        yield args
+    finally:
+        complete(name, cat, t0, time.time(), **args)
+
+
+def span(name, cat="", **args):
+    """區段計時：with tracing.span("GET host", "http", path=...) as a: ...; a["status"] = 200"""
+    if not TRACE_PATH: return _NULL
+    return _span(name, cat, args)
+
+
+def traced(name=None, cat="func"):
+    """函式裝飾器：每次呼叫記為一段（名稱預設為函式名）。"""
+    def deco(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not TRACE_PATH: return fn(*a, **kw)
+            with _span(label, cat, {}):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+
+# ══════════════════════════════════════════════
+# 堆疊取樣
+# ══════════════════════════════════════════════
+
+def _label(f):
+    co = f.f_code
+    return "%s (%s:%d)" % (co.co_name, os.path.basename(co.co_filename), co.co_firstlineno)
+
+
+def _close(tid, frames, now):
+    return [{"name": lbl, "cat": "sample", "ph": "X", "pid": PID_SAMPLES, "tid": tid,
+             "ts": _us(t0), "dur": round((now - t0) * 1e6, 1)} for lbl, t0 in reversed(frames)]
+
+
+def _sample_loop(interval):
+    me, open_ = threading.get_ident(), {}   # tid -> [(框架, 開始時間), ...]（外層在前）
+    while True:
+        stopping = _stop.wait(interval)
+        now, evs = time.time(), []
+        frames = {} if stopping else sys._current_frames()
+        for tid, f in frames.items():
+            if tid == me: continue
+            stack = []
+            while f is not None:
+                stack.append(_label(f)); f = f.f_back
+            stack = stack[::-1][:SAMPLE_DEPTH]
+            cur = open_.get(tid, [])
+            i = 0
+            while i < min(len(cur), len(stack)) and cur[i][0] == stack[i]: i += 1
+            evs += _close(tid, cur[i:], now)
+            open_[tid] = cur[:i] + [(lbl, now) for lbl in stack[i:]]
+        for tid in [t for t in open_ if t not in frames]:
+            evs += _close(tid, open_.pop(tid), now)
+        names = {t.ident: t.name for t in threading.enumerate()}
+        with _lock:
+            _events.extend(evs)
+            for tid in frames:
+                if tid in names: _names.setdefault(tid, names[tid])
+        if stopping: return
+
+
+def save(path=None):
+    """寫出 trace JSON（啟用時程式結束自動呼叫）。"""
+    path = path or TRACE_PATH
+    if not path: return
+    _stop.set()
+    if _sampler is not None: _sampler.join(timeout=5)
+    with _lock:
+        evs, names = list(_events), dict(_names)
+    meta = [{"name": "process_name", "ph": "M", "pid": PID_SPANS, "args": {"name": "spans"}},
+            {"name": "process_name", "ph": "M", "pid": PID_SAMPLES, "args": {"name": "sampled stacks"}}]
+    for pid in (PID_SPANS, PID_SAMPLES):
+        meta += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": n}}
+                 for tid, n in names.items()]
+    doc = {"traceEvents": meta + evs, "displayTimeUnit": "ms",
+           "otherData": {"argv": " ".join(sys.argv), "sample_ms": SAMPLE_MS,
+                         "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(_T0))}}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    log.info("trace: %d events → %s", len(evs), path)
+
+
+if TRACE_PATH:
+    atexit.register(save)
+    if SAMPLE_MS > 0:
+        _sampler = threading.Thread(target=_sample_loop, args=(SAMPLE_MS / 1000.0,),
+                                    name="trace-sampler", daemon=True)
+        _sampler.start()